@@ -0,0 +1,287 @@
+"""
+Offline extractor benchmark.
+Runs every extractor over the recorded fixtures in this repository and
+reports records/sec and ms/page (fastest of --repeat passes) and peak
+Python heap memory (tracemalloc; allocations inside C parsers are not
+counted), optionally per HTML parser backend. Results can be saved as a baseline; later runs are compared
+against it and regressions are flagged (exit code 1).
+
+Usage:
+    python benchmark.py --save-baseline
+    python benchmark.py --backends lxml selectolax html.parser
+    python benchmark.py --only quotes --repeat 50
+    python benchmark.py --json
+
+Fixtures:
+- quotes pages, search results and networkCapture bodies: built by
+  mock_zyte_server from responses/quotes_network_capture_*.json
+- Indeed search results: playground.html
+- FirstCry listing: built from api_response.json
+- Nike products: the products of responses/nike_*.json
+- JSON codec (--json): every responses/*.json and api_response*.json file,
+  decoded and re-encoded (compact and indented) with each installed backend
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import sys
+import time
+import tracemalloc
+from base64 import b64encode
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+ROOT = Path(__file__).parent
+sys.path.insert(0, str(ROOT))
+# The scripts import utils.config, which insists on an API key; none is used here
+os.environ.setdefault("ZYTE_API_KEY", "offline-benchmark")
+
+from utils import json_codec
+from utils.parsing import available_backends
+import mock_zyte_server
+
+DEFAULT_BASELINE = ROOT / "benchmark_baseline.json"
+
+
+@dataclass
+class Case:
+    """One extractor over one set of fixture pages."""
+    name: str
+    extract: Callable
+    pages: List
+    uses_parser: bool = True
+
+
+@dataclass
+class Result:
+    """Fastest pass of a case: pages and records per pass, seconds, peak traced memory."""
+    name: str
+    backend: Optional[str]
+    pages: int
+    records: int
+    seconds: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.backend}]" if self.backend else self.name
+
+    @property
+    def records_per_sec(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+    @property
+    def ms_per_page(self) -> float:
+        return self.seconds * 1000 / self.pages if self.pages else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "records_per_sec": round(self.records_per_sec, 1),
+            "ms_per_page": round(self.ms_per_page, 3),
+            "peak_kb": round(self.peak_bytes / 1024, 1)
+        }
+
+
+def build_cases() -> List[Case]:
+    """Load the extractors and their fixture pages."""
+    fixtures = mock_zyte_server.Fixtures()
+    quote_pages = [
+        mock_zyte_server.render_quotes_page(fixtures.quotes_page(page), f"/page/{page + 1}/")
+        for page in range(1, fixtures.quote_pages + 1)
+    ]
+    search_pages = [
+        mock_zyte_server.render_search_page(fixtures, author, tag)
+        for author, tag in (("Albert Einstein", "life"), ("Jane Austen", "love"),
+                            ("J.K. Rowling", "abilities"))
+    ]
+    job_pages = [(ROOT / "playground.html").read_text(encoding="utf-8")]
+    product_pages = [mock_zyte_server.render_firstcry_page(fixtures.product_list["productList"], 80)]
+    capture_batches = [[
+        {
+            "url": f"http://quotes.toscrape.com/api/quotes?page={page}",
+            "method": "GET",
+            "statusCode": 200,
+            "httpResponseBody": b64encode(mock_zyte_server.quotes_api_body(fixtures, page)).decode()
+        }
+        for page in range(1, fixtures.quote_pages + 1)
+    ]]
+    nike_products = []
+    for path in sorted((ROOT / "responses").glob("nike_*.json")):
+        data = json_codec.loads(path.read_bytes())
+        if isinstance(data, dict):
+            nike_products.extend(data.get("products", []))
+
+    pagination = importlib.import_module("examples.02_pagination_classic")
+    infinite = importlib.import_module("examples.03_pagination_infinite")
+    form = importlib.import_module("examples.04_form_submission")
+    capture = importlib.import_module("examples.01_network_capture")
+    jobs = importlib.import_module("exercises.job_post")
+    firstcry = importlib.import_module("exercises.firstcry_inf")
+    nike = importlib.import_module("solutions.nike_comparison_solution")
+
+    return [
+        Case("quotes_pagination", pagination.extract_quotes, quote_pages),
+        Case("quotes_infinite", infinite.extract_quotes, quote_pages),
+        Case("quotes_search", form.extract_quotes, search_pages),
+        Case("jobs", jobs.extract_jobs, job_pages),
+        Case("firstcry", partial(firstcry.extract_products, base_url="https://www.firstcry.com/"),
+             product_pages),
+        Case("network_capture", capture.process_captures, capture_batches, uses_parser=False),
+        Case("nike_format_product", lambda product: [nike.format_product(product)],
+             nike_products, uses_parser=False),
+    ]
+
+
+def run_case(case: Case, backend: Optional[str], repeat: int) -> Result:
+    """Time repeat passes over the pages, keep the fastest, then measure peak memory of one pass."""
+    kwargs = {"backend": backend} if case.uses_parser else {}
+
+    def one_pass() -> int:
+        return sum(len(case.extract(page, **kwargs)) for page in case.pages)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = one_pass()  # warm-up: imports, selector caches
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            one_pass()
+            best = min(best, time.perf_counter() - start)
+
+        tracemalloc.start()
+        one_pass()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return Result(case.name, backend if case.uses_parser else None,
+                  len(case.pages), records, best, peak)
+
+
+def compare(results: List[Result], baseline: Dict, threshold: float) -> List[str]:
+    """Return a message per metric that got worse than the baseline by more than threshold."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.key)
+        if not base:
+            continue
+        current = result.to_dict()
+        if current["records_per_sec"] < base["records_per_sec"] * (1 - threshold):
+            regressions.append(
+                f"{result.key}: {current['records_per_sec']:.0f} records/s "
+                f"(baseline {base['records_per_sec']:.0f})"
+            )
+        if current["peak_kb"] > base["peak_kb"] * (1 + threshold):
+            regressions.append(
+                f"{result.key}: peak {current['peak_kb']:.0f} KB (baseline {base['peak_kb']:.0f} KB)"
+            )
+    return regressions
+
+
+def print_results(results: List[Result], baseline: Dict):
+    print(f"\n{'Benchmark':34s} {'records/s':>11s} {'ms/page':>9s} {'peak KB':>9s} {'vs baseline':>12s}")
+    print("-" * 79)
+    for result in results:
+        row = result.to_dict()
+        change = ""
+        base = baseline.get(result.key)
+        if base and base["records_per_sec"]:
+            change = f"{(row['records_per_sec'] / base['records_per_sec'] - 1) * 100:+.1f}%"
+        print(f"{result.key:34s} {row['records_per_sec']:11.0f} {row['ms_per_page']:9.3f} "
+              f"{row['peak_kb']:9.1f} {change:>12s}")
+
+
+def json_fixtures() -> List[bytes]:
+    """Raw bytes of the recorded API responses and saved outputs."""
+    paths = sorted((ROOT / "responses").glob("*.json")) + sorted(ROOT.glob("api_response*.json"))
+    return [path.read_bytes() for path in paths]
+
+
+def run_json_benchmark(repeat: int):
+    """Time json_codec loads and dump over the JSON fixtures with every installed backend."""
+    documents = json_fixtures()
+    total_mb = sum(len(document) for document in documents) / 1024 / 1024
+    objects = [json_codec.loads(document) for document in documents]
+
+    def fastest(operation: Callable[[], None]) -> float:
+        operation()  # warm-up
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            operation()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    def dump_all(indent: bool):
+        for obj in objects:
+            json_codec.dump(obj, io.StringIO(), indent=indent)
+
+    print(f"\nJSON codec over {len(documents)} files ({total_mb:.2f} MB), fastest of {repeat} passes")
+    print(f"{'Backend':10s} {'loads ms':>10s} {'dump ms':>10s} {'dump indent ms':>15s} {'loads MB/s':>11s}")
+    print("-" * 60)
+    selected = json_codec.BACKEND
+    try:
+        for backend in json_codec.installed_backends():
+            json_codec.BACKEND = backend
+            loads_seconds = fastest(lambda: [json_codec.loads(document) for document in documents])
+            dump_seconds = fastest(lambda: dump_all(False))
+            indent_seconds = fastest(lambda: dump_all(True))
+            print(f"{backend:10s} {loads_seconds * 1000:10.2f} {dump_seconds * 1000:10.2f} "
+                  f"{indent_seconds * 1000:15.2f} {total_mb / loads_seconds:11.1f}")
+    finally:
+        json_codec.BACKEND = selected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline extractor benchmark")
+    parser.add_argument("--backends", nargs="+", default=None,
+                        help="HTML parser backends to compare (default: fastest installed)")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over each fixture set; the fastest counts")
+    parser.add_argument("--json", action="store_true",
+                        help="Benchmark the JSON codec backends instead of the extractors")
+    parser.add_argument("--only", default=None, help="Run benchmarks whose name contains this")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Baseline file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown / memory growth before flagging (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.json:
+        run_json_benchmark(args.repeat)
+        return
+
+    backends = args.backends or available_backends()[:1]
+    cases = [case for case in build_cases() if not args.only or args.only in case.name]
+
+    results = []
+    for case in cases:
+        for backend in (backends if case.uses_parser else [None]):
+            results.append(run_case(case, backend, args.repeat))
+
+    baseline_path = Path(args.baseline)
+    baseline = json_codec.loads(baseline_path.read_bytes()) if baseline_path.exists() else {}
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        baseline.update({result.key: result.to_dict() for result in results})
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json_codec.dump(baseline, f, indent=True)
+        print(f"\nSaved baseline to {baseline_path}")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\nRegressions (more than {args.threshold:.0%} worse than baseline):")
+        for message in regressions:
+            print(f"  - {message}")
+        sys.exit(1)
+    if baseline:
+        print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
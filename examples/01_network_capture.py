@@ -5,8 +5,6 @@ Demonstrates network request capture and analysis using Zyte API.
 
 import sys
 from pathlib import Path
-import json
-from base64 import b64decode
 import requests
 from typing import Dict, List, Optional
 import time
@@ -14,7 +12,10 @@ import os
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client
+from utils.jsonl_writer import write_jsonl
+from utils.captures import decode_captures, filter_captures, wrap_captures
 
 def capture_network_requests(url: str, filter_pattern: str = "/api/", 
                            max_retries: int = 3) -> Optional[List[Dict]]:
@@ -53,17 +54,12 @@ def capture_network_requests(url: str, filter_pattern: str = "/api/",
             print(f"Capturing network requests (attempt {attempt + 1}/{max_retries})...")
             
             # Send the request to the Zyte API
-            response = requests.post(
-                ZYTE_API_ENDPOINT,
-                auth=(ZYTE_API_KEY, ""),
-                json=payload,
-                timeout=30
-            )
+            response = get_client().post(payload, timeout=30)
             response.raise_for_status()
             
             # Parse the response
             result = response.json()
-            captures = result.get("networkCapture", [])
+            captures = wrap_captures(result)
             
             if not captures:
                 print("No network captures found. Retrying...")
@@ -91,27 +87,29 @@ def capture_network_requests(url: str, filter_pattern: str = "/api/",
     
     return None
 
-def process_captures(captures: List[Dict]) -> List[Dict]:
+def process_captures(captures: List, url_contains: Optional[str] = None,
+                     workers: int = 0) -> List[Dict]:
     """
     Process network captures and extract data.
     
+    Bodies are decoded only for captures that pass the URL filter.
+    
     Args:
-        captures (list): Raw network captures
+        captures (list): Raw network captures or NetworkCapture objects
+        url_contains (str): Only decode captures whose URL contains this
+        workers (int): Decode bodies in this many processes (0: in-process)
         
     Returns:
         list: Processed data from captures
     """
+    if captures and isinstance(captures[0], dict):
+        captures = wrap_captures(captures)
+    selected = decode_captures(list(filter_captures(captures, url_contains)), workers)
     processed_data = []
     
-    for capture in captures:
+    for capture in selected:
         try:
-            # Get and decode response body
-            body = capture.get("httpResponseBody", "")
-            if not body:
-                continue
-                
-            decoded_text = b64decode(body).decode()
-            data = json.loads(decoded_text)
+            data = capture.json()
             
             # Extract quotes from the response
             for quote in data.get("quotes", []):
@@ -119,9 +117,9 @@ def process_captures(captures: List[Dict]) -> List[Dict]:
                     "author": quote["author"]["name"],
                     "tags": quote["tags"],
                     "text": quote["text"],
-                    "url": capture.get("url"),  # Include request URL
-                    "method": capture.get("method"),  # Include HTTP method
-                    "status": capture.get("status"),  # Include HTTP status
+                    "url": capture.url,  # Include request URL
+                    "method": capture.method,  # Include HTTP method
+                    "status": capture.status,  # Include HTTP status
                     "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
                 }
                 processed_data.append(quote_data)
@@ -142,13 +140,13 @@ def save_to_json(data: List[Dict], filename: str = "network_captures.json"):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'captures': data,
             'metadata': {
                 'count': len(data),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # Example usage with quotes.toscrape.com
@@ -160,9 +158,9 @@ def main():
     if captures:
         print(f"\nFound {len(captures)} network captures")
         
-        # Save to JSON
-        filename = f"quotes_network_capture_{time.strftime('%Y%m%d_%H%M%S')}.json"
-        save_to_json(captures, filename)
+        # Save to JSON Lines
+        filename = f"quotes_network_capture_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        write_jsonl(captures, filename, url=url)
         print(f"Saved results to {filename}")
         
         # Print sample data
@@ -6,27 +6,64 @@ Demonstrates classic pagination handling with Next button navigation.
 import sys
 from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
-import json
 import time
 from typing import List, Dict, Optional
 import os
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.latency import timed_phase
+from utils.parsing import Node, PageExtraction, extract_page, parse_html
+from utils.schema import compile_schema
+from utils.pipeline import PARSE, parse_pipeline
+from utils.render_mode import RenderModeSelector, response_html
+from utils.prefetch import prefetch_pages
+from utils.frontier import Frontier, crawl
+from utils.jsonl_writer import JsonlWriter
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-def scrape_with_pagination(url: str, max_pages: int = 3) -> List[Dict]:
+QUOTE_SCHEMA = compile_schema({
+    "item": ".quote",
+    "fields": {
+        "text": {"selector": ".text", "required": True, "process": lambda text: text[1:-1]},  # Remove surrounding quotes
+        "author": {"selector": ".author", "required": True},
+        "tags": {"selector": ".tags .tag", "many": True},
+        "scraped_at": {"value": lambda: time.strftime("%Y-%m-%d %H:%M:%S")}
+    }
+})
+
+# Quote pages are server-rendered: after one probe they are fetched as raw HTTP
+QUOTE_RENDER_MODES = RenderModeSelector(QUOTE_SCHEMA)
+
+def build_page_payload(page_url: str) -> Dict:
+    """Zyte API payload for one quotes page."""
+    return {
+        "url": page_url,
+        "browserHtml": True,
+        "actions": [
+            {
+                "action": "waitForSelector",
+                "selector": {"type": "css", "value": ".quote"}
+            }
+        ]
+    }
+
+def scrape_with_pagination(url: str, max_pages: int = 3, writer: Optional[JsonlWriter] = None,
+                           metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
     """
     Scrape data using classic pagination with Next button.
     
     Args:
         url (str): Starting URL
         max_pages (int): Maximum number of pages to scrape
+        writer (JsonlWriter): Streams each page's quotes to disk as it is extracted
+        metrics (MetricsRegistry): Collects pages, records and errors
         
     Returns:
         list: Collection of quotes from all pages
     """
+    metrics = metrics if metrics is not None else MetricsRegistry()
     all_quotes = []
     current_page = 1
     current_url = url
@@ -34,111 +71,246 @@ def scrape_with_pagination(url: str, max_pages: int = 3) -> List[Dict]:
     while current_page <= max_pages:
         print(f"\nScraping page {current_page}...")
         
-        # Prepare the request payload
-        payload = {
-            "url": current_url,
-            "browserHtml": True,
-            "actions": [
-                {
-                    "action": "waitForSelector",
-                    "selector": {"type": "css", "value": ".quote"}
-                }
-            ]
-        }
-        
         try:
             # Make the request
-            response = requests.post(
-                ZYTE_API_ENDPOINT,
-                auth=(ZYTE_API_KEY, ""),
-                json=payload,
-                timeout=30
-            )
+            response = QUOTE_RENDER_MODES.post(build_page_payload(current_url), timeout=30)
             response.raise_for_status()
             
             # Parse the response
             result = response.json()
-            html_content = result.get("browserHtml", "")
+            html_content = response_html(result)
             
             if not html_content:
                 print("No HTML content received")
                 break
             
-            # Extract quotes from the page
-            new_quotes = extract_quotes(html_content)
+            # Extract quotes and the next-page link from one parse
+            with timed_phase(response.timing, "parse"):
+                page = parse_quotes_page(html_content, current_url)
+            new_quotes = page.records
             
             if not new_quotes:
                 print("No quotes found on this page")
                 break
             
             all_quotes.extend(new_quotes)
+            metrics.incr("pages")
+            metrics.records(len(new_quotes))
+            if writer is not None:
+                writer.write_many(new_quotes)
             print(f"Found {len(new_quotes)} quotes on page {current_page}")
             
-            # Check for next page
-            soup = BeautifulSoup(html_content, 'html.parser')
-            next_link = soup.select_one('li.next a')
-            
-            if not next_link:
+            if not page.next_url:
                 print("No next page link found. Reached last page.")
                 break
             
             # Update URL for next page
-            next_url = next_link.get('href')
-            if next_url:
-                if next_url.startswith('/'):
-                    # Handle relative URLs
-                    current_url = f"http://quotes.toscrape.com{next_url}"
-                else:
-                    current_url = next_url
-            else:
-                print("Invalid next page URL")
-                break
+            current_url = page.next_url
             
             current_page += 1
-            time.sleep(2)  # Rate limiting
             
         except requests.exceptions.RequestException as e:
             print(f"Request error: {str(e)}")
+            metrics.error(e)
             break
             
         except Exception as e:
             print(f"Error: {str(e)}")
+            metrics.error(e)
             break
     
     return all_quotes
 
-def extract_quotes(html_content: str) -> List[Dict]:
+def fetch_quotes_page(page_url: str) -> PageExtraction:
+    """
+    Fetch and parse one quotes page.
+    
+    Raises:
+        requests.exceptions.RequestException: If the API request fails
+        ValueError: If the response holds no HTML
+    """
+    response = QUOTE_RENDER_MODES.post(build_page_payload(page_url), timeout=30)
+    response.raise_for_status()
+    html_content = response_html(response.json())
+    if not html_content:
+        raise ValueError(f"No HTML content received for {page_url}")
+    with timed_phase(response.timing, "parse"):
+        return parse_quotes_page(html_content, page_url)
+
+def scrape_with_prefetch(url: str, max_pages: int = 10, depth: int = 4,
+                         writer: Optional[JsonlWriter] = None,
+                         metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
+    """
+    Scrape numbered pages, fetching the next pages before their Next links
+    are seen. Pages are still checked against the Next chain and stop at
+    the last page; see utils.prefetch.prefetch_pages.
+    
+    Args:
+        url (str): Starting URL, e.g. http://quotes.toscrape.com/page/1/
+        max_pages (int): Maximum number of pages to scrape
+        depth (int): Pages fetched ahead of the current one
+        writer (JsonlWriter): Streams each page's quotes to disk as it is extracted
+        metrics (MetricsRegistry): Collects pages, records and errors
+        
+    Returns:
+        list: Collection of quotes from all pages, in page order
+    """
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    all_quotes = []
+    try:
+        for page_number, page in enumerate(prefetch_pages(url, fetch_quotes_page,
+                                                          max_pages=max_pages, depth=depth), 1):
+            if not page.records:
+                print("No quotes found on this page")
+                break
+            all_quotes.extend(page.records)
+            metrics.incr("pages")
+            metrics.records(len(page.records))
+            if writer is not None:
+                writer.write_many(page.records)
+            print(f"Found {len(page.records)} quotes on page {page_number}")
+    except requests.exceptions.RequestException as e:
+        print(f"Request error: {str(e)}")
+        metrics.error(e)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        metrics.error(e)
+    
+    return all_quotes
+
+def scrape_with_frontier(start_urls: List[str], max_pages: int = 10, workers: int = 4,
+                         writer: Optional[JsonlWriter] = None,
+                         metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
+    """
+    Follow the Next chains of several listings at once through a crawl
+    frontier. Each fetched page enqueues its Next link one level deeper, so
+    max_pages bounds every chain; links another chain already queued are
+    fetched once.
+    
+    Args:
+        start_urls (list): First page of each listing, e.g. .../page/1/ and .../tag/love/
+        max_pages (int): Maximum number of pages per listing
+        workers (int): Pages fetched at once
+        writer (JsonlWriter): Streams each page's quotes to disk as it is extracted
+        metrics (MetricsRegistry): Collects pages, records and errors
+        
+    Returns:
+        list: Collection of quotes, listing by listing in page order
+    """
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    frontier = Frontier(max_depth=max_pages - 1)
+    for seed, start_url in enumerate(start_urls):
+        frontier.add(start_url, seed=seed)
+    
+    def handle(request):
+        page = fetch_quotes_page(request.url)
+        if page.records and page.next_url:
+            frontier.add(page.next_url, depth=request.depth + 1, **request.meta)
+        return page.records
+    
+    pages = {}
+    for result in crawl(frontier, handle, workers=workers):
+        if not result.ok:
+            print(f"Error on {result.request.url}: {str(result.error)}")
+            metrics.error(result.error)
+            continue
+        pages[(result.request.meta["seed"], result.request.depth)] = result.records
+        metrics.incr("pages")
+        metrics.records(len(result.records))
+        if writer is not None:
+            writer.write_many(result.records)
+        print(f"Found {len(result.records)} quotes on {result.request.url}")
+    
+    metrics.incr("duplicate_pages", frontier.stats["duplicates"])
+    if frontier.stats["duplicates"]:
+        print(f"Skipped {frontier.stats['duplicates']} pages already queued")
+    return [quote for key in sorted(pages) for quote in pages[key]]
+
+def scrape_pages(urls: List[str], concurrency: int = 5, workers: Optional[int] = None,
+                 metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
+    """
+    Scrape a known list of page URLs concurrently, parsing pages in worker
+    processes while the remaining pages download.
+    
+    Args:
+        urls (list): Page URLs, e.g. http://quotes.toscrape.com/page/N/
+        concurrency (int): Maximum number of pages rendered at once
+        workers (int): Parser processes (default: CPU count, at most one per page)
+        metrics (MetricsRegistry): Collects pages, records and errors
+        
+    Returns:
+        list: Collection of quotes from all pages, in page order
+    """
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    payloads = [QUOTE_RENDER_MODES.payload_for(build_page_payload(page_url), timeout=30)
+                for page_url in urls]
+    
+    def report(result):
+        if result.ok:
+            print(f"Fetched {urls[result.index]}")
+        else:
+            print(f"Request error for {urls[result.index]}: {str(result.error)}")
+    
+    pages = parse_pipeline(payloads, extract_quotes, concurrency=concurrency,
+                           workers=workers, timeout=30, on_fetch=report,
+                           prefetched=QUOTE_RENDER_MODES.pop_probed)
+    parsed = []
+    for page in pages:
+        if page.ok:
+            metrics.incr("pages")
+            metrics.records(len(page.records))
+        else:
+            metrics.error(page.error)
+            if page.stage == PARSE:
+                print(f"Parse error for {urls[page.index]}: {str(page.error)}")
+        parsed.append(page)
+    
+    all_quotes = []
+    for page in sorted(parsed, key=lambda p: p.index):
+        if page.ok:
+            all_quotes.extend(page.records)
+    
+    return all_quotes
+
+def parse_quotes_page(html_content: str, page_url: str, backend: Optional[str] = None) -> PageExtraction:
+    """
+    Extract quotes and the next-page link from a single parse of the page.
+    
+    Args:
+        html_content (str): HTML content to parse
+        page_url (str): URL of the page, used to resolve the next link
+        backend (str): HTML parser backend (default: fastest installed)
+        
+    Returns:
+        PageExtraction: Quotes in .records, absolute next-page URL in .next_url
+    """
+    return extract_page(html_content, quotes_from_document, next_selector='li.next a',
+                        base_url=page_url, backend=backend)
+
+def extract_quotes(html_content: str, backend: Optional[str] = None) -> List[Dict]:
     """
     Extract quotes from the page.
     
     Args:
         html_content (str): HTML content to parse
+        backend (str): HTML parser backend (default: fastest installed)
         
     Returns:
         list: Extracted quotes
     """
-    quotes = []
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    for quote_div in soup.select('.quote'):
-        try:
-            # Extract quote data
-            text = quote_div.select_one('.text').get_text(strip=True)
-            author = quote_div.select_one('.author').get_text(strip=True)
-            tags = [tag.get_text(strip=True) for tag in quote_div.select('.tags .tag')]
-            
-            quotes.append({
-                'text': text[1:-1],  # Remove surrounding quotes
-                'author': author,
-                'tags': tags,
-                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
-            })
-            
-        except Exception as e:
-            print(f"Error extracting quote: {str(e)}")
-            continue
+    return quotes_from_document(parse_html(html_content, backend))
+
+def quotes_from_document(document: Node) -> List[Dict]:
+    """
+    Extract quotes from an already parsed page.
     
-    return quotes
+    Args:
+        document (Node): Parsed page from parse_html()
+        
+    Returns:
+        list: Extracted quotes
+    """
+    return QUOTE_SCHEMA.extract(document, on_error=lambda e: print(f"Error extracting quote: {str(e)}"))
 
 def save_to_json(quotes: List[Dict], filename: str = None):
     """
@@ -152,27 +324,30 @@ def save_to_json(quotes: List[Dict], filename: str = None):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'quotes': quotes,
             'metadata': {
                 'count': len(quotes),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
-    # Example usage
-    url = "http://quotes.toscrape.com/page/1/"
-    print(f"Starting pagination scrape from: {url}")
+    # Example usage: two listings crawled together through one frontier
+    urls = ["http://quotes.toscrape.com/page/1/", "http://quotes.toscrape.com/tag/love/"]
+    print(f"Starting pagination scrape from: {', '.join(urls)}")
     
-    quotes = scrape_with_pagination(url, max_pages=3)
+    # Stream quotes to JSON Lines as each page is extracted
+    filename = f"quotes_pagination_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    metrics = MetricsRegistry()
+    with JsonlWriter(filename, metadata={"urls": urls}) as writer:
+        quotes = scrape_with_frontier(urls, max_pages=3, writer=writer, metrics=metrics)
+    metrics.finish()
+    print()
+    print_metrics_table({"frontier": metrics.to_dict()})
     
     if quotes:
         print(f"\nFound {len(quotes)} total quotes")
-        
-        # Save to JSON
-        filename = f"quotes_pagination_{time.strftime('%Y%m%d_%H%M%S')}.json"
-        save_to_json(quotes, filename)
         print(f"Saved results to {filename}")
         
         # Print sample quotes
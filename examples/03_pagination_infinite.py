@@ -6,28 +6,46 @@ Demonstrates infinite scroll handling using Zyte API.
 import sys
 from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
-import json
 import time
 from typing import List, Dict, Optional
 import os
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client
+from utils.latency import timed_phase
+from utils.schema import compile_schema
+from utils.dedup import DedupStore
+from utils.jsonl_writer import JsonlWriter
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
+QUOTE_SCHEMA = compile_schema({
+    "item": ".quote",
+    "fields": {
+        "text": {"selector": ".text", "required": True, "process": lambda text: text[1:-1]},  # Remove surrounding quotes
+        "author": {"selector": ".author", "required": True},
+        "tags": {"selector": ".tags .tag", "many": True},
+        "scraped_at": {"value": lambda: time.strftime("%Y-%m-%d %H:%M:%S")}
+    }
+})
+
+def scrape_infinite_scroll(url: str, max_scrolls: int = 3, writer: Optional[JsonlWriter] = None,
+                           metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
     """
     Scrape data from an infinite scroll page.
     
     Args:
         url (str): Target URL
         max_scrolls (int): Maximum number of scroll operations
+        writer (JsonlWriter): Streams new quotes to disk after each scroll
+        metrics (MetricsRegistry): Collects scrolls, records and errors
         
     Returns:
         list: Collection of quotes from all scrolls
     """
-    all_quotes = []
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    all_quotes = DedupStore(("text", "author"))
     current_scroll = 0
     
     # Initial request to get the page
@@ -61,12 +79,7 @@ def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
                 ])
             
             # Make the request
-            response = requests.post(
-                ZYTE_API_ENDPOINT,
-                auth=(ZYTE_API_KEY, ""),
-                json=payload,
-                timeout=30
-            )
+            response = get_client().post(payload, timeout=30)
             response.raise_for_status()
             
             # Parse the response
@@ -78,85 +91,55 @@ def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
                 break
             
             # Extract quotes
-            new_quotes = extract_quotes(html_content)
+            with timed_phase(response.timing, "parse"):
+                new_quotes = extract_quotes(html_content)
             
             if not new_quotes:
                 print("No new quotes found. Ending scroll.")
                 break
             
             # Check for duplicates
-            new_count = 0
-            for quote in new_quotes:
-                if not is_duplicate(quote, all_quotes):
-                    all_quotes.append(quote)
-                    new_count += 1
+            added = all_quotes.extend(new_quotes)
+            if writer is not None:
+                writer.write_many(added)
             
-            print(f"Found {new_count} new quotes (Total: {len(all_quotes)})")
+            metrics.incr("scrolls")
+            metrics.records(len(added))
+            print(f"Found {len(added)} new quotes (Total: {len(all_quotes)})")
             
-            if new_count == 0:
+            if not added:
                 print("No new content loaded. Reached end of infinite scroll.")
                 break
             
             current_scroll += 1
-            time.sleep(2)  # Rate limiting
             
         except requests.exceptions.RequestException as e:
             print(f"Request error: {str(e)}")
+            metrics.error(e)
             break
             
         except Exception as e:
             print(f"Error: {str(e)}")
+            metrics.error(e)
             break
     
-    return all_quotes
+    return all_quotes.to_list()
 
-def extract_quotes(html_content: str) -> List[Dict]:
+def extract_quotes(html_content: str, backend: Optional[str] = None) -> List[Dict]:
     """
     Extract quotes from the page.
     
     Args:
         html_content (str): HTML content to parse
+        backend (str): HTML parser backend (default: fastest installed)
         
     Returns:
         list: Extracted quotes
     """
-    quotes = []
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    for quote_div in soup.select('.quote'):
-        try:
-            # Extract quote data
-            text = quote_div.select_one('.text').get_text(strip=True)
-            author = quote_div.select_one('.author').get_text(strip=True)
-            tags = [tag.get_text(strip=True) for tag in quote_div.select('.tags .tag')]
-            
-            quotes.append({
-                'text': text[1:-1],  # Remove surrounding quotes
-                'author': author,
-                'tags': tags,
-                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
-            })
-            
-        except Exception as e:
-            print(f"Error extracting quote: {str(e)}")
-            continue
-    
-    return quotes
-
-def is_duplicate(quote: Dict, existing_quotes: List[Dict]) -> bool:
-    """
-    Check if a quote is already in the collection.
-    
-    Args:
-        quote (dict): Quote to check
-        existing_quotes (list): Existing quotes
-        
-    Returns:
-        bool: True if quote is a duplicate
-    """
-    return any(
-        q['text'] == quote['text'] and q['author'] == quote['author']
-        for q in existing_quotes
+    return QUOTE_SCHEMA.extract_html(
+        html_content,
+        on_error=lambda e: print(f"Error extracting quote: {str(e)}"),
+        backend=backend
     )
 
 def save_to_json(quotes: List[Dict], filename: str = None):
@@ -171,27 +154,30 @@ def save_to_json(quotes: List[Dict], filename: str = None):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'quotes': quotes,
             'metadata': {
                 'count': len(quotes),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # Example usage
     url = "http://quotes.toscrape.com/scroll"
     print(f"Starting infinite scroll scrape for: {url}")
     
-    quotes = scrape_infinite_scroll(url, max_scrolls=3)
+    # Stream quotes to JSON Lines as each scroll is extracted
+    filename = f"quotes_infinite_scroll_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    metrics = MetricsRegistry()
+    with JsonlWriter(filename, metadata={"url": url}) as writer:
+        quotes = scrape_infinite_scroll(url, max_scrolls=3, writer=writer, metrics=metrics)
+    metrics.finish()
+    print()
+    print_metrics_table({"scroll": metrics.to_dict()})
     
     if quotes:
         print(f"\nFound {len(quotes)} total quotes")
-        
-        # Save to JSON
-        filename = f"quotes_infinite_scroll_{time.strftime('%Y%m%d_%H%M%S')}.json"
-        save_to_json(quotes, filename)
         print(f"Saved results to {filename}")
         
         # Print sample quotes
@@ -6,29 +6,44 @@ Demonstrates form submission and data extraction using Zyte API.
 import sys
 from pathlib import Path
 import requests
-from parsel import Selector
-import json
 import time
-from typing import Dict, List, Optional
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import os
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client
+from utils.schema import compile_schema
+from utils.pipeline import PARSE, ParsedPage, parse_pipeline
+from utils.jsonl_writer import write_jsonl
+from utils.form_replay import FormReplayer
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-def search_quotes(author: str = "Albert Einstein", tag: str = "world") -> Optional[List[Dict]]:
+QUOTE_SCHEMA = compile_schema({
+    "item": ".quote",
+    "fields": {
+        "author": {"selector": ".author", "deep": False},
+        "tags": {"selector": ".tag", "deep": False, "many": True},
+        "text": {"selector": ".content", "deep": False, "required": True,
+                 "process": lambda text: text[1:-1]},  # Remove quotes
+        "scraped_at": {"value": lambda: time.strftime("%Y-%m-%d %H:%M:%S")}
+    }
+})
+
+def build_search_payload(author: str, tag: str) -> Dict:
     """
-    Search for quotes using form submission.
+    Build the Zyte API payload that fills in and submits the search form.
     
     Args:
-        author (str): Author name to search for (default: Albert Einstein)
-        tag (str): Tag to filter by (default: world)
+        author (str): Author name to search for
+        tag (str): Tag to filter by
         
     Returns:
-        list: Collection of matching quotes
+        dict: Zyte API request payload
     """
-    # Define the payload for the Zyte API request
-    payload = {
+    return {
         "url": "http://quotes.toscrape.com/search.aspx",
         "browserHtml": True,
         "actions": [
@@ -61,16 +76,44 @@ def search_quotes(author: str = "Albert Einstein", tag: str = "world") -> Option
         ]
     }
 
+# search.aspx is an ASP.NET postback: after one browser submission the form
+# (action, __VIEWSTATE, submit button) is replayed as a plain HTTP POST
+SEARCH_FORM = FormReplayer(build_search_payload)
+
+def search_quotes(author: str = "Albert Einstein", tag: str = "world",
+                  replay: bool = True) -> Optional[List[Dict]]:
+    """
+    Search for quotes using form submission.
+    
+    Args:
+        author (str): Author name to search for (default: Albert Einstein)
+        tag (str): Tag to filter by (default: world)
+        replay (bool): Replay the recorded form over HTTP instead of driving
+            the browser every time (falls back to the browser when rejected)
+        
+    Returns:
+        list: Collection of matching quotes
+    """
+    if replay:
+        try:
+            print(f"Searching for quotes by {author} with tag '{tag}'...")
+            html_content, mode = SEARCH_FORM.submit(author=author, tag=tag)
+            return extract_quotes(html_content)
+        except requests.exceptions.RequestException as e:
+            print(f"Request error: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            return None
+    
+    # Define the payload for the Zyte API request
+    payload = build_search_payload(author, tag)
+
     try:
         print(f"Searching for quotes by {author} with tag '{tag}'...")
         
         # Send the request to the Zyte API
-        response = requests.post(
-            ZYTE_API_ENDPOINT,
-            auth=(ZYTE_API_KEY, ""),
-            json=payload,
-            timeout=30
-        )
+        response = get_client().post(payload, timeout=30)
         
         # Check for successful response
         if response.status_code != 200:
@@ -95,36 +138,159 @@ def search_quotes(author: str = "Albert Einstein", tag: str = "world") -> Option
         print(f"Error: {str(e)}")
         return None
 
-def extract_quotes(html_content: str) -> List[Dict]:
+def sweep_searches(authors: Iterable[str], tags: Iterable[str]) -> List[Dict]:
     """
-    Extract quotes from HTML content using Parsel.
+    Every (author, tag) combination as search parameters.
     
     Args:
-        html_content (str): HTML content to parse
+        authors (iterable): Author names from the #author dropdown
+        tags (iterable): Tags from the #tag dropdown
         
     Returns:
-        list: Extracted quotes
+        list: Search parameters, each {"author": ..., "tag": ...}
     """
-    quotes = []
-    selector = Selector(html_content)
+    return [{"author": author, "tag": tag} for author, tag in product(authors, list(tags))]
+
+def _search_pages(searches: List[Dict], concurrency: int, workers: Optional[int],
+                  verbose: bool) -> Iterator[ParsedPage]:
+    payloads = [build_search_payload(**search) for search in searches]
     
-    # Find all quotes on the page
-    for quote in selector.css(".quote"):
-        try:
-            # Extract quote data using CSS selectors
-            quote_data = {
-                "author": quote.css(".author::text").get(),
-                "tags": quote.css(".tag::text").getall(),
-                "text": quote.css(".content::text").get()[1:-1],  # Remove quotes
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            quotes.append(quote_data)
-            
-        except Exception as e:
-            print(f"Error extracting quote: {str(e)}")
-            continue
+    def report(result):
+        search = searches[result.index]
+        if not result.ok:
+            print(f"Request error for {search['author']} with tag '{search['tag']}': {str(result.error)}")
+        elif verbose:
+            print(f"Finished search for {search['author']} with tag '{search['tag']}'")
+    
+    for page in parse_pipeline(payloads, extract_quotes, concurrency=concurrency,
+                               workers=workers, timeout=30, on_fetch=report):
+        if page.stage == PARSE:
+            search = searches[page.index]
+            print(f"Parse error for {search['author']} with tag '{search['tag']}': {str(page.error)}")
+        yield page
+
+def stream_search_quotes(searches: Iterable[Dict], concurrency: int = 5,
+                         workers: Optional[int] = None, verbose: bool = True,
+                         replay: bool = True,
+                         metrics: Optional[MetricsRegistry] = None) -> Iterator[Tuple[Dict, Optional[List[Dict]]]]:
+    """
+    Run form searches concurrently and yield each one as soon as it is parsed.
+    
+    Suited to large sweeps (see sweep_searches): requests go through the
+    shared adaptive rate limiter, at most concurrency renders are in flight
+    and parsing runs in worker processes, so results arrive while the rest
+    of the batch is still rendering.
+    
+    With replay, the first search goes through the browser to record the
+    form and the rest are replayed as HTTP POSTs; searches whose replay is
+    rejected (stale viewstate) are rendered in the browser afterwards.
+    Replays that fail with a request error are reported and yielded as
+    failures without re-recording the form.
+    
+    Args:
+        searches (iterable): Search parameters, each {"author": ..., "tag": ...}
+        concurrency (int): Maximum number of searches rendered at once
+        workers (int): Parser processes (default: CPU count, at most one per search)
+        verbose (bool): Print a line per finished search (errors always print)
+        replay (bool): Replay the recorded form over HTTP
+        metrics (MetricsRegistry): Collects searches by mode, records and errors
+        
+    Yields:
+        tuple: (search, quotes) in completion order; quotes is None on failure
+    """
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    
+    def done(search: Dict, quotes: List[Dict], mode: str) -> Tuple[Dict, List[Dict]]:
+        metrics.incr(mode)
+        metrics.records(len(quotes))
+        return search, quotes
     
-    return quotes
+    searches = list(searches)
+    # Two replay rounds: a rejected batch re-records the form once and retries
+    for attempt in range(2 if replay else 0):
+        if not searches:
+            break
+        if SEARCH_FORM.template is None or attempt > 0:
+            # Record (or refresh) the form with a browser submission
+            first, searches = searches[0], searches[1:]
+            try:
+                html_content = SEARCH_FORM.record(**first)
+            except requests.exceptions.RequestException as e:
+                print(f"Request error for {first['author']} with tag '{first['tag']}': {str(e)}")
+                metrics.error(e)
+                yield first, None
+                # Nothing (fresh) to replay: the rest go through the browser
+                break
+            yield done(first, extract_quotes(html_content), "browser_searches")
+            if SEARCH_FORM.template is None:
+                print("No search form found on the result page; submitting through the browser")
+                break
+        
+        stale = []
+        for index, html_content, error in SEARCH_FORM.replay_many(searches, concurrency=concurrency):
+            search = searches[index]
+            if error is not None:
+                # The request failed; the form itself was not rejected
+                print(f"Request error for {search['author']} with tag '{search['tag']}': {str(error)}")
+                metrics.error(error)
+                yield search, None
+                continue
+            if html_content is None:
+                stale.append(search)
+                continue
+            if verbose:
+                print(f"Finished search for {search['author']} with tag '{search['tag']}'")
+            yield done(search, extract_quotes(html_content), "replayed_searches")
+        
+        if stale:
+            print(f"{len(stale)} replayed searches were rejected")
+            metrics.incr("rejected_replays", len(stale))
+        searches = stale
+    
+    for page in _search_pages(searches, concurrency, workers, verbose):
+        if page.ok:
+            yield done(searches[page.index], page.records, "browser_searches")
+        else:
+            metrics.error(page.error)
+            yield searches[page.index], None
+
+def search_quotes_batch(searches: List[Dict], concurrency: int = 5,
+                        workers: Optional[int] = None) -> List[Tuple[Dict, Optional[List[Dict]]]]:
+    """
+    Run several form searches concurrently, parsing results in worker
+    processes while the remaining searches render.
+    
+    Args:
+        searches (list): Search parameters, each {"author": ..., "tag": ...}
+        concurrency (int): Maximum number of searches rendered at once
+        workers (int): Parser processes (default: CPU count, at most one per search)
+        
+    Returns:
+        list: (search, quotes) pairs in input order; quotes is None on failure
+    """
+    searches = list(searches)
+    pages = _search_pages(searches, concurrency, workers, verbose=True)
+    return [
+        (searches[page.index], page.records if page.ok else None)
+        for page in sorted(pages, key=lambda p: p.index)
+    ]
+
+def extract_quotes(html_content: str, backend: Optional[str] = None) -> List[Dict]:
+    """
+    Extract quotes from HTML content.
+    
+    Args:
+        html_content (str): HTML content to parse
+        backend (str): HTML parser backend (default: fastest installed)
+        
+    Returns:
+        list: Extracted quotes
+    """
+    return QUOTE_SCHEMA.extract_html(
+        html_content,
+        on_error=lambda e: print(f"Error extracting quote: {str(e)}"),
+        backend=backend
+    )
 
 def save_to_json(quotes: List[Dict], filename: str = None):
     """
@@ -138,13 +304,13 @@ def save_to_json(quotes: List[Dict], filename: str = None):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'quotes': quotes,
             'metadata': {
                 'count': len(quotes),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # Example searches with known working combinations
@@ -163,15 +329,14 @@ def main():
         }
     ]
     
-    for search in searches:
-        quotes = search_quotes(**search)
-        
+    metrics = MetricsRegistry()
+    for search, quotes in stream_search_quotes(searches, metrics=metrics):
         if quotes:
             print(f"\nFound {len(quotes)} matching quotes")
             
-            # Save to JSON
-            filename = f"quotes_search_{search['author'].lower().replace(' ', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.json"
-            save_to_json(quotes, filename)
+            # Save to JSON Lines
+            filename = f"quotes_search_{search['author'].lower().replace(' ', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+            write_jsonl(quotes, filename, **search)
             print(f"Saved results to {filename}")
             
             # Print sample quotes
@@ -184,8 +349,10 @@ def main():
                 print("-" * 30)
         else:
             print(f"No quotes found for {search['author']} with tag '{search['tag']}'")
-        
-        time.sleep(2)  # Pause between searches
+    
+    metrics.finish()
+    print()
+    print_metrics_table({"form sweep": metrics.to_dict()})
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -5,13 +5,13 @@ Capture and analyze product data directly from Nike's API endpoints.
 
 import sys
 from pathlib import Path
-import json
 import requests
 from typing import List, Dict, Optional
 import time
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
+from utils import json_codec
 from utils.config import ZYTE_API_KEY
 
 def get_nike_products(category: str) -> List[Dict]:
@@ -106,13 +106,13 @@ def save_to_json(products: List[Dict], filename: str = "nike_products.json"):
     # Save file in responses directory
     filepath = Path("responses") / filename
     with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'products': products,
             'metadata': {
                 'count': len(products),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # Example categories
@@ -7,31 +7,30 @@ import sys
 from pathlib import Path
 import requests
 from parsel import Selector
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import time
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client
+from utils.pipeline import PARSE, parse_pipeline
 
 class FormSubmissionError(Exception):
     pass
 
-def submit_search_form(author: str, tag: str, max_retries: int = 3) -> Optional[List[Dict]]:
+def build_form_payload(author: str, tag: str) -> Dict:
     """
-    Submit the search form and extract quote data.
+    Build the Zyte API payload that fills in and submits the search form.
     
     Args:
         author (str): Author name to search for
         tag (str): Tag to filter by
-        max_retries (int): Maximum number of retry attempts
         
     Returns:
-        list: Collection of quotes matching the search criteria
+        dict: Zyte API request payload
     """
-    # Define the payload for the Zyte API request
-    payload = {
+    return {
         "url": "http://quotes.toscrape.com/search.aspx",
         "browserHtml": True,
         "actions": [
@@ -63,16 +62,26 @@ def submit_search_form(author: str, tag: str, max_retries: int = 3) -> Optional[
             },
         ],
     }
+
+def submit_search_form(author: str, tag: str, max_retries: int = 3) -> Optional[List[Dict]]:
+    """
+    Submit the search form and extract quote data.
+    
+    Args:
+        author (str): Author name to search for
+        tag (str): Tag to filter by
+        max_retries (int): Maximum number of retry attempts
+        
+    Returns:
+        list: Collection of quotes matching the search criteria
+    """
+    # Define the payload for the Zyte API request
+    payload = build_form_payload(author, tag)
     
     for attempt in range(max_retries):
         try:
             # Send the request to the Zyte API
-            response = requests.post(
-                ZYTE_API_ENDPOINT,
-                auth=(ZYTE_API_KEY, ""),
-                json=payload,
-                timeout=30
-            )
+            response = get_client().post(payload, timeout=30)
             response.raise_for_status()
             
             # Get the HTML content from the response
@@ -106,6 +115,37 @@ def submit_search_form(author: str, tag: str, max_retries: int = 3) -> Optional[
     
     return None
 
+def submit_search_forms(search_params: Iterable[Dict], concurrency: int = 5,
+                        workers: Optional[int] = None) -> Iterator[Tuple[Dict, Optional[List[Dict]]]]:
+    """
+    Submit many searches concurrently and yield each result as it is parsed.
+    
+    Requests share the client's rate limiter and 429/503 retries; parsing
+    runs in worker processes while the other searches render.
+    
+    Args:
+        search_params (iterable): Search parameters, each {"author": ..., "tag": ...}
+        concurrency (int): Maximum number of searches rendered at once
+        workers (int): Parser processes (default: CPU count)
+        
+    Yields:
+        tuple: (params, quotes) in completion order; quotes is None on failure
+    """
+    search_params = list(search_params)
+    payloads = [build_form_payload(**params) for params in search_params]
+    
+    def report(result):
+        if not result.ok:
+            params = search_params[result.index]
+            print(f"Request error for {params['author']} with tag '{params['tag']}': {str(result.error)}")
+    
+    for page in parse_pipeline(payloads, extract_quotes, concurrency=concurrency,
+                               workers=workers, timeout=30, on_fetch=report):
+        if page.stage == PARSE:
+            params = search_params[page.index]
+            print(f"Parse error for {params['author']} with tag '{params['tag']}': {str(page.error)}")
+        yield search_params[page.index], page.records if page.ok else None
+
 def extract_quotes(html_content: str) -> List[Dict]:
     """
     Extract quote data from the HTML response.
@@ -147,13 +187,13 @@ def save_to_json(quotes: List[Dict], filename: str = "quotes.json"):
         return
         
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'quotes': quotes,
             'metadata': {
                 'count': len(quotes),
                 'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # Example search parameters
@@ -162,9 +202,9 @@ def main():
         {"author": "Oscar Wilde", "tag": "humor"}
     ]
     
-    for params in search_params:
-        print(f"\nSearching for quotes by {params['author']} with tag '{params['tag']}'...")
-        quotes = submit_search_form(**params)
+    print(f"\nSubmitting {len(search_params)} searches concurrently...")
+    for params, quotes in submit_search_forms(search_params):
+        print(f"\nResults for {params['author']} with tag '{params['tag']}':")
         
         if quotes:
             print(f"\nFound {len(quotes)} matching quotes:")
@@ -183,8 +223,6 @@ def main():
                 print("-" * 30)
         else:
             print("No quotes found or error occurred")
-        
-        time.sleep(2)  # Pause between searches
 
 if __name__ == "__main__":
     main()
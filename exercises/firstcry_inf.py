@@ -1,29 +1,57 @@
 import sys
 from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
-import json
 import time
 from typing import List, Dict, Optional
 import os
-from urllib.parse import urljoin
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client
+from utils.latency import timed_phase
+from utils.schema import compile_schema
+from utils.dedup import DedupStore
+from utils.frontier import Frontier, crawl
+from utils.seen_index import SeenIndex
+from utils.jsonl_writer import JsonlWriter
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
+PRODUCT_KEY_FIELDS = ("product_url",)
+
+PRODUCT_SCHEMA = compile_schema({
+    "item": ".lft.viewtype.viewfive",
+    "fields": {
+        "product_price": "div.rupee.fw.lft .r1.B14_42 a",
+        "original_price": "span.r2.R12_42 a",
+        "club_price": "span.r1.B12_blue a",
+        "product_url": {"selector": "a.prd-name", "attr": "href", "absolute": True},
+        "scraped_at": {"value": lambda: time.strftime("%Y-%m-%d %H:%M:%S")}
+    }
+})
+
+def scrape_infinite_scroll(url: str, max_scrolls: int = 3, seen: Optional[SeenIndex] = None,
+                           writer: Optional[JsonlWriter] = None,
+                           frontier: Optional[Frontier] = None,
+                           metrics: Optional[MetricsRegistry] = None) -> List[Dict]:
     """
     Scrape product data from an infinite scroll page on FirstCry.
     
     Args:
         url (str): Target URL
         max_scrolls (int): Maximum number of scroll operations
+        seen (SeenIndex): Products from earlier runs; scrolling stops once a
+            scroll only loads products already in the index
+        writer (JsonlWriter): Streams new products to disk after each scroll
+        frontier (Frontier): Receives the URL of each new product for
+            fetch_product_details()
+        metrics (MetricsRegistry): Collects scrolls, records and errors
         
     Returns:
         list: Collection of products from all scrolls
     """
-    all_products = []
+    metrics = metrics if metrics is not None else MetricsRegistry()
+    all_products = DedupStore(PRODUCT_KEY_FIELDS)
     current_scroll = 0
     
     # Initial request to get the page
@@ -57,12 +85,7 @@ def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
                 ])
             
             # Make the request
-            response = requests.post(
-                ZYTE_API_ENDPOINT,
-                auth=(ZYTE_API_KEY, ""),
-                json=payload,
-                timeout=40
-            )
+            response = get_client().post(payload, timeout=40)
             response.raise_for_status()
             
             # Parse the response
@@ -74,89 +97,82 @@ def scrape_infinite_scroll(url: str, max_scrolls: int = 3) -> List[Dict]:
                 break
             
             # Extract products
-            new_products = extract_products(html_content, url)
+            with timed_phase(response.timing, "parse"):
+                new_products = extract_products(html_content, url)
             
             if not new_products:
                 print("No new products found. Ending scroll.")
                 break
             
             # Check for duplicates
-            new_count = 0
-            for product in new_products:
-                if not is_duplicate(product, all_products):
-                    all_products.append(product)
-                    new_count += 1
-            
-            print(f"Found {new_count} new products (Total: {len(all_products)})")
-            
-            if new_count == 0:
+            added = all_products.extend(new_products)
+            if writer is not None:
+                writer.write_many(added)
+            if frontier is not None:
+                for product in added:
+                    if product.get("product_url"):
+                        frontier.add(product["product_url"], depth=1)
+            
+            metrics.incr("scrolls")
+            metrics.records(len(added))
+            print(f"Found {len(added)} new products (Total: {len(all_products)})")
+            
+            if not added:
                 print("No new content loaded. Reached end of products.")
                 break
             
+            if seen is not None and seen.all_known(added, PRODUCT_KEY_FIELDS):
+                print("Only products seen in earlier runs loaded. Stopping early.")
+                break
+            
             current_scroll += 1
-            time.sleep(2)  # Rate limiting
             
         except requests.exceptions.RequestException as e:
             print(f"Request error: {str(e)}")
+            metrics.error(e)
             break
             
         except Exception as e:
             print(f"Error: {str(e)}")
+            metrics.error(e)
             break
     
-    return all_products
-
-def extract_products(html_content: str, base_url: str) -> List[Dict]:
-
-    products = []
-    soup = BeautifulSoup(html_content, 'html.parser')
-    
-    for container in soup.select('.lft.viewtype.viewfive'):
-        try:
-            # Product Price
-            product_price_elem = container.select_one('div.rupee.fw.lft .r1.B14_42 a')
-            product_price = product_price_elem.text.strip() if product_price_elem else None
-            
-            # Original Price
-            original_price_elem = container.select_one('span.r2.R12_42 a')
-            original_price = original_price_elem.text.strip() if original_price_elem else None
-            
-            # Club Price
-            club_price_elem = container.select_one('span.r1.B12_blue a')
-            club_price = club_price_elem.text.strip() if club_price_elem else None
-            
-            # Product URL
-            product_url_elem = container.select_one('a.prd-name')
-            product_url = urljoin(base_url, product_url_elem['href']) if product_url_elem else None
-            
-            products.append({
-                'product_price': product_price,
-                'original_price': original_price,
-                'club_price': club_price,
-                'product_url': product_url,
-                'scraped_at': time.strftime("%Y-%m-%d %H:%M:%S")
-            })
-            
-        except Exception as e:
-            print(f"Error extracting product: {str(e)}")
-            continue
-    
-    return products
+    return all_products.to_list()
 
-def is_duplicate(product: Dict, existing_products: List[Dict]) -> bool:
+def fetch_product_details(frontier: Frontier, workers: int = 4) -> List[Dict]:
     """
-    Check if a product is already in the collection.
+    Drain a frontier of product page URLs with Zyte API automatic product
+    extraction. The frontier has already dropped URLs that canonicalize to
+    one queued before, so a product listed twice is fetched once.
     
     Args:
-        product (dict): Product to check
-        existing_products (list): Existing products
+        frontier (Frontier): Product URLs queued by scrape_infinite_scroll()
+        workers (int): Product pages fetched at once
         
     Returns:
-        bool: True if product is a duplicate
+        list: Extracted products, in completion order
     """
-    return any(
-        p['product_url'] == product['product_url']
-        for p in existing_products
+    def handle(request):
+        response = get_client().post({"url": request.url, "product": True}, timeout=60)
+        response.raise_for_status()
+        product = response.json().get("product")
+        return [product] if product else []
+    
+    details = []
+    for result in crawl(frontier, handle, workers=workers):
+        if result.ok:
+            details.extend(result.records)
+        else:
+            print(f"Error fetching {result.request.url}: {str(result.error)}")
+    return details
+
+def extract_products(html_content: str, base_url: str, backend: Optional[str] = None) -> List[Dict]:
+
+    return PRODUCT_SCHEMA.extract_html(
+        html_content,
+        base_url=base_url,
+        on_error=lambda e: print(f"Error extracting product: {str(e)}"),
+        backend=backend
     )
 
 def save_to_json(products: List[Dict], filename: str = None):
@@ -171,13 +187,13 @@ def save_to_json(products: List[Dict], filename: str = None):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'products': products,
             'metadata': {
                 'count': len(products),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
     # FirstCry URL with parameters
@@ -185,14 +201,27 @@ def main():
     
     print(f"Starting infinite scroll scrape for: {url}")
     
-    products = scrape_infinite_scroll(url, max_scrolls=3)
+    # Stream products to JSON Lines as each scroll is extracted
+    filename = f"firstcry_products_infinite_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    # Product pages found while scrolling; only the first few are fetched
+    frontier = Frontier(max_requests=5)
+    metrics = MetricsRegistry()
+    with SeenIndex("firstcry_products") as seen:
+        with JsonlWriter(filename, metadata={"url": url}) as writer:
+            products = scrape_infinite_scroll(url, max_scrolls=3, seen=seen, writer=writer,
+                                              frontier=frontier, metrics=metrics)
+        # Marked only once the file is closed, so a failed write keeps them new
+        new_products = seen.unseen(products, PRODUCT_KEY_FIELDS)
+        seen.mark_records(products, PRODUCT_KEY_FIELDS)
+    
+    metrics.finish()
+    print()
+    print_metrics_table({"scroll": metrics.to_dict()})
+    
+    details = fetch_product_details(frontier)
     
     if products:
-        print(f"\nFound {len(products)} total products")
-        
-        # Save to JSON
-        filename = f"firstcry_products_infinite_{time.strftime('%Y%m%d_%H%M%S')}.json"
-        save_to_json(products, filename)
+        print(f"\nFound {len(products)} total products ({len(new_products)} new since last run)")
         print(f"Saved results to {filename}")
         
         # Print sample products
@@ -204,6 +233,11 @@ def main():
             print(f"Club Price: {product['club_price']}")
             print(f"URL: {product['product_url']}")
             print("-" * 30)
+        
+        if details:
+            print(f"\nFetched details for {len(details)} products:")
+            for detail in details:
+                print(f"- {detail.get('name')}: {detail.get('price')} {detail.get('currency', '')}")
     else:
         print("No products found or error occurred")
 
@@ -1,36 +1,44 @@
 import sys
+import threading
 from pathlib import Path
 import requests
-from parsel import Selector
-import json
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 import urllib.parse
 import re
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.frontier import Frontier, crawl
+from utils.schema import compile_schema
+from utils.pipeline import PARSE, parse_pipeline
+from utils.render_mode import RenderModeSelector, response_html
+from utils.seen_index import SeenIndex, item_key
+from utils.jsonl_writer import write_jsonl
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-def search_job(job: str = "fresh", location: str = "Jakarta") -> Optional[List[Dict]]:
+def build_job_payload(job: str, location: str, start: int = 0) -> Dict:
     """
-    Search for jobs on Indeed Indonesia using Zyte API.
+    Build the Zyte API payload for an Indeed Indonesia job search.
     
     Args:
-        job (str): Job title to search for (default: "fresh")
-        location (str): Location to filter by (default: "Jakarta")
+        job (str): Job title to search for
+        location (str): Location to filter by
+        start (int): Result offset; Indeed pages by 10 (start=10 is page 2)
         
     Returns:
-        list: List of job dictionaries
+        dict: Zyte API request payload
     """
     # Encode parameters for URL
     encoded_job = urllib.parse.quote_plus(job)
     encoded_location = urllib.parse.quote_plus(location)
     url = f"https://id.indeed.com/jobs?q={encoded_job}&l={encoded_location}"
+    if start:
+        url += f"&start={start}"
 
-    # Define Zyte API payload
-    payload = {
+    return {
         "url": url,
         "browserHtml": True,
         "actions": [
@@ -46,22 +54,53 @@ def search_job(job: str = "fresh", location: str = "Jakarta") -> Optional[List[D
         ]
     }
 
+JOB_KEY_FIELDS = ("job_key", "url")
+
+JOB_SCHEMA = compile_schema({
+    "item": ".job_seen_beacon",
+    "fields": {
+        "job_key": {"selector": "h2.jobTitle a", "attr": "data-jk"},
+        "title": {
+            "selector": "h2.jobTitle span[title]", "attr": "title", "process": str.strip,
+            "fallback": {
+                "selector": "h2.jobTitle a", "attr": "aria-label", "default": "N/A",
+                "process": lambda title: title.replace("title: ", "").strip()
+            }
+        },
+        "company": {"selector": "span[data-testid='company-name']", "deep": False, "default": "N/A"},
+        "location": {"selector": "div[data-testid='text-location']", "deep": False, "default": "N/A"},
+        "url": {"selector": "h2.jobTitle a", "attr": "href", "absolute": True},
+        "scraped_at": {"value": lambda: time.strftime("%Y-%m-%d %H:%M:%S")}
+    }
+})
+
+JOB_RENDER_MODES = RenderModeSelector(JOB_SCHEMA)
+
+def search_job(job: str = "fresh", location: str = "Jakarta") -> Optional[List[Dict]]:
+    """
+    Search for jobs on Indeed Indonesia using Zyte API.
+    
+    Args:
+        job (str): Job title to search for (default: "fresh")
+        location (str): Location to filter by (default: "Jakarta")
+        
+    Returns:
+        list: List of job dictionaries
+    """
+    # Define Zyte API payload
+    payload = build_job_payload(job, location)
+
     try:
         print(f"Searching for jobs: '{job}' in '{location}'...")
         
         # Send request to Zyte API
-        response = requests.post(
-            ZYTE_API_ENDPOINT,
-            auth=(ZYTE_API_KEY, ""),
-            json=payload,
-            timeout=30
-        )
+        response = JOB_RENDER_MODES.post(payload, timeout=30)
         
         if response.status_code != 200:
             print(f"API request failed with status {response.status_code}")
             return None
             
-        html_content = response.json().get('browserHtml', '')
+        html_content = response_html(response.json())
         
         if not html_content:
             print("No HTML content received")
@@ -76,45 +115,147 @@ def search_job(job: str = "fresh", location: str = "Jakarta") -> Optional[List[D
         print(f"Error: {str(e)}")
         return None
     
-def extract_jobs(html_content: str) -> List[Dict]:
+def search_jobs_batch(searches: List[Dict], concurrency: int = 5,
+                      workers: Optional[int] = None) -> List[Tuple[Dict, Optional[List[Dict]]]]:
     """
-    Extract job listings with job snippet footer text
+    Run several job searches concurrently, parsing results in worker
+    processes while the remaining searches render.
+    
+    Args:
+        searches (list): Search parameters, each {"job": ..., "location": ...}
+        concurrency (int): Maximum number of searches rendered at once
+        workers (int): Parser processes (default: CPU count, at most one per search)
+        
+    Returns:
+        list: (search, jobs) pairs in input order; jobs is None on failure
     """
-    jobs = []
-    selector = Selector(html_content)
+    payloads = [JOB_RENDER_MODES.payload_for(build_job_payload(**search), timeout=30)
+                for search in searches]
+    
+    def report(result):
+        search = searches[result.index]
+        if result.ok:
+            print(f"Finished search: '{search['job']}' in '{search['location']}'")
+        else:
+            print(f"Request error for '{search['job']}' in '{search['location']}': {str(result.error)}")
     
-    for job_elem in selector.css(".job_seen_beacon"):
-        try:
-            # Extract job title
-            title = job_elem.css("h2.jobTitle span[title]::attr(title)").get()
-            if not title:
-                title = job_elem.css("h2.jobTitle a::attr(aria-label)").get() or "N/A"
-                title = title.replace("title: ", "").strip()
+    pages = parse_pipeline(payloads, extract_jobs, concurrency=concurrency,
+                           workers=workers, timeout=30, on_fetch=report,
+                           prefetched=JOB_RENDER_MODES.pop_probed)
+    parsed = []
+    for page in pages:
+        if page.stage == PARSE:
+            search = searches[page.index]
+            print(f"Parse error for '{search['job']}' in '{search['location']}': {str(page.error)}")
+        parsed.append(page)
+    return [
+        (searches[page.index], page.records if page.ok else None)
+        for page in sorted(parsed, key=lambda p: p.index)
+    ]
 
-            # Extract company name
-            company = job_elem.css("span[data-testid='company-name']::text").get() or "N/A"
-            
-            # Extract location
-            location = job_elem.css("div[data-testid='text-location']::text").get() or "N/A"
-            
+JOBS_PER_PAGE = 10
+
+def crawl_job_grid(queries: List[str], locations: List[str], max_pages: int = 5,
+                   concurrency: int = 10, per_domain: int = 5,
+                   seen: Optional[SeenIndex] = None) -> Tuple[List[Dict], MetricsRegistry]:
+    """
+    Crawl every query x location search through one crawl frontier,
+    following start= pagination.
+    
+    The first page of every search is queued up front; each fetched page
+    queues the next one at a lower priority, so first pages of all searches
+    go before deeper pages. A search stops at max_pages, an empty page or a
+    page with no job it has not already seen (Indeed repeats its last page
+    past the end). With a seen index, a search also stops at a page whose
+    jobs were all recorded by earlier runs, so repeated runs fetch only
+    the pages that changed. Jobs are deduplicated across searches by job key;
+    job["searches"] lists every search that returned it. Unique jobs are
+    the metrics' records; "pages", "jobs_seen" and "duplicates" counters
+    and errors by type cover the rest; "known_pages" counts searches
+    stopped by the seen index.
+    
+    Args:
+        queries (list): Job titles to search for
+        locations (list): Locations to search in
+        max_pages (int): Maximum pages per search
+        concurrency (int): Fetch workers draining the frontier
+        per_domain (int): Maximum requests in flight to Indeed
+        seen (SeenIndex): Jobs from earlier runs; not marked here
         
-            
-            # Extract job URL
-            relative_url = job_elem.css("h2.jobTitle a::attr(href)").get()
-            
-            job_data = {
-                "title": title.strip(),
-                "company": company.strip(),
-                "location": location.strip(),           
-                "url": f"https://id.indeed.com{relative_url}" if relative_url else None,
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            jobs.append(job_data)
-        except Exception as e:
-            print(f"Error extracting job: {str(e)}")
-            continue
+    Returns:
+        tuple: (unique jobs in discovery order, MetricsRegistry of the crawl)
+    """
+    searches = [{"job": query, "location": location} for query in queries for location in locations]
+    jobs: Dict[str, Dict] = {}
+    search_keys = {index: set() for index in range(len(searches))}
+    metrics = MetricsRegistry()
+    metrics.gauge("searches", len(searches))
+    lock = threading.Lock()
+    
+    frontier = Frontier(per_host=per_domain, max_depth=max_pages - 1)
+    for index, search in enumerate(searches):
+        frontier.add(build_job_payload(**search)["url"], search=index)
     
-    return jobs
+    def handle(request):
+        index = request.meta["search"]
+        search = searches[index]
+        page = request.depth
+        payload = build_job_payload(search["job"], search["location"], start=page * JOBS_PER_PAGE)
+        response = JOB_RENDER_MODES.post(payload, timeout=30)
+        response.raise_for_status()
+        page_jobs = extract_jobs(response_html(response.json()))
+        
+        new_for_search = unique = duplicates = 0
+        with lock:
+            for job in page_jobs:
+                key = item_key(job, JOB_KEY_FIELDS)
+                if key is None or key in search_keys[index]:
+                    continue
+                search_keys[index].add(key)
+                new_for_search += 1
+                if key in jobs:
+                    duplicates += 1
+                    jobs[key]["searches"].append(search)
+                else:
+                    unique += 1
+                    jobs[key] = {**job, "searches": [search]}
+        metrics.incr("pages")
+        metrics.incr("jobs_seen", new_for_search)
+        metrics.incr("duplicates", duplicates)
+        metrics.records(unique)
+        
+        print(f"'{search['job']}' in '{search['location']}' page {page + 1}: "
+              f"{len(page_jobs)} jobs, {new_for_search} new for this search")
+        if seen is not None and seen.all_known(page_jobs, JOB_KEY_FIELDS):
+            print(f"'{search['job']}' in '{search['location']}': "
+                  f"only jobs from earlier runs on page {page + 1}, stopping")
+            metrics.incr("known_pages")
+        elif new_for_search:
+            next_payload = build_job_payload(search["job"], search["location"], start=(page + 1) * JOBS_PER_PAGE)
+            frontier.add(next_payload["url"], priority=-(page + 1), depth=page + 1, search=index)
+        return page_jobs
+    
+    for result in crawl(frontier, handle, workers=concurrency):
+        if not result.ok:
+            search = searches[result.request.meta["search"]]
+            print(f"Request error for '{search['job']}' in '{search['location']}' "
+                  f"page {result.request.depth + 1}: {str(result.error)}")
+            metrics.error(result.error)
+    
+    metrics.finish()
+    return list(jobs.values()), metrics
+
+def extract_jobs(html_content: str, backend: Optional[str] = None) -> List[Dict]:
+    """
+    Extract job listings with job snippet footer text
+    """
+    return JOB_SCHEMA.extract_html(
+        html_content,
+        base_url="https://id.indeed.com",
+        on_error=lambda e: print(f"Error extracting job: {str(e)}"),
+        backend=backend
+    )
+
 def save_to_json(jobs: List[Dict], filename: str = None):
     """
     Save job listings to JSON file in responses directory.
@@ -127,45 +268,53 @@ def save_to_json(jobs: List[Dict], filename: str = None):
     if not filename.startswith("responses/"):
         filename = os.path.join("responses", filename)
     with open(filename, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'jobs': jobs,
             'metadata': {
                 'count': len(jobs),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
 
 def main():
-    # Example job searches
-    searches = [
-        {"job": "fresh", "location": "Jakarta"},
-        {"job": "software engineer", "location": "Bandung"},
-        {"job": "data analyst", "location": "Indonesia"}
-    ]
+    # Every query is searched in every location; overlapping results are merged
+    queries = ["fresh", "software engineer", "data analyst"]
+    locations = ["Jakarta", "Bandung"]
     
-    for search in searches:
-        jobs = search_job(**search)
+    print(f"Crawling {len(queries)} queries x {len(locations)} locations...")
+    # Jobs recorded by earlier runs: searches stop at pages holding only
+    # known jobs, and each run reports what is new. Jobs are marked only
+    # after the file is written, so a failed write keeps them new
+    with SeenIndex("indeed_jobs") as seen:
+        jobs, metrics = crawl_job_grid(queries, locations, max_pages=3, seen=seen)
+        stats = metrics.to_dict()
+        print()
+        print_metrics_table({"job grid": stats})
+        print(f"\nFound {stats['records']} unique jobs "
+              f"({stats['counters'].get('duplicates', 0)} duplicates across searches)")
         
-        if jobs:
-            print(f"\nFound {len(jobs)} jobs for '{search['job']}' in '{search['location']}'")
-            
-            # Generate filename
-            filename = f"jobs_{search['job'].lower().replace(' ', '_')}_{search['location'].lower().replace(' ', '_')}_{time.strftime('%Y%m%d_%H%M%S')}.json"
-            save_to_json(jobs, filename)
-            print(f"Saved results to {filename}")
-            
-            # Print sample results
-            print("\nSample Jobs:")
-            print("-" * 60)
-            for idx, job in enumerate(jobs[:3], 1):
-                print(f"{idx}. Title: {job['title']}")
-                print(f"   Company: {job['company']}")
-                print(f"   Location: {job['location']}")
-                print(f"   URL: {job['url']}\n")
-        else:
-            print(f"\nNo jobs found for '{search['job']}' in '{search['location']}'")
+        if not jobs:
+            print("No jobs found")
+            return
+        
+        new_jobs = seen.unseen(jobs, JOB_KEY_FIELDS)
+        print(f"{len(new_jobs)} new since last run")
         
-        time.sleep(3)  # Respectful crawling delay
+        filename = f"jobs_grid_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+        write_jsonl(jobs, filename, queries=queries, locations=locations, metrics=stats)
+        seen.mark_records(jobs, JOB_KEY_FIELDS)
+    print(f"Saved results to {filename}")
+    
+    # Print sample results
+    print("\nSample Jobs:")
+    print("-" * 60)
+    for idx, job in enumerate(jobs[:3], 1):
+        print(f"{idx}. Title: {job['title']}")
+        print(f"   Company: {job['company']}")
+        print(f"   Location: {job['location']}")
+        print(f"   URL: {job['url']}")
+        searches = ", ".join(f"{search['job']} / {search['location']}" for search in job["searches"])
+        print(f"   Searches: {searches}\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,424 @@
+"""
+Local Zyte API stand-in server.
+Implements the /v1/extract contract on top of the recorded fixtures in this
+repository so scrapers can be benchmarked and load-tested offline.
+
+Usage:
+    python mock_zyte_server.py --port 8000 --latency-mean 2 --throttle-rate 0.05
+    export ZYTE_API_ENDPOINT=http://127.0.0.1:8000/v1/extract
+
+Served fixtures:
+- productList: api_response.json (api_response1.json when customAttributes is set)
+- browserHtml for id.indeed.com: playground.html
+- quotes.toscrape.com pages, scroll, search form and networkCapture bodies:
+  built from responses/quotes_network_capture_*.json
+- FirstCry listing browserHtml: built from the productList fixture
+
+Proxy mode (port 8011) is not emulated.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from base64 import b64encode
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).parent
+QUOTES_PER_PAGE = 10
+VIEWSTATE = "bW9jay12aWV3c3RhdGU="
+
+
+class Fixtures:
+    """Recorded data the server answers from, loaded once at startup."""
+
+    def __init__(self, root: Path = ROOT):
+        self.product_list = json.loads((root / "api_response.json").read_text(encoding="utf-8"))
+        self.product_list_custom = json.loads((root / "api_response1.json").read_text(encoding="utf-8"))
+        self.indeed_html = (root / "playground.html").read_text(encoding="utf-8")
+        self.quotes = self._load_quotes(root / "responses")
+
+    @staticmethod
+    def _load_quotes(responses_dir: Path) -> List[Dict]:
+        captures = sorted(responses_dir.glob("quotes_network_capture_*.json"))
+        if not captures:
+            return []
+        data = json.loads(captures[-1].read_text(encoding="utf-8"))
+        return [
+            {"text": c["text"], "author": c["author"], "tags": c["tags"]}
+            for c in data.get("captures", [])
+        ]
+
+    @property
+    def quote_pages(self) -> int:
+        return max(1, -(-len(self.quotes) // QUOTES_PER_PAGE))
+
+    def quotes_page(self, page: int) -> List[Dict]:
+        start = (page - 1) * QUOTES_PER_PAGE
+        return self.quotes[start:start + QUOTES_PER_PAGE]
+
+
+def render_quotes_page(quotes: List[Dict], next_href: Optional[str] = None) -> str:
+    """Render quotes with the quotes.toscrape.com listing markup."""
+    items = []
+    for quote in quotes:
+        tags = "".join(
+            f'<a class="tag" href="/tag/{escape(tag)}/page/1/">{escape(tag)}</a>'
+            for tag in quote["tags"]
+        )
+        items.append(
+            '<div class="quote" itemscope itemtype="http://schema.org/CreativeWork">'
+            f'<span class="text" itemprop="text">{escape(quote["text"])}</span>'
+            f'<span>by <small class="author" itemprop="author">{escape(quote["author"])}</small></span>'
+            f'<div class="tags">Tags: {tags}</div>'
+            '</div>'
+        )
+    pager = ""
+    if next_href:
+        pager = f'<nav><ul class="pager"><li class="next"><a href="{next_href}">Next</a></li></ul></nav>'
+    return (
+        "<html><head><title>Quotes to Scrape</title></head><body><div class=\"container\">"
+        + "".join(items) + pager + "</div></body></html>"
+    )
+
+
+def render_search_page(fixtures: Fixtures, author: Optional[str] = None,
+                       tag: Optional[str] = None) -> str:
+    """Render search.aspx: the form, plus results once author and tag are set."""
+    authors = sorted({q["author"] for q in fixtures.quotes})
+    author_options = "".join(
+        f'<option value="{escape(a)}"{" selected" if a == author else ""}>{escape(a)}</option>'
+        for a in authors
+    )
+    tag_options = ""
+    if author:
+        tags = sorted({t for q in fixtures.quotes if q["author"] == author for t in q["tags"]})
+        tag_options = "".join(
+            f'<option value="{escape(t)}"{" selected" if t == tag else ""}>{escape(t)}</option>'
+            for t in tags
+        )
+
+    results = ""
+    if author and tag:
+        matches = [q for q in fixtures.quotes if q["author"] == author and tag in q["tags"]]
+        results = '<div class="results">' + "".join(
+            '<div class="quote">'
+            f'<span class="content">{escape(q["text"])}</span>'
+            f'<span class="author">{escape(q["author"])}</span>'
+            '<span class="tags">Tags: '
+            + "".join(f'<span class="tag">{escape(t)}</span>' for t in q["tags"])
+            + '</span></div>'
+            for q in matches
+        ) + '</div>'
+
+    return (
+        "<html><head><title>Quotes to Scrape</title></head><body>"
+        '<form action="/filter.aspx" method="post">'
+        f'<select id="author" name="author"><option>----------</option>{author_options}</select>'
+        f'<select id="tag" name="tag"><option>----------</option>{tag_options}</select>'
+        f'<input type="hidden" name="__VIEWSTATE" value="{VIEWSTATE}">'
+        '<input type="submit" name="submit_button" value="Search">'
+        "</form>" + results + "</body></html>"
+    )
+
+
+def render_firstcry_page(product_list: Dict, count: int) -> str:
+    """Render FirstCry listing markup from a productList fixture."""
+    blocks = []
+    for product in product_list.get("products", [])[:count]:
+        price = escape(str(product.get("price", "")))
+        regular = escape(str(product.get("regularPrice", product.get("price", ""))))
+        blocks.append(
+            '<div class="list_block"><div class="lft viewtype viewfive">'
+            f'<a class="prd-name" href="{escape(product.get("url", ""))}">{escape(product.get("name", ""))}</a>'
+            f'<div class="rupee fw lft"><span class="r1 B14_42"><a>{price}</a></span></div>'
+            f'<span class="r2 R12_42"><a>{regular}</a></span>'
+            f'<span class="r1 B12_blue"><a>{price}</a></span>'
+            '</div></div>'
+        )
+    return "<html><body>" + "".join(blocks) + "</body></html>"
+
+
+def quotes_api_body(fixtures: Fixtures, page: int) -> bytes:
+    """Body of quotes.toscrape.com/api/quotes?page=N as the site returns it."""
+    return json.dumps({
+        "has_next": page < fixtures.quote_pages,
+        "page": page,
+        "quotes": [
+            {"author": {"name": q["author"]}, "tags": q["tags"], "text": q["text"]}
+            for q in fixtures.quotes_page(page)
+        ],
+        "top_ten_tags": []
+    }).encode("utf-8")
+
+
+def count_scrolls(actions: List[Dict]) -> Tuple[int, bool]:
+    """Return the number of scroll actions and whether any scrolls to the bottom."""
+    scrolls = [a for a in actions if a.get("action") in ("scrollTo", "scrollBottom")]
+    return len(scrolls), any(a.get("action") == "scrollBottom" for a in scrolls)
+
+
+def form_selection(payload: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """Read the author/tag chosen by select actions or a POSTed form body."""
+    author = tag = None
+    for action in payload.get("actions", []):
+        if action.get("action") == "select":
+            field = action.get("selector", {}).get("value")
+            value = (action.get("values") or [None])[0]
+            if field == "#author":
+                author = value
+            elif field == "#tag":
+                tag = value
+    if payload.get("httpRequestText"):
+        form = parse_qs(payload["httpRequestText"])
+        author = form.get("author", [author])[0]
+        tag = form.get("tag", [tag])[0]
+    return author, tag
+
+
+def render_page(fixtures: Fixtures, payload: Dict) -> Tuple[str, List[Dict]]:
+    """
+    Produce the page HTML and network captures for a request payload.
+
+    Returns:
+        tuple: (html, captured responses as (url, body) dicts)
+    """
+    url = payload.get("url", "")
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    actions = payload.get("actions", [])
+    captured = []
+
+    if "indeed" in host:
+        return fixtures.indeed_html, captured
+
+    if "firstcry" in host:
+        scrolls, _ = count_scrolls(actions)
+        return render_firstcry_page(fixtures.product_list["productList"], 20 * (scrolls + 1)), captured
+
+    if "quotes.toscrape.com" in host:
+        path = parsed.path
+        if path.startswith("/search.aspx") or path.startswith("/filter.aspx"):
+            submitted = any(a.get("action") == "click" for a in actions) or payload.get("httpRequestText")
+            author, tag = form_selection(payload)
+            if payload.get("httpRequestText") and parse_qs(payload["httpRequestText"]).get("__VIEWSTATE", [""])[0] != VIEWSTATE:
+                author = tag = None
+            return render_search_page(fixtures, author, tag if submitted else None), captured
+
+        if path.startswith("/scroll"):
+            scrolls, to_bottom = count_scrolls(actions)
+            pages = fixtures.quote_pages if to_bottom else min(fixtures.quote_pages, scrolls + 1)
+            captured = [
+                {"url": f"http://quotes.toscrape.com/api/quotes?page={page}",
+                 "body": quotes_api_body(fixtures, page)}
+                for page in range(1, pages + 1)
+            ]
+            quotes = [q for page in range(1, pages + 1) for q in fixtures.quotes_page(page)]
+            return render_quotes_page(quotes), captured
+
+        page = 1
+        parts = [p for p in path.split("/") if p]
+        if len(parts) >= 2 and parts[0] == "page" and parts[1].isdigit():
+            page = int(parts[1])
+        if page > fixtures.quote_pages:
+            return render_quotes_page([]), captured
+        next_href = f"/page/{page + 1}/" if page < fixtures.quote_pages else None
+        return render_quotes_page(fixtures.quotes_page(page), next_href), captured
+
+    return f"<html><head><title>{escape(url)}</title></head><body></body></html>", captured
+
+
+def matches_filter(capture_url: str, capture_filter: Dict) -> bool:
+    value = capture_filter.get("value", "")
+    if capture_filter.get("matchType", "contains") == "contains":
+        return value in capture_url
+    return capture_url == value
+
+
+def build_response(fixtures: Fixtures, payload: Dict) -> Dict:
+    """Build the /v1/extract response body for a payload."""
+    url = payload.get("url", "")
+    result = {"url": url, "statusCode": 200}
+
+    if payload.get("productList"):
+        fixture = fixtures.product_list_custom if payload.get("customAttributes") else fixtures.product_list
+        result["productList"] = fixture["productList"]
+        if "customAttributes" in fixture and payload.get("customAttributes"):
+            result["customAttributes"] = fixture["customAttributes"]
+
+    if payload.get("browserHtml") or payload.get("httpResponseBody") or payload.get("networkCapture"):
+        html, captured = render_page(fixtures, payload)
+        if payload.get("browserHtml"):
+            result["browserHtml"] = html
+        if payload.get("httpResponseBody"):
+            result["httpResponseBody"] = b64encode(html.encode("utf-8")).decode("ascii")
+        if payload.get("networkCapture"):
+            result["networkCapture"] = [
+                {
+                    "url": item["url"],
+                    "method": "GET",
+                    "statusCode": 200,
+                    "httpResponseBody": b64encode(item["body"]).decode("ascii")
+                }
+                for item in captured
+                if any(matches_filter(item["url"], f) for f in payload["networkCapture"])
+            ]
+
+    return result
+
+
+class ServerSettings:
+    """Latency and failure injection knobs."""
+
+    def __init__(self, latency_mean: float = 0.0, latency_sigma: float = 0.0,
+                 http_latency_factor: float = 0.2, error_rate: float = 0.0,
+                 throttle_rate: float = 0.0, retry_after: float = 1.0, seed: Optional[int] = None):
+        self.latency_mean = latency_mean
+        self.latency_sigma = latency_sigma
+        self.http_latency_factor = http_latency_factor
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def count_request(self):
+        with self.lock:
+            self.requests += 1
+
+    def latency(self, payload: Dict) -> float:
+        """Sample a response delay; non-browser requests are scaled down."""
+        if self.latency_mean <= 0:
+            return 0.0
+        with self.lock:
+            if self.latency_sigma > 0:
+                delay = self.latency_mean * self.random.lognormvariate(0, self.latency_sigma)
+            else:
+                delay = self.latency_mean
+        browser = payload.get("browserHtml") or payload.get("actions") or payload.get("productList")
+        return delay if browser else delay * self.http_latency_factor
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.random.random()
+
+
+class ZyteStandInHandler(BaseHTTPRequestHandler):
+    fixtures: Fixtures = None
+    settings: ServerSettings = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict] = None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/v1/extract":
+            self._send_json(404, {"type": "/not-found", "title": "Not Found", "status": 404})
+            return
+
+        self.settings.count_request()
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"type": "/request/invalid", "title": "Invalid JSON", "status": 400})
+            return
+
+        if self.settings.roll() < self.settings.throttle_rate:
+            self._send_json(
+                429,
+                {"type": "/limits/over-user-limit", "title": "User Rate Limit Exceeded", "status": 429},
+                {"Retry-After": str(self.settings.retry_after)}
+            )
+            return
+
+        time.sleep(self.settings.latency(payload))
+
+        if self.settings.roll() < self.settings.error_rate:
+            self._send_json(520, {"type": "/download/temporary-error", "title": "Temporary Downloading Error", "status": 520})
+            return
+
+        self._send_json(200, build_response(self.fixtures, payload))
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8000,
+                settings: Optional[ServerSettings] = None) -> ThreadingHTTPServer:
+    """Create (but do not start) a stand-in server."""
+    handler = type("Handler", (ZyteStandInHandler,), {
+        "fixtures": Fixtures(),
+        "settings": settings or ServerSettings()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0,
+                 settings: Optional[ServerSettings] = None) -> ThreadingHTTPServer:
+    """
+    Start a stand-in server on a background thread, e.g. for tests.
+    Port 0 picks a free port; server.endpoint is the extract URL. Stop it
+    with server.shutdown() and server.server_close().
+    """
+    server = make_server(host, port, settings)
+    server.endpoint = f"http://{host}:{server.server_address[1]}/v1/extract"
+    threading.Thread(target=server.serve_forever, name="mock-zyte-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Zyte API stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-mean", type=float, default=0.0,
+                        help="Median browser render delay in seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.0,
+                        help="Log-normal spread of the delay (0 = fixed)")
+    parser.add_argument("--http-latency-factor", type=float, default=0.2,
+                        help="Delay multiplier for non-browser requests")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 520")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0,
+                        help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = ServerSettings(
+        latency_mean=args.latency_mean,
+        latency_sigma=args.latency_sigma,
+        http_latency_factor=args.http_latency_factor,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    server = make_server(args.host, args.port, settings)
+    print(f"Zyte API stand-in listening on http://{args.host}:{args.port}/v1/extract")
+    print(f"export ZYTE_API_ENDPOINT=http://{args.host}:{args.port}/v1/extract")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
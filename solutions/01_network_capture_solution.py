@@ -5,7 +5,6 @@ Complete implementation of Nike product data extraction using direct API access.
 
 import sys
 from pathlib import Path
-import json
 import requests
 import time
 from typing import List, Dict, Optional
@@ -13,14 +12,24 @@ from urllib.parse import urlencode
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY
+from utils import json_codec
+from utils.client import get_proxy_session
+from utils.seen_index import SeenIndex
+from utils.jsonl_writer import write_jsonl
 
-def get_nike_products(category: str) -> List[Dict]:
+# Keys identifying a product across runs
+PRODUCT_KEY_FIELDS = ("style_code", "product_url")
+
+def get_nike_products(category: str, max_pages: int = 1,
+                      seen: Optional[SeenIndex] = None) -> List[Dict]:
     """
     Get products from Nike's API for the given category.
     
     Args:
         category (str): Product category ID (e.g., 'football-1gdj0')
+        max_pages (int): Maximum pages of 24 products to fetch
+        seen (SeenIndex): Products from earlier runs; paging stops once a
+            page holds only known products
         
     Returns:
         list: Processed products data
@@ -37,9 +46,6 @@ def get_nike_products(category: str) -> List[Dict]:
         "anchor": 0  # Starting index
     }
     
-    # Build the full API URL
-    api_url = f"{base_url}/consumerChannelId/{consumer_id}?{urlencode(params)}"
-    
     # Configure headers
     headers = {
         "nike-api-caller-id": "nike:dotcom:browse:wall.client:2.0",
@@ -47,47 +53,55 @@ def get_nike_products(category: str) -> List[Dict]:
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
     }
     
-    # Set up Zyte proxy configuration
-    proxies = {
-        "http": f"http://{ZYTE_API_KEY}:@api.zyte.com:8011",
-        "https": f"http://{ZYTE_API_KEY}:@api.zyte.com:8011"
-    }
-    
+    products = []
     try:
-        print(f"Fetching data from Nike API...")
-        response = requests.get(
-            api_url,
-            headers=headers,
-            proxies=proxies,
-            timeout=30,
-            verify=False
-        )
-        response.raise_for_status()
-        
-        # Parse JSON response
-        data = response.json()
-        
-        # Extract products
-        product_groups = data.get("productGroupings", [])
-        total_products = data.get("pages", {}).get("totalResources", 0)
-        print(f"Total available products: {total_products}")
-        
-        # Process each product
-        products = []
-        for group in product_groups:
-            if group.get("products"):
-                product = format_product(group["products"][0])  # Get first product variant
-                if product:
-                    products.append(product)
+        for page in range(max_pages):
+            # Build the full API URL
+            params["anchor"] = page * params["count"]
+            api_url = f"{base_url}/consumerChannelId/{consumer_id}?{urlencode(params)}"
+            
+            print(f"Fetching data from Nike API (page {page + 1})...")
+            # Send through the rate-limited Zyte proxy session
+            response = get_proxy_session().get(
+                api_url,
+                headers=headers,
+                timeout=30,
+                verify=False
+            )
+            response.raise_for_status()
+            
+            # Parse JSON response
+            data = response.json()
+            
+            # Extract products
+            product_groups = data.get("productGroupings", [])
+            total_products = data.get("pages", {}).get("totalResources", 0)
+            if page == 0:
+                print(f"Total available products: {total_products}")
+            
+            # Process each product
+            page_products = []
+            for group in product_groups:
+                if group.get("products"):
+                    product = format_product(group["products"][0])  # Get first product variant
+                    if product:
+                        page_products.append(product)
+            products.extend(page_products)
+            
+            if not page_products or params["anchor"] + params["count"] >= total_products:
+                break
+            if seen is not None and seen.all_known(page_products, PRODUCT_KEY_FIELDS):
+                print("Only products seen in earlier runs on this page. Stopping early.")
+                break
         
         return products
         
     except requests.exceptions.RequestException as e:
         print(f"Error making request: {str(e)}")
-        return []
+        return products
     except Exception as e:
         print(f"Error processing data: {str(e)}")
-        return []
+        return products
 
 def format_product(product_data: Dict) -> Optional[Dict]:
     """
@@ -133,13 +147,13 @@ def save_to_json(products: List[Dict], filename: str = "nike_products.json"):
     # Save file in responses directory
     filepath = Path("responses") / filename
     with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump({
+        json_codec.dump({
             'products': products,
             'metadata': {
                 'count': len(products),
                 'timestamp': time.strftime("%Y-%m-%d %H:%M:%S")
             }
-        }, f, indent=2, ensure_ascii=False)
+        }, f)
     
     print(f"Saved results to responses/{filename}")
 
@@ -151,12 +165,16 @@ def main():
         'running': 'running-37v7j'
     }
     
+    # Products recorded by earlier runs, so each run reports what is new
+    seen = SeenIndex("nike_products")
+    
     for category_name, category_id in categories.items():
         print(f"\nProcessing {category_name} category...")
-        products = get_nike_products(category_id)
+        products = get_nike_products(category_id, max_pages=5, seen=seen)
         
         if products:
-            print(f"\nFound {len(products)} products:")
+            new_products = seen.unseen(products, PRODUCT_KEY_FIELDS)
+            print(f"\nFound {len(products)} products ({len(new_products)} new since last run):")
             print("-" * 50)
             
             # Show first 3 products as sample
@@ -170,14 +188,16 @@ def main():
                 print(f"🔗 URL: {product['product_url']}")
                 print("-" * 30)
             
-            # Save to JSON
-            filename = f"nike_{category_name}_{time.strftime('%Y%m%d_%H%M%S')}.json"
-            save_to_json(products, filename)
+            # Save to JSON Lines
+            filename = f"nike_{category_name}_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+            write_jsonl(products, filename, category=category_name)
+            # Marked only once written, so a failed write keeps them new
+            seen.mark_records(products, PRODUCT_KEY_FIELDS)
+            print(f"Saved results to responses/{filename}")
         else:
             print(f"No products found for {category_name}")
-        
-        # Wait between categories to avoid rate limiting
-        time.sleep(2)
+    
+    seen.close()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
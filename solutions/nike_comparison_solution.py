@@ -5,115 +5,191 @@ Comparing direct API access vs infinite scroll approaches with detailed statisti
 
 import sys
 from pathlib import Path
-import json
 import requests
+import threading
 import time
+from contextlib import contextmanager
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urlencode
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add parent directory to path to import utils
 sys.path.append(str(Path(__file__).parent.parent))
-from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT
+from utils import json_codec
+from utils.client import get_client, proxy_session
+from utils.frontier import Frontier, crawl
+from utils.metrics import MetricsRegistry, print_metrics_table
 
-class NikeStats:
-    def __init__(self):
-        self.start_time = time.time()
-        self.products_found = 0
-        self.total_available = 0
-        self.pages_processed = 0
-        self.errors = 0
-        
+class NikeStats(MetricsRegistry):
+    """
+    Metrics for one strategy run. Products are the records, pages the
+    "pages" counter and the category size the "total_available" gauge;
+    to_dict() adds those under the names the comparison file uses.
+    
+    products_per_second is measured over request time: the wall-clock time
+    during which at least one of this run's requests held a slot. Time
+    queued behind other runs (slot_wait) is left out, so strategies run
+    side by side stay comparable.
+    """
+    
+    @contextmanager
+    def requesting(self):
+        """Count the block as request time; overlapping blocks count once."""
+        with self.busy("requests"):
+            yield
+    
+    @property
+    def request_seconds(self) -> float:
+        return self.busy_seconds.get("requests", 0.0)
+    
+    @property
+    def products_per_second(self) -> float:
+        return self.record_count / self.request_seconds if self.request_seconds > 0 else 0.0
+    
     def get_duration(self) -> float:
-        return round(time.time() - self.start_time, 2)
+        return round(self.duration, 2)
     
     def to_dict(self) -> Dict:
-        return {
-            "products_found": self.products_found,
-            "total_available": self.total_available,
-            "pages_processed": self.pages_processed,
-            "errors": self.errors,
-            "duration_seconds": self.get_duration(),
-            "products_per_second": round(self.products_found / self.get_duration(), 2) if self.get_duration() > 0 else 0
-        }
+        metrics = super().to_dict()
+        metrics.update({
+            "products_found": metrics["records"],
+            "total_available": metrics["gauges"].get("total_available", 0),
+            "pages_processed": metrics["counters"].get("pages", 0),
+            "request_seconds": round(self.request_seconds, 2),
+            "products_per_second": round(self.products_per_second, 2)
+        })
+        return metrics
 
-def get_nike_products_api(category: str, stats: NikeStats) -> List[Dict]:
+@contextmanager
+def request_slot(slots: Optional[threading.Semaphore], stats: NikeStats):
     """
-    Get products from Nike's API for the given category.
+    Hold one of the harness's global request slots for the block.
+    Time spent waiting is recorded as the "slot_wait" timer, so the request
+    timers and the run's request time only measure the request itself.
     """
-    base_url = "https://api.nike.com/discover/product_wall/v1/marketplace/IN/language/en-GB"
-    consumer_id = "d9a5bc42-4b9c-4976-858a-f159cf99c647"
+    if slots is None:
+        with stats.requesting():
+            yield
+        return
+    with stats.timer("slot_wait"):
+        slots.acquire()
+    try:
+        with stats.requesting():
+            yield
+    finally:
+        slots.release()
+
+NIKE_API_BASE_URL = "https://api.nike.com/discover/product_wall/v1/marketplace/IN/language/en-GB"
+NIKE_CONSUMER_ID = "d9a5bc42-4b9c-4976-858a-f159cf99c647"
+NIKE_API_HEADERS = {
+    "nike-api-caller-id": "nike:dotcom:browse:wall.client:2.0",
+    "Referer": "https://www.nike.com/",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+}
+
+def nike_page_url(category: str, anchor: int, products_per_page: int = 24) -> str:
+    """URL of one page of Nike's product wall API."""
+    params = {
+        "path": f"/in/w/{category}",
+        "queryType": "PRODUCTS",
+        "count": products_per_page,
+        "anchor": anchor
+    }
+    return f"{NIKE_API_BASE_URL}/consumerChannelId/{NIKE_CONSUMER_ID}?{urlencode(params)}"
+
+def fetch_nike_page(session: requests.Session, category: str, anchor: int,
+                    products_per_page: int = 24) -> Dict:
+    """
+    Fetch one page of Nike's product wall API through the Zyte proxy.
     
-    all_products = []
-    page = 0
+    Args:
+        session (requests.Session): Proxy session from utils.client.proxy_session
+        category (str): Category path id, e.g. 'football-1gdj0'
+        anchor (int): Offset of the first product on the page
+        products_per_page (int): Page size
+        
+    Returns:
+        dict: Decoded API response
+    """
+    api_url = nike_page_url(category, anchor, products_per_page)
+    
+    response = session.get(
+        api_url,
+        headers=NIKE_API_HEADERS,
+        timeout=30,
+        verify=False
+    )
+    response.raise_for_status()
+    return response.json()
+
+def get_nike_products_api(category: str, stats: NikeStats, max_workers: int = 8,
+                          slots: Optional[threading.Semaphore] = None) -> List[Dict]:
+    """
+    Get products from Nike's API for the given category.
+    
+    Pages go through a crawl frontier: page 0 gives pages.totalResources,
+    and its handler queues every remaining anchor, which max_workers fetch
+    workers then drain at the rate the api.nike.com limiter allows. Each
+    page is formatted as it arrives; products are merged in anchor order.
+    
+    Args:
+        category (str): Category path id, e.g. 'football-1gdj0'
+        stats (NikeStats): Stats collector for this run
+        max_workers (int): Maximum number of pages fetched at once
+        slots (threading.Semaphore): Global request slots shared with other runs
+        
+    Returns:
+        list: Formatted products
+    """
     products_per_page = 24
+    session = proxy_session(pool_size=max_workers)
+    pages = {}
     
-    while True:
-        try:
-            # Set up query parameters with pagination
-            params = {
-                "path": f"/in/w/{category}",
-                "queryType": "PRODUCTS",
-                "count": products_per_page,
-                "anchor": page * products_per_page
-            }
-            
-            api_url = f"{base_url}/consumerChannelId/{consumer_id}?{urlencode(params)}"
-            
-            headers = {
-                "nike-api-caller-id": "nike:dotcom:browse:wall.client:2.0",
-                "Referer": "https://www.nike.com/",
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-            }
-            
-            proxies = {
-                "http": f"http://{ZYTE_API_KEY}:@api.zyte.com:8011",
-                "https": f"http://{ZYTE_API_KEY}:@api.zyte.com:8011"
-            }
-            
-            print(f"Fetching page {page + 1}...")
-            response = requests.get(
-                api_url,
-                headers=headers,
-                proxies=proxies,
-                timeout=30,
-                verify=False
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            product_groups = data.get("productGroupings", [])
-            
-            if page == 0:
-                stats.total_available = data.get("pages", {}).get("totalResources", 0)
-            
-            if not product_groups:
-                break
-                
-            for group in product_groups:
+    def fetch(anchor: int) -> Dict:
+        with request_slot(slots, stats), stats.timer("page_fetch"):
+            return fetch_nike_page(session, category, anchor, products_per_page)
+    
+    def add_page(anchor: int, page: Dict):
+        with stats.timer("page_format"):
+            products = []
+            for group in page.get("productGroupings", []):
                 if group.get("products"):
                     product = format_product(group["products"][0])
                     if product:
-                        all_products.append(product)
-                        stats.products_found += 1
-            
-            stats.pages_processed += 1
-            
-            # Check if we've reached the end
-            if len(product_groups) < products_per_page:
-                break
-                
-            page += 1
-            time.sleep(1)  # Rate limiting
-            
-        except Exception as e:
-            print(f"Error on page {page + 1}: {str(e)}")
-            stats.errors += 1
-            break
+                        products.append(product)
+        pages[anchor] = products
+        stats.records(len(products))
+        stats.incr("pages")
+    
+    frontier = Frontier(per_host=max_workers, max_requests=None)
+    frontier.add(nike_page_url(category, 0, products_per_page), anchor=0)
+    
+    def handle(request):
+        anchor = request.meta["anchor"]
+        page = fetch(anchor)
+        if anchor == 0:
+            total_available = page.get("pages", {}).get("totalResources", 0)
+            stats.gauge("total_available", total_available)
+            if len(page.get("productGroupings", [])) >= products_per_page:
+                remaining_anchors = range(products_per_page, total_available, products_per_page)
+                print(f"Fetching {len(remaining_anchors)} more pages concurrently...")
+                for next_anchor in remaining_anchors:
+                    frontier.add(nike_page_url(category, next_anchor, products_per_page),
+                                 depth=1, anchor=next_anchor)
+        add_page(anchor, page)
+    
+    print("Fetching page 1...")
+    for result in crawl(frontier, handle, workers=max_workers):
+        if not result.ok:
+            print(f"Error on page {result.request.meta['anchor'] // products_per_page + 1}: {str(result.error)}")
+            stats.error(result.error)
     
-    return all_products
+    session.close()
+    return [product for anchor in sorted(pages) for product in pages[anchor]]
 
-def get_nike_products_scroll(category: str, stats: NikeStats) -> List[Dict]:
+def get_nike_products_scroll(category: str, stats: NikeStats,
+                             slots: Optional[threading.Semaphore] = None) -> List[Dict]:
     """
     Get products using infinite scroll strategy via Zyte API.
     """
@@ -121,38 +197,37 @@ def get_nike_products_scroll(category: str, stats: NikeStats) -> List[Dict]:
     all_products = []
     
     try:
-        api_response = requests.post(
-            ZYTE_API_ENDPOINT,
-            auth=(ZYTE_API_KEY, ""),
-            json={
-                "url": url,
-                "productList": True,
-                "actions": [
-                    {
-                        "action": "scrollBottom",
-                        "timeout": 30,
-                        "maxScrollDelay": 2,
-                        "maxScrollCount": 20,
-                        "maxPageHeight": 50000
-                    }
-                ]
-            },
-            timeout=120
-        )
+        with request_slot(slots, stats), stats.timer("page_fetch"):
+            api_response = get_client().post(
+                {
+                    "url": url,
+                    "productList": True,
+                    "actions": [
+                        {
+                            "action": "scrollBottom",
+                            "timeout": 30,
+                            "maxScrollDelay": 2,
+                            "maxScrollCount": 20,
+                            "maxPageHeight": 50000
+                        }
+                    ]
+                },
+                timeout=120
+            )
         
         if api_response.status_code == 200:
             result = api_response.json()
             products = result.get('productList', {}).get('products', [])
-            stats.products_found = len(products)
-            stats.pages_processed = 1
+            stats.records(len(products))
+            stats.incr("pages")
             return products
         else:
-            stats.errors += 1
+            stats.error(f"HTTP {api_response.status_code}")
             print(f"Request failed: {api_response.status_code}")
             return []
             
     except Exception as e:
-        stats.errors += 1
+        stats.error(e)
         print(f"Error: {str(e)}")
         return []
 
@@ -208,7 +283,7 @@ def save_comparison_results(category: str, api_stats: Dict, scroll_stats: Dict,
     }
     
     with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(comparison_data, f, indent=2, ensure_ascii=False)
+        json_codec.dump(comparison_data, f)
     
     return filename
 
@@ -220,20 +295,10 @@ def print_comparison(category: str, api_stats: Dict, scroll_stats: Dict):
     print(f"COMPARISON RESULTS FOR {category.upper()}")
     print("=" * 60)
     
-    print("\n📊 API STRATEGY:")
-    print(f"Total Available: {api_stats['total_available']}")
-    print(f"Products Found: {api_stats['products_found']}")
-    print(f"Pages Processed: {api_stats['pages_processed']}")
-    print(f"Duration: {api_stats['duration_seconds']} seconds")
-    print(f"Speed: {api_stats['products_per_second']} products/second")
-    print(f"Errors: {api_stats['errors']}")
-    
-    print("\n📊 SCROLL STRATEGY:")
-    print(f"Products Found: {scroll_stats['products_found']}")
-    print(f"Pages Processed: {scroll_stats['pages_processed']}")
-    print(f"Duration: {scroll_stats['duration_seconds']} seconds")
-    print(f"Speed: {scroll_stats['products_per_second']} products/second")
-    print(f"Errors: {scroll_stats['errors']}")
+    print("\n📊 STRATEGIES:")
+    print_metrics_table({"API": api_stats, "Scroll": scroll_stats})
+    print(f"Products/sec over request time (slot waits excluded): "
+          f"API {api_stats['products_per_second']}, Scroll {scroll_stats['products_per_second']}")
     
     print("\n📈 COMPARISON:")
     diff = api_stats["products_found"] - scroll_stats["products_found"]
@@ -242,6 +307,54 @@ def print_comparison(category: str, api_stats: Dict, scroll_stats: Dict):
     print(f"Faster Strategy: {'API' if api_stats['products_per_second'] > scroll_stats['products_per_second'] else 'Scroll'}")
     print("=" * 60 + "\n")
 
+STRATEGIES = {
+    "api": get_nike_products_api,
+    "scroll": get_nike_products_scroll
+}
+
+def run_strategy(strategy: str, category_id: str,
+                 slots: Optional[threading.Semaphore] = None) -> Tuple[NikeStats, List[Dict]]:
+    """Run one strategy for one category with its own stats."""
+    stats = NikeStats()
+    products = STRATEGIES[strategy](category_id, stats, slots=slots)
+    stats.finish()
+    return stats, products
+
+def run_comparison(categories: Dict[str, str], max_concurrency: int = 8) -> Dict[str, Dict]:
+    """
+    Run both strategies for every category at the same time.
+    
+    Every request (each API page and each scroll render) takes one of
+    max_concurrency global slots, so the whole comparison never has more
+    than that in flight. Each run has its own NikeStats: "page_fetch" times
+    the requests alone and "slot_wait" the time spent queued behind other
+    runs, so the strategies stay comparable.
+    
+    Args:
+        categories (dict): Category name -> Nike category path id
+        max_concurrency (int): Requests in flight across all runs
+        
+    Returns:
+        dict: {category_name: {strategy: (NikeStats, products)}}
+    """
+    slots = threading.BoundedSemaphore(max_concurrency)
+    results = {name: {} for name in categories}
+    
+    with ThreadPoolExecutor(max_workers=len(categories) * len(STRATEGIES)) as executor:
+        futures = {
+            executor.submit(run_strategy, strategy, category_id, slots): (name, strategy)
+            for name, category_id in categories.items()
+            for strategy in STRATEGIES
+        }
+        for future in as_completed(futures):
+            name, strategy = futures[future]
+            stats, products = future.result()
+            results[name][strategy] = (stats, products)
+            print(f"Finished {strategy} strategy for {name}: "
+                  f"{stats.record_count} products in {stats.get_duration()} seconds")
+    
+    return results
+
 def main():
     categories = {
         'football': 'football-1gdj0',
@@ -249,18 +362,13 @@ def main():
         'running': 'running-37v7j'
     }
     
-    for category_name, category_id in categories.items():
-        print(f"\nProcessing {category_name} category...")
-        
-        # Test API strategy
-        print("\nTesting API strategy...")
-        api_stats = NikeStats()
-        api_products = get_nike_products_api(category_id, api_stats)
-        
-        # Test scroll strategy
-        print("\nTesting scroll strategy...")
-        scroll_stats = NikeStats()
-        scroll_products = get_nike_products_scroll(category_id, scroll_stats)
+    start_time = time.perf_counter()
+    print(f"Running API and scroll strategies for {len(categories)} categories concurrently...")
+    results = run_comparison(categories)
+    
+    for category_name, runs in results.items():
+        api_stats, api_products = runs["api"]
+        scroll_stats, scroll_products = runs["scroll"]
         
         # Save and print comparison
         filename = save_comparison_results(
@@ -273,9 +381,8 @@ def main():
         print(f"\nSaved detailed comparison to responses/{filename}")
         
         print_comparison(category_name, api_stats.to_dict(), scroll_stats.to_dict())
-        
-        # Wait between categories
-        time.sleep(2)
+    
+    print(f"Whole comparison took {time.perf_counter() - start_time:.2f} seconds")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
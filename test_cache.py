@@ -0,0 +1,158 @@
+"""
+Tests for the on-disk response cache (utils/cache.py), including ZyteClient
+cache hits against the local stand-in server.
+
+Run with: python -m unittest test_cache
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+os.environ.setdefault("ZYTE_API_KEY", "test-key")
+
+from mock_zyte_server import ServerSettings, start_server
+from utils.cache import ResponseCache, cache_key
+from utils.client import ZyteClient
+
+
+class CacheKeyTest(unittest.TestCase):
+
+    def test_field_order_does_not_matter(self):
+        self.assertEqual(cache_key({"url": "http://a/", "browserHtml": True}),
+                         cache_key({"browserHtml": True, "url": "http://a/"}))
+
+    def test_false_and_none_fields_are_ignored(self):
+        self.assertEqual(cache_key({"url": "http://a/"}),
+                         cache_key({"url": "http://a/", "browserHtml": False, "actions": None}))
+
+    def test_output_fields_and_actions_change_the_key(self):
+        base = {"url": "http://a/", "browserHtml": True}
+        self.assertNotEqual(cache_key(base), cache_key({**base, "httpResponseBody": True}))
+        self.assertNotEqual(cache_key(base), cache_key({**base, "actions": [{"action": "scrollBottom"}]}))
+        self.assertNotEqual(cache_key(base), cache_key({**base, "url": "http://b/"}))
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_round_trip_and_miss(self):
+        cache = ResponseCache(self.directory.name)
+        self.assertIsNone(cache.get(cache_key({"url": "http://a/"})))
+        cache.set(cache_key({"url": "http://a/"}), b'{"url": "http://a/"}')
+        self.assertEqual(cache.get(cache_key({"url": "http://a/"})), b'{"url": "http://a/"}')
+
+    def test_expired_entries_are_removed(self):
+        cache = ResponseCache(self.directory.name, ttl=60)
+        key = cache_key({"url": "http://a/"})
+        cache.set(key, b"old")
+        path = cache._path(key)
+        stored = time.time() - 120
+        os.utime(path, (stored, stored))
+
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(path.exists())
+
+    def test_no_ttl_keeps_entries(self):
+        cache = ResponseCache(self.directory.name, ttl=None)
+        key = cache_key({"url": "http://a/"})
+        cache.set(key, b"kept")
+        stored = time.time() - 10 * 86400
+        os.utime(cache._path(key), (stored, stored))
+        self.assertEqual(cache.get(key), b"kept")
+
+    def test_evicts_least_recently_read(self):
+        cache = ResponseCache(self.directory.name, max_size=250)
+        keys = [cache_key({"url": f"http://a/{i}"}) for i in range(3)]
+        cache.set(keys[0], b"0" * 100)
+        cache.set(keys[1], b"1" * 100)
+        # Entry 0 was stored first but read last
+        now = time.time()
+        for key, read_at in ((keys[0], now - 100), (keys[1], now - 50)):
+            os.utime(cache._path(key), (read_at, read_at))
+        cache.get(keys[0])
+
+        cache.set(keys[2], b"2" * 100)
+
+        self.assertEqual(cache.get(keys[0]), b"0" * 100)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertEqual(cache.get(keys[2]), b"2" * 100)
+
+    def test_overwrite_keeps_size_accurate(self):
+        cache = ResponseCache(self.directory.name, max_size=150)
+        key = cache_key({"url": "http://a/"})
+        for _ in range(3):
+            cache.set(key, b"x" * 100)
+        self.assertEqual(cache.get(key), b"x" * 100)
+        self.assertEqual(cache._current_size(), 100)
+
+    def test_clear(self):
+        cache = ResponseCache(self.directory.name)
+        key = cache_key({"url": "http://a/"})
+        cache.set(key, b"x")
+        cache.clear()
+        self.assertIsNone(cache.get(key))
+
+
+class ClientCacheTest(unittest.TestCase):
+    """ZyteClient reads repeated payloads from the cache instead of the server."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.settings = ServerSettings()
+        cls.server = start_server(settings=cls.settings)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.settings.requests = 0
+        self.settings.error_rate = 0.0
+
+    def client(self, **kwargs) -> ZyteClient:
+        return ZyteClient(api_key="test-cache", endpoint=self.server.endpoint,
+                          cache=ResponseCache(self.directory.name), **kwargs)
+
+    def test_repeated_payload_is_served_from_cache(self):
+        payload = {"url": "http://quotes.toscrape.com/page/1/", "browserHtml": True}
+        with self.client() as client:
+            first = client.post(payload)
+            second = client.post(payload)
+
+        self.assertEqual(self.settings.requests, 1)
+        self.assertEqual(second.headers.get("X-Cache"), "HIT")
+        self.assertEqual(second.json(), first.json())
+        self.assertIn('class="quote"', second.json()["browserHtml"])
+
+    def test_bypass_refetches_and_refreshes(self):
+        payload = {"url": "http://quotes.toscrape.com/page/2/", "browserHtml": True}
+        with self.client() as client:
+            client.post(payload)
+            refreshed = client.post(payload, bypass_cache=True)
+            cached = client.post(payload)
+
+        self.assertEqual(self.settings.requests, 2)
+        self.assertIsNone(refreshed.headers.get("X-Cache"))
+        self.assertEqual(cached.headers.get("X-Cache"), "HIT")
+
+    def test_errors_are_not_cached(self):
+        payload = {"url": "http://quotes.toscrape.com/page/3/", "browserHtml": True}
+        self.settings.error_rate = 1.0
+        with self.client() as client:
+            self.assertEqual(client.post(payload).status_code, 520)
+            self.settings.error_rate = 0.0
+            self.assertEqual(client.post(payload).status_code, 200)
+
+        self.assertEqual(self.settings.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
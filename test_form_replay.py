@@ -0,0 +1,123 @@
+"""
+Tests for form replay (utils/form_replay.py): reading a recorded form and
+replaying the search.aspx postback against the local stand-in server.
+
+Run with: python -m unittest test_form_replay
+"""
+
+import os
+import unittest
+from typing import Dict
+from urllib.parse import parse_qs
+
+os.environ.setdefault("ZYTE_API_KEY", "test-key")
+
+from mock_zyte_server import VIEWSTATE, ServerSettings, start_server
+from utils.client import ZyteClient
+from utils.form_replay import BROWSER, REPLAY, FormReplayer, FormTemplate, extract_form, form_accepted
+
+SEARCH_PAGE = """
+<form action="/filter.aspx" method="post">
+  <select name="author"><option>----------</option>
+    <option value="Jane Austen" selected>Jane Austen</option></select>
+  <select name="tag"><option>----------</option>
+    <option value="love">love</option><option value="humor" selected>humor</option></select>
+  <input type="hidden" name="__VIEWSTATE" value="abc">
+  <input type="text" name="query" value="">
+  <input type="submit" name="submit_button" value="Search">
+</form>
+"""
+
+
+def build_search_payload(author: str, tag: str) -> Dict:
+    return {
+        "url": "http://quotes.toscrape.com/search.aspx",
+        "browserHtml": True,
+        "actions": [
+            {"action": "select", "selector": {"type": "css", "value": "#author"}, "values": [author]},
+            {"action": "select", "selector": {"type": "css", "value": "#tag"}, "values": [tag]},
+            {"action": "click", "selector": {"type": "css", "value": "[type='submit']"}}
+        ]
+    }
+
+
+class FormTemplateTest(unittest.TestCase):
+
+    def test_post_payload(self):
+        template = FormTemplate("http://a/filter.aspx", fields={"__VIEWSTATE": "abc"})
+        payload = template.payload({"author": "Jane Austen"})
+        self.assertEqual(payload["url"], "http://a/filter.aspx")
+        self.assertEqual(payload["httpRequestMethod"], "POST")
+        self.assertEqual(parse_qs(payload["httpRequestText"]),
+                         {"__VIEWSTATE": ["abc"], "author": ["Jane Austen"]})
+
+    def test_get_payload(self):
+        template = FormTemplate("http://a/search?lang=en", method="GET", fields={"page": "1"})
+        self.assertEqual(template.payload({"q": "x y"}),
+                         {"url": "http://a/search?lang=en&page=1&q=x+y", "httpResponseBody": True})
+
+    def test_extract_form(self):
+        template = extract_form(SEARCH_PAGE, "http://quotes.toscrape.com/search.aspx")
+        self.assertEqual(template.action, "http://quotes.toscrape.com/filter.aspx")
+        self.assertEqual(template.method, "POST")
+        self.assertEqual(template.fields, {"__VIEWSTATE": "abc", "submit_button": "Search"})
+        self.assertIsNone(extract_form("<p>no form</p>", "http://a/"))
+
+    def test_form_accepted(self):
+        self.assertTrue(form_accepted(SEARCH_PAGE, {"author": "Jane Austen", "tag": "humor"}))
+        self.assertFalse(form_accepted(SEARCH_PAGE, {"author": "Jane Austen", "tag": "love"}))
+        # A tag the returned form does not offer is not held against it
+        self.assertTrue(form_accepted(SEARCH_PAGE, {"author": "Jane Austen", "tag": "books"}))
+        self.assertFalse(form_accepted("<p>no form</p>", {"author": "Jane Austen"}))
+
+
+class FormReplayerTest(unittest.TestCase):
+    """Record search.aspx through the stand-in browser, then replay it over HTTP."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.settings = ServerSettings()
+        cls.server = start_server(settings=cls.settings)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.client = ZyteClient(api_key="test-form", endpoint=self.server.endpoint)
+        self.addCleanup(self.client.close)
+        self.form = FormReplayer(build_search_payload, client=self.client)
+
+    def test_record_then_replay(self):
+        html = self.form.record(author="Albert Einstein", tag="world")
+        self.assertIn('class="quote"', html)
+        self.assertEqual(self.form.template.action, "http://quotes.toscrape.com/filter.aspx")
+        self.assertEqual(self.form.template.fields["__VIEWSTATE"], VIEWSTATE)
+
+        html, mode = self.form.submit(author="Albert Einstein", tag="change")
+        self.assertEqual(mode, REPLAY)
+        self.assertIn('<option value="change" selected>', html)
+
+    def test_first_submit_goes_through_the_browser(self):
+        _, mode = self.form.submit(author="Albert Einstein", tag="world")
+        self.assertEqual(mode, BROWSER)
+        self.assertIsNotNone(self.form.template)
+
+    def test_stale_viewstate_falls_back_to_the_browser(self):
+        self.form.record(author="Albert Einstein", tag="world")
+        self.form.template.fields["__VIEWSTATE"] = "expired"
+
+        html, mode = self.form.submit(author="Albert Einstein", tag="change")
+        self.assertEqual(mode, BROWSER)
+        self.assertIn('<option value="change" selected>', html)
+        # The browser submission recorded a fresh form
+        self.assertEqual(self.form.template.fields["__VIEWSTATE"], VIEWSTATE)
+
+    def test_replay_many_requires_a_recorded_form(self):
+        with self.assertRaises(ValueError):
+            next(self.form.replay_many([{"author": "Albert Einstein", "tag": "world"}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+"""
+Tests for pagination URL template inference (utils/prefetch.py).
+
+Run with: python -m unittest test_prefetch
+"""
+
+import os
+import unittest
+
+os.environ.setdefault("ZYTE_API_KEY", "test-key")
+
+from utils.prefetch import infer_template
+
+
+class InferTemplateTest(unittest.TestCase):
+
+    def test_number_in_path(self):
+        template = infer_template("http://quotes.toscrape.com/page/1/",
+                                  "http://quotes.toscrape.com/page/2/")
+        self.assertEqual(template.url(5), "http://quotes.toscrape.com/page/5/")
+        self.assertEqual(template.url(1), "http://quotes.toscrape.com/page/1/")
+
+    def test_step_in_query(self):
+        template = infer_template("https://id.indeed.com/jobs?q=fresh&start=0",
+                                  "https://id.indeed.com/jobs?q=fresh&start=10")
+        self.assertEqual(template.url(4), "https://id.indeed.com/jobs?q=fresh&start=30")
+
+    def test_parameter_added_on_page_two(self):
+        template = infer_template("https://id.indeed.com/jobs?q=fresh&l=Jakarta",
+                                  "https://id.indeed.com/jobs?q=fresh&l=Jakarta&start=10")
+        self.assertEqual(template.param, "start")
+        self.assertEqual(template.url(1), "https://id.indeed.com/jobs?q=fresh&l=Jakarta")
+        self.assertEqual(template.url(3), "https://id.indeed.com/jobs?q=fresh&l=Jakarta&start=20")
+
+    def test_unrelated_urls(self):
+        # More than one number changes
+        self.assertIsNone(infer_template("http://a/2020/page/1/", "http://a/2021/page/2/"))
+        # Numbers going down
+        self.assertIsNone(infer_template("http://a/page/2/", "http://a/page/1/"))
+        # Different path, or a changed parameter besides the added one
+        self.assertIsNone(infer_template("http://a/jobs?q=x", "http://a/other?q=x&start=10"))
+        self.assertIsNone(infer_template("http://a/jobs?q=x", "http://a/jobs?q=y&start=10"))
+        # Added parameter that is not a page offset
+        self.assertIsNone(infer_template("http://a/jobs?q=x", "http://a/jobs?q=x&sort=date"))
+        self.assertIsNone(infer_template("http://a/jobs?q=x", "http://a/jobs?q=x&start=0"))
+
+
+if __name__ == "__main__":
+    unittest.main()
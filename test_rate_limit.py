@@ -0,0 +1,136 @@
+"""
+Tests for the adaptive rate limiter (utils/rate_limit.py), including the
+ZyteClient retry loop against the local stand-in server.
+
+Run with: python -m unittest test_rate_limit
+"""
+
+import os
+import time
+import unittest
+from email.utils import formatdate
+
+os.environ.setdefault("ZYTE_API_KEY", "test-key")
+
+from mock_zyte_server import ServerSettings, start_server
+from utils.client import ZyteClient
+from utils.rate_limit import AdaptiveRateLimiter, domain_limiter, get_limiter, parse_retry_after
+
+
+class AdaptiveRateLimiterTest(unittest.TestCase):
+
+    def test_success_increases_rate_up_to_max(self):
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, max_rate=1.25, increase=0.1)
+        limiter.on_success()
+        self.assertAlmostEqual(limiter.rate, 1.1)
+        for _ in range(5):
+            limiter.on_success()
+        self.assertEqual(limiter.rate, 1.25)
+
+    def test_throttle_cuts_rate_down_to_min(self):
+        limiter = AdaptiveRateLimiter(initial_rate=4.0, min_rate=0.5, decrease=0.5)
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 2.0)
+        for _ in range(5):
+            limiter.on_throttle()
+        self.assertEqual(limiter.rate, 0.5)
+
+    def test_burst_then_wait_at_rate(self):
+        limiter = AdaptiveRateLimiter(initial_rate=2.0, burst=2)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertEqual(limiter.reserve(), 0.0)
+        self.assertAlmostEqual(limiter.reserve(), 0.5, places=2)
+
+    def test_throttle_drops_saved_tokens(self):
+        limiter = AdaptiveRateLimiter(initial_rate=2.0, burst=3, decrease=0.5)
+        limiter.on_throttle()
+        self.assertAlmostEqual(limiter.reserve(), 1.0, places=2)
+
+    def test_retry_after_blocks_requests(self):
+        limiter = AdaptiveRateLimiter(initial_rate=10.0, burst=5)
+        limiter.on_throttle(retry_after=2.0)
+        self.assertGreater(limiter.reserve(), 1.9)
+
+    def test_feedback(self):
+        limiter = AdaptiveRateLimiter(initial_rate=1.0, increase=0.5, decrease=0.5)
+        limiter.feedback(200)
+        self.assertEqual(limiter.rate, 1.5)
+        limiter.feedback(404)
+        self.assertEqual(limiter.rate, 1.5)
+        limiter.feedback(429, "1")
+        self.assertEqual(limiter.rate, 0.75)
+        limiter.feedback(503)
+        self.assertEqual(limiter.rate, 0.375)
+
+    def test_shared_limiters(self):
+        self.assertIs(get_limiter("test:shared"), get_limiter("test:shared"))
+        self.assertIs(domain_limiter("http://Example.com/a"), domain_limiter("http://example.com/b"))
+
+
+class ParseRetryAfterTest(unittest.TestCase):
+
+    def test_seconds(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("1.5"), 1.5)
+        self.assertEqual(parse_retry_after("-4"), 0.0)
+
+    def test_http_date(self):
+        self.assertAlmostEqual(parse_retry_after(formatdate(time.time() + 30, usegmt=True)), 30, delta=2)
+        self.assertEqual(parse_retry_after(formatdate(time.time() - 30, usegmt=True)), 0.0)
+
+    def test_missing_or_invalid(self):
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after(""))
+        self.assertIsNone(parse_retry_after("soon"))
+
+
+class ClientThrottlingTest(unittest.TestCase):
+    """ZyteClient against the stand-in server answering 429 with Retry-After."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.settings = ServerSettings(retry_after=0.2)
+        cls.server = start_server(settings=cls.settings)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.settings.throttle_rate = 0.0
+        self.settings.requests = 0
+
+    def client(self, api_key: str) -> ZyteClient:
+        return ZyteClient(api_key=api_key, endpoint=self.server.endpoint, max_retries=2,
+                          defaults={"httpResponseBody": True})
+
+    def test_throttled_requests_back_off_and_retry(self):
+        url = "http://throttled.example/"
+        rate = domain_limiter(url).rate
+        self.settings.throttle_rate = 1.0
+        with self.client("test-throttled") as client:
+            start = time.monotonic()
+            response = client.post({"url": url})
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.settings.requests, 3)
+        # Two retries, each held back by the 0.2 s Retry-After
+        self.assertGreaterEqual(elapsed, 0.4)
+        self.assertAlmostEqual(domain_limiter(url).rate, rate * 0.5 ** 3)
+
+    def test_successful_requests_speed_up(self):
+        url = "http://fast.example/"
+        rate = domain_limiter(url).rate
+        with self.client("test-fast") as client:
+            for _ in range(3):
+                self.assertEqual(client.post({"url": url}).status_code, 200)
+
+        self.assertEqual(self.settings.requests, 3)
+        self.assertGreater(domain_limiter(url).rate, rate)
+        self.assertGreater(get_limiter("apikey:test-fast").rate, rate)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+Tests for the persistent seen-item index (utils/seen_index.py), including
+an incremental crawl of the local stand-in server that stops at the first
+page holding only known items.
+
+Run with: python -m unittest test_seen_index
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+from typing import Dict, List
+
+os.environ.setdefault("ZYTE_API_KEY", "test-key")
+
+from mock_zyte_server import ServerSettings, start_server
+from utils.client import ZyteClient
+from utils.parsing import parse_html
+from utils.seen_index import BloomFilter, SeenIndex, item_key
+
+KEY_FIELDS = ("key", "url")
+
+
+class ItemKeyTest(unittest.TestCase):
+
+    def test_first_non_empty_field(self):
+        self.assertEqual(item_key({"key": "", "url": "http://a/"}, KEY_FIELDS), "http://a/")
+        self.assertEqual(item_key({"key": 7, "url": "http://a/"}, KEY_FIELDS), "7")
+        self.assertIsNone(item_key({"title": "x"}, KEY_FIELDS))
+
+
+class BloomFilterTest(unittest.TestCase):
+
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        for i in range(2000):
+            bloom.add(f"seen-{i}")
+        self.assertTrue(all(f"seen-{i}" in bloom for i in range(2000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(2000))
+        self.assertLess(false_positives, 100)
+
+
+class SeenIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "seen.sqlite3")
+
+    def index(self, namespace: str = "test", **kwargs) -> SeenIndex:
+        index = SeenIndex(namespace, path=self.path, **kwargs)
+        self.addCleanup(index.close)
+        return index
+
+    def test_mark_reports_new_keys_once(self):
+        index = self.index()
+        self.assertEqual(index.mark(["b", "a", "b", "", None]), ["b", "a"])
+        self.assertEqual(index.mark(["a", "c"]), ["c"])
+        self.assertTrue(index.seen("a"))
+        self.assertFalse(index.seen("d"))
+        self.assertEqual(len(index), 3)
+
+    def test_keys_persist_across_runs_with_timestamps(self):
+        self.index().mark(["a"])
+        later = self.index()
+        self.assertTrue(later.seen("a"))
+        stats = later.stats("a")
+        self.assertLessEqual(stats["first_seen"], stats["last_seen"])
+        self.assertIsNone(later.stats("b"))
+
+    def test_namespaces_are_separate(self):
+        self.index("jobs").mark(["a"])
+        self.assertFalse(self.index("products").seen("a"))
+
+    def test_unseen_does_not_mark(self):
+        index = self.index()
+        index.mark(["a"])
+        records = [{"key": "a"}, {"key": "b"}, {"key": "b"}, {"title": "no key"}]
+        self.assertEqual(index.unseen(records, KEY_FIELDS), [{"key": "b"}, {"title": "no key"}])
+        self.assertFalse(index.seen("b"))
+
+        self.assertEqual(index.mark_records(records, KEY_FIELDS), ["b"])
+        self.assertEqual(index.unseen(records, KEY_FIELDS), [{"title": "no key"}])
+
+    def test_filter_new_marks_and_filters(self):
+        index = self.index()
+        records = [{"key": "a"}, {"url": "http://b/"}, {"key": "a"}]
+        self.assertEqual(index.filter_new(records, KEY_FIELDS), [{"key": "a"}, {"url": "http://b/"}])
+        self.assertEqual(index.filter_new(records, KEY_FIELDS), [])
+
+    def test_all_known(self):
+        index = self.index()
+        index.mark(["a", "b"])
+        self.assertTrue(index.all_known([{"key": "a"}, {"key": "b"}, {"title": "no key"}], KEY_FIELDS))
+        self.assertFalse(index.all_known([{"key": "a"}, {"key": "c"}], KEY_FIELDS))
+        # Nothing keyed on the page is no reason to stop
+        self.assertFalse(index.all_known([], KEY_FIELDS))
+        self.assertFalse(index.all_known([{"title": "no key"}], KEY_FIELDS))
+
+    def test_bloom_front_is_loaded_from_earlier_runs(self):
+        self.index().mark(["a"])
+        index = self.index(use_bloom=True, bloom_capacity=1000)
+        self.assertTrue(index.seen("a"))
+        self.assertFalse(index.seen("b"))
+        self.assertEqual(index.mark(["a", "b"]), ["b"])
+        self.assertTrue(index.seen("b"))
+
+    def test_concurrent_marks_report_each_key_once(self):
+        for use_bloom in (False, True):
+            index = self.index(f"threads-{use_bloom}", use_bloom=use_bloom, bloom_capacity=1000)
+            keys = [f"k{i}" for i in range(200)]
+            reported: List[List[str]] = []
+            barrier = threading.Barrier(8)
+
+            def mark():
+                barrier.wait()
+                reported.append(index.mark(keys))
+
+            threads = [threading.Thread(target=mark) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(sorted(key for batch in reported for key in batch), sorted(keys))
+
+
+class IncrementalCrawlTest(unittest.TestCase):
+    """Paginate the stand-in server's quote pages, stopping at known pages."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.settings = ServerSettings()
+        cls.server = start_server(settings=cls.settings)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "seen.sqlite3")
+        self.settings.requests = 0
+
+    def crawl(self, seen: SeenIndex, max_pages: int = 20) -> List[Dict]:
+        quotes = []
+        with ZyteClient(api_key="test-seen", endpoint=self.server.endpoint) as client:
+            for page in range(1, max_pages + 1):
+                html = client.extract({"url": f"http://quotes.toscrape.com/page/{page}/",
+                                       "browserHtml": True})["browserHtml"]
+                page_quotes = [
+                    {"key": f"{quote.css_first('.author').text()}: {quote.css_first('.text').text()}"}
+                    for quote in parse_html(html).css(".quote")
+                ]
+                quotes.extend(page_quotes)
+                if not page_quotes or seen.all_known(page_quotes, KEY_FIELDS):
+                    break
+        return quotes
+
+    def test_second_run_stops_at_first_known_page(self):
+        with SeenIndex("quotes", path=self.path) as seen:
+            quotes = self.crawl(seen)
+            self.assertEqual(len(seen.unseen(quotes, KEY_FIELDS)), len(quotes))
+            seen.mark_records(quotes, KEY_FIELDS)
+        first_run_requests = self.settings.requests
+        self.assertGreater(first_run_requests, 2)
+
+        self.settings.requests = 0
+        with SeenIndex("quotes", path=self.path) as seen:
+            quotes = self.crawl(seen)
+            self.assertEqual(seen.unseen(quotes, KEY_FIELDS), [])
+        self.assertEqual(self.settings.requests, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,343 @@
+"""
+Asyncio Zyte API client.
+Runs many extract requests concurrently, bounded by a semaphore, and yields
+results as they complete.
+"""
+
+import asyncio
+import queue
+import threading
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT, CACHE_CONFIG
+from utils import json_codec
+from utils.cache import ResponseCache, cache_key
+from utils.client import build_payload, default_cache, default_payload_fields, default_timeout
+from utils.latency import get_recorder, timed_phase
+from utils.rate_limit import THROTTLE_STATUSES, acquire_all_async, limiters_for_request
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one payload in a batch: decoded response or the error raised."""
+    index: int
+    payload: Dict
+    data: Optional[Dict] = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """Time connection setup into the RequestTiming passed as trace_request_ctx."""
+    async def on_connection_create_start(session, context, params):
+        context.connect_started = time.perf_counter()
+
+    async def on_connection_create_end(session, context, params):
+        timing = context.trace_request_ctx
+        timing.new_connection = True
+        timing.add("connect", time.perf_counter() - context.connect_started)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    return trace_config
+
+
+class AsyncZyteClient:
+    """
+    Zyte API client built on a shared aiohttp session.
+
+    Use as an async context manager:
+
+        async with AsyncZyteClient(concurrency=20) as client:
+            async for result in client.extract_many(payloads):
+                ...
+
+    Args:
+        api_key (str): Zyte API key (default: ZYTE_API_KEY)
+        endpoint (str): Extract endpoint (default: ZYTE_API_ENDPOINT)
+        concurrency (int): Maximum number of requests in flight
+        per_domain (int): Maximum requests in flight per target domain
+            (default: no per-domain cap)
+        timeout (float): Default HTTP timeout in seconds
+        defaults (dict): Default payload fields merged into every request
+        max_retries (int): Retries after a 429/503 response
+        cache (ResponseCache): Response cache; None disables caching
+        bypass_cache (bool): Skip cache reads but still store responses
+    """
+
+    def __init__(self, api_key: str = ZYTE_API_KEY, endpoint: str = ZYTE_API_ENDPOINT,
+                 concurrency: int = 10, timeout: Optional[float] = None,
+                 defaults: Optional[Dict] = None, max_retries: int = 3,
+                 cache: Optional[ResponseCache] = None, bypass_cache: bool = False,
+                 per_domain: Optional[int] = None):
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.endpoint = endpoint
+        self.concurrency = concurrency
+        self.timeout = timeout if timeout is not None else default_timeout()
+        self.defaults = defaults if defaults is not None else default_payload_fields()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.per_domain = per_domain
+        self._domain_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.session = aiohttp.ClientSession(
+            auth=aiohttp.BasicAuth(self.api_key, ""),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+            trace_configs=[_trace_config()]
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _domain_semaphore(self, url: Optional[str]) -> Optional[asyncio.Semaphore]:
+        if not self.per_domain or not url:
+            return None
+        domain = urlparse(url).hostname or ""
+        if domain not in self._domain_semaphores:
+            self._domain_semaphores[domain] = asyncio.Semaphore(self.per_domain)
+        return self._domain_semaphores[domain]
+
+    async def extract(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """
+        Send one payload, waiting for a free slot for its target domain (if
+        per_domain is set), a free concurrency slot and the adaptive rate
+        limiters first. 429/503 responses are retried.
+        Cached responses are returned without calling the API.
+
+        Raises:
+            aiohttp.ClientResponseError: If the API returns an error status
+        """
+        request_payload = build_payload(payload, self.defaults)
+
+        key = None
+        if self.cache is not None:
+            key = cache_key(request_payload)
+            body = None if self.bypass_cache else self.cache.get(key)
+            if body is not None:
+                return json_codec.loads(body)
+
+        limiters = limiters_for_request(self.api_key, request_payload.get("url"))
+        request_timeout = aiohttp.ClientTimeout(
+            total=timeout if timeout is not None else self.timeout
+        )
+        data = json_codec.dumpb(request_payload)
+        recorder = get_recorder()
+        async with AsyncExitStack() as slots:
+            domain_semaphore = self._domain_semaphore(request_payload.get("url"))
+            if domain_semaphore is not None:
+                # Queue on the domain first so a busy domain holds no global slot
+                await slots.enter_async_context(domain_semaphore)
+            await slots.enter_async_context(self._semaphore)
+            for attempt in range(self.max_retries + 1):
+                await acquire_all_async(limiters)
+                timing = recorder.start(request_payload.get("url"))
+                timing.new_connection = False
+                timing.payload_bytes = len(data)
+                start = time.perf_counter()
+                try:
+                    async with self.session.post(
+                        self.endpoint,
+                        data=data,
+                        headers={"Content-Type": "application/json"},
+                        timeout=request_timeout,
+                        trace_request_ctx=timing
+                    ) as response:
+                        headers_received = time.perf_counter()
+                        timing.status = response.status
+                        timing.add("ttfb", headers_received - start - timing.phases.get("connect", 0.0))
+                        for limiter in limiters:
+                            limiter.feedback(response.status, response.headers.get("Retry-After"))
+                        if response.status in THROTTLE_STATUSES and attempt < self.max_retries:
+                            continue
+                        response.raise_for_status()
+                        body = await response.read()
+                        timing.response_bytes = len(body)
+                        timing.add("download", time.perf_counter() - headers_received)
+                        if key is not None:
+                            self.cache.set(key, body)
+                        with timed_phase(timing, "decode"):
+                            return json_codec.loads(body)
+                finally:
+                    # total is the HTTP exchange; decode is reported on its own
+                    timing.add("total", time.perf_counter() - start - timing.phases.get("decode", 0.0))
+                    recorder.record(timing)
+
+    async def extract_many(self, payloads: Iterable[Dict],
+                           timeout: Optional[float] = None) -> AsyncIterator[BatchResult]:
+        """
+        Send all payloads concurrently and yield results in completion order.
+
+        A pool of concurrency worker tasks pulls payloads from the iterable
+        as requests finish, so only the payloads in flight and at most
+        concurrency undelivered results are held at once; a generator of
+        thousands of payloads is never materialized. Workers wait while the
+        consumer falls behind.
+
+        Failures are reported through BatchResult.error instead of raising,
+        so one bad payload does not cancel the rest of the batch.
+
+        Args:
+            payloads (iterable): Zyte API request payloads
+            timeout (float): HTTP timeout in seconds per request
+
+        Yields:
+            BatchResult: Result tagged with the payload's position in the input
+
+        Raises:
+            Whatever iterating payloads raises, once the requests in flight finish
+        """
+        source = enumerate(payloads)
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        source_errors: List[Exception] = []
+        finished = object()
+
+        async def worker():
+            try:
+                # Workers share one iterator; next() never awaits, so each payload goes to one worker
+                for index, payload in source:
+                    try:
+                        data = await self.extract(payload, timeout=timeout)
+                        result = BatchResult(index, payload, data=data)
+                    except Exception as e:
+                        result = BatchResult(index, payload, error=e)
+                    await results.put(result)
+            except Exception as e:
+                source_errors.append(e)
+            await results.put(finished)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(self.concurrency, 1))]
+        try:
+            running = len(workers)
+            while running:
+                item = await results.get()
+                if item is finished:
+                    running -= 1
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+        if source_errors:
+            raise source_errors[0]
+
+def extract_many(payloads: Iterable[Dict], concurrency: int = 10,
+                 timeout: Optional[float] = None,
+                 on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+    """
+    Synchronous wrapper around AsyncZyteClient.extract_many for scripts.
+
+    Args:
+        payloads (iterable): Zyte API request payloads
+        concurrency (int): Maximum number of requests in flight
+        timeout (float): HTTP timeout in seconds per request
+        on_result (callable): Called with each BatchResult as it completes
+
+    Returns:
+        list: BatchResults ordered like the input payloads
+    """
+    async def collect() -> List[BatchResult]:
+        results = []
+        async with AsyncZyteClient(concurrency=concurrency, cache=default_cache(),
+                                   bypass_cache=CACHE_CONFIG["bypass"]) as client:
+            async for result in client.extract_many(payloads, timeout=timeout):
+                if on_result:
+                    on_result(result)
+                results.append(result)
+        return results
+
+    results = asyncio.run(collect())
+    return sorted(results, key=lambda r: r.index)
+
+
+def iter_extract(payloads: Iterable[Dict], concurrency: int = 10,
+                 timeout: Optional[float] = None) -> Iterator[BatchResult]:
+    """
+    Synchronous generator over AsyncZyteClient.extract_many: the requests
+    run on a background event loop and results are yielded in completion
+    order. At most concurrency results wait for the consumer; the requests
+    stall while it falls behind. Closing the generator early cancels the
+    requests still in flight and waits for the event loop to shut down.
+
+    Args:
+        payloads (iterable): Zyte API request payloads
+        concurrency (int): Maximum number of requests in flight
+        timeout (float): HTTP timeout in seconds per request
+
+    Yields:
+        BatchResult: Result tagged with the payload's position in the input
+    """
+    # One extra slot for the end marker, so the loop thread never blocks on it
+    results: queue.Queue = queue.Queue(maxsize=concurrency + 1)
+    done = object()
+    loop = asyncio.new_event_loop()
+    # Taken before each result is queued and given back as the consumer takes it
+    slots = asyncio.Semaphore(concurrency)
+
+    async def produce():
+        async with AsyncZyteClient(concurrency=concurrency, cache=default_cache(),
+                                   bypass_cache=CACHE_CONFIG["bypass"]) as client:
+            async for result in client.extract_many(payloads, timeout=timeout):
+                await slots.acquire()
+                results.put_nowait(result)
+
+    task = loop.create_task(produce())
+
+    def run():
+        asyncio.set_event_loop(loop)
+        outcome = done
+        try:
+            loop.run_until_complete(task)
+        except BaseException as e:
+            outcome = e
+        finally:
+            pending = asyncio.all_tasks(loop)
+            for leftover in pending:
+                leftover.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+            asyncio.set_event_loop(None)
+            results.put(outcome)
+
+    def call_in_loop(callback):
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            # The loop already finished and closed
+            pass
+
+    thread = threading.Thread(target=run, name="iter-extract", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = results.get()
+            if item is done:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            call_in_loop(slots.release)
+            yield item
+    finally:
+        call_in_loop(task.cancel)
+        thread.join()
@@ -0,0 +1,158 @@
+"""
+Content-addressed on-disk cache for Zyte API responses.
+Responses are stored under a hash of the normalized request payload, so a
+repeated render of the same page with the same actions is read from disk.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def normalize_payload(payload: Dict) -> Dict:
+    """
+    Normalize a payload so equivalent requests produce the same key.
+
+    Fields that are False or None are dropped, since they mean the same as
+    leaving the field out.
+    """
+    return {
+        key: value
+        for key, value in payload.items()
+        if value is not None and value is not False
+    }
+
+
+def cache_key(payload: Dict) -> str:
+    """
+    Return the cache key for a payload.
+
+    The key covers everything that changes the response: url, actions,
+    output flags (browserHtml, httpResponseBody, ...) and networkCapture filters.
+    """
+    canonical = json.dumps(
+        normalize_payload(payload),
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk response cache with TTL and LRU eviction by total size.
+
+    Each entry is one file holding the raw response body. The file mtime is
+    when it was stored (used for TTL) and the atime is when it was last read
+    (used for LRU).
+
+    Args:
+        directory (str): Cache directory
+        ttl (float): Seconds an entry stays valid; None keeps entries forever
+        max_size (int): Maximum total size in bytes before evicting
+    """
+
+    def __init__(self, directory: str = ".zyte_cache", ttl: Optional[float] = 86400,
+                 max_size: int = 500 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_size = max_size
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the stored body for a key, or None on a miss or expired entry."""
+        path = self._path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        now = time.time()
+        if self.ttl is not None and now - stat.st_mtime > self.ttl:
+            self._remove(path, stat.st_size)
+            return None
+
+        try:
+            body = path.read_bytes()
+            os.utime(path, (now, stat.st_mtime))
+        except FileNotFoundError:
+            return None
+        return body
+
+    def set(self, key: str, body: bytes):
+        """Store a response body and evict old entries if over the size cap."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(body)
+        now = time.time()
+        os.utime(tmp_path, (now, now))
+
+        with self._lock:
+            size = self._current_size()
+            try:
+                size -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp_path, path)
+            self._size = size + len(body)
+
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently read entries until under the size cap."""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_atime, stat.st_size, path))
+
+            size = sum(entry[1] for entry in entries)
+            for _, entry_size, path in sorted(entries, key=lambda entry: entry[0]):
+                if size <= self.max_size:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                size -= entry_size
+            self._size = size
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            for path in self.directory.glob("*/*.json"):
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._size = 0
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(
+                path.stat().st_size for path in self.directory.glob("*/*.json")
+            )
+        return self._size
+
+    def _remove(self, path: Path, size: int):
+        with self._lock:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._size is not None:
+                self._size -= size
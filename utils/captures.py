@@ -0,0 +1,160 @@
+"""
+Lazy networkCapture decoding.
+Wraps the networkCapture items of a Zyte API response so bodies are
+base64-decoded only when first read, JSON is parsed straight from the decoded
+bytes, and captures can be filtered by URL or status before anything is
+decoded. decode_captures() decodes a large batch in worker processes.
+"""
+
+from base64 import b64decode
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from utils import json_codec
+
+_UNSET = object()
+
+
+def _decode_chunk(bodies: List[str]) -> List[Any]:
+    """Decode base64 JSON bodies in a worker, returning errors in place of data."""
+    results = []
+    for body in bodies:
+        try:
+            results.append(json_codec.loads(b64decode(body)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class NetworkCapture:
+    """
+    One networkCapture item with lazily decoded body.
+
+    Example:
+        for capture in filter_captures(wrap_captures(result), url_contains="/api/"):
+            data = capture.json()
+
+    Args:
+        raw (dict): networkCapture item as returned by the API
+    """
+
+    __slots__ = ("raw", "_body", "_json")
+
+    def __init__(self, raw: Dict):
+        self.raw = raw
+        self._body: Optional[bytes] = None
+        self._json = _UNSET
+
+    @property
+    def url(self) -> Optional[str]:
+        return self.raw.get("url")
+
+    @property
+    def method(self) -> Optional[str]:
+        return self.raw.get("method")
+
+    @property
+    def status(self) -> Optional[int]:
+        return self.raw.get("statusCode", self.raw.get("status"))
+
+    @property
+    def has_body(self) -> bool:
+        return bool(self.raw.get("httpResponseBody"))
+
+    @property
+    def body(self) -> bytes:
+        """Decoded response body, decoded on first access."""
+        if self._body is None:
+            self._body = b64decode(self.raw.get("httpResponseBody") or "")
+        return self._body
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    def json(self) -> Any:
+        """
+        Response body parsed as JSON, parsed on first access.
+
+        Raises:
+            ValueError: The body is not valid JSON
+        """
+        if self._json is _UNSET:
+            body = self._body
+            if body is None:
+                # Skip caching the bytes: callers reading JSON rarely need them again
+                body = b64decode(self.raw.get("httpResponseBody") or "")
+            try:
+                self._json = json_codec.loads(body)
+            except Exception as e:
+                self._json = e
+        if isinstance(self._json, Exception):
+            raise self._json
+        return self._json
+
+    def matches(self, url_contains: Optional[str] = None,
+                statuses: Optional[Sequence[int]] = None) -> bool:
+        """Check URL and status without decoding the body."""
+        if url_contains is not None and url_contains not in (self.url or ""):
+            return False
+        if statuses is not None and self.status not in statuses:
+            return False
+        return True
+
+
+def wrap_captures(result_or_captures) -> List[NetworkCapture]:
+    """Wrap an API response dict, or its networkCapture list, in NetworkCapture objects."""
+    if isinstance(result_or_captures, dict):
+        result_or_captures = result_or_captures.get("networkCapture", [])
+    return [NetworkCapture(raw) for raw in result_or_captures]
+
+
+def filter_captures(captures: Iterable[NetworkCapture], url_contains: Optional[str] = None,
+                    statuses: Optional[Sequence[int]] = None,
+                    with_body: bool = True) -> Iterator[NetworkCapture]:
+    """
+    Select captures by URL substring and status code before decoding.
+
+    Args:
+        captures (iterable): NetworkCapture objects
+        url_contains (str): Keep captures whose URL contains this
+        statuses (sequence): Keep captures with one of these status codes
+        with_body (bool): Drop captures without a response body
+    """
+    for capture in captures:
+        if with_body and not capture.has_body:
+            continue
+        if capture.matches(url_contains, statuses):
+            yield capture
+
+
+def decode_captures(captures: Sequence[NetworkCapture], workers: int = 0,
+                    chunksize: int = 8) -> Sequence[NetworkCapture]:
+    """
+    Parse the JSON bodies of many captures up front.
+
+    With workers > 0 the base64 and JSON decoding runs in a process pool.
+    Results, including decode errors, are stored on each capture, so
+    capture.json() then returns (or raises) without further work.
+
+    Args:
+        captures (sequence): NetworkCapture objects with bodies
+        workers (int): Decoder processes; 0 decodes lazily in this process
+        chunksize (int): Captures sent to a worker at a time
+
+    Returns:
+        sequence: The same captures
+    """
+    pending = [capture for capture in captures if capture._json is _UNSET and capture.has_body]
+    if workers <= 0 or len(pending) < 2:
+        return captures
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        bodies = [capture.raw["httpResponseBody"] for capture in pending]
+        futures = [pool.submit(_decode_chunk, bodies[i:i + chunksize])
+                   for i in range(0, len(bodies), chunksize)]
+        decoded = [item for future in futures for item in future.result()]
+
+    for capture, data in zip(pending, decoded):
+        capture._json = data
+    return captures
+
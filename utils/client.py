@@ -0,0 +1,316 @@
+"""
+Shared Zyte API client.
+Keeps one keep-alive session with a sized connection pool so every scraper
+reuses open connections to the Zyte API instead of reconnecting per request.
+"""
+
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.config import ZYTE_API_KEY, ZYTE_API_ENDPOINT, ZYTE_PROXY_ENDPOINT, DEFAULT_CONFIG, CACHE_CONFIG
+from utils import json_codec
+from utils.cache import ResponseCache, cache_key
+from utils.latency import get_recorder, timed_phase
+from utils.rate_limit import THROTTLE_STATUSES, acquire_all, limiters_for_request
+
+# Payload fields that select what the API returns. A request that already asks
+# for one of these does not get the default browserHtml output added.
+OUTPUT_FIELDS = (
+    "browserHtml",
+    "httpResponseBody",
+    "product",
+    "productList",
+    "productNavigation",
+    "article",
+    "articleList",
+    "jobPosting",
+    "screenshot",
+)
+
+# Browser-only fields that are invalid together with httpResponseBody
+BROWSER_ONLY_FIELDS = ("browserHtml", "javascript", "actions", "screenshot")
+
+
+def build_payload(payload: Dict, defaults: Optional[Dict] = None) -> Dict:
+    """
+    Merge default payload fields into a request payload.
+
+    Args:
+        payload (dict): Request payload as written by the scraper
+        defaults (dict): Default fields (default: DEFAULT_CONFIG without timeout)
+
+    Returns:
+        dict: New payload; fields set by the scraper always win
+    """
+    if defaults is None:
+        defaults = default_payload_fields()
+
+    merged = dict(payload)
+    has_output = any(merged.get(field) for field in OUTPUT_FIELDS)
+    http_only = bool(merged.get("httpResponseBody"))
+
+    for key, value in defaults.items():
+        if key in OUTPUT_FIELDS and has_output:
+            continue
+        if key in BROWSER_ONLY_FIELDS and http_only:
+            continue
+        merged.setdefault(key, value)
+
+    return merged
+
+
+def default_payload_fields() -> Dict:
+    """Return DEFAULT_CONFIG without the client-side timeout."""
+    return {k: v for k, v in DEFAULT_CONFIG.items() if k != "timeout"}
+
+
+def default_timeout() -> float:
+    """Return the DEFAULT_CONFIG timeout in seconds."""
+    return DEFAULT_CONFIG.get("timeout", 30000) / 1000
+
+
+def default_cache() -> Optional[ResponseCache]:
+    """Return a ResponseCache built from CACHE_CONFIG, or None when disabled."""
+    if not CACHE_CONFIG["enabled"]:
+        return None
+    return ResponseCache(
+        directory=CACHE_CONFIG["directory"],
+        ttl=CACHE_CONFIG["ttl"],
+        max_size=CACHE_CONFIG["max_size"]
+    )
+
+
+class ZyteResponse(requests.Response):
+    """
+    requests.Response whose json() decodes with the fast JSON codec.
+    timing is the RequestTiming recorded for it (None for cache hits);
+    decoding time is added to it.
+    """
+
+    timing = None
+
+    def json(self, **kwargs):
+        with timed_phase(self.timing, "decode"):
+            return json_codec.loads(self.content)
+
+
+def fast_json(response: requests.Response) -> requests.Response:
+    """Switch a response to ZyteResponse so response.json() uses json_codec."""
+    response.__class__ = ZyteResponse
+    return response
+
+
+def cached_response(body: bytes, url: str) -> requests.Response:
+    """Wrap a cached body in a requests.Response so callers need no changes."""
+    response = ZyteResponse()
+    response.status_code = 200
+    response._content = body
+    response.encoding = "utf-8"
+    response.url = url
+    response.headers["Content-Type"] = "application/json"
+    response.headers["X-Cache"] = "HIT"
+    return response
+
+
+class ZyteClient:
+    """
+    Zyte API client built on a pooled keep-alive requests.Session.
+
+    Args:
+        api_key (str): Zyte API key (default: ZYTE_API_KEY)
+        endpoint (str): Extract endpoint (default: ZYTE_API_ENDPOINT)
+        timeout (float): Default HTTP timeout in seconds
+        pool_size (int): Number of connections kept open per host
+        defaults (dict): Default payload fields merged into every request
+        max_retries (int): Retries after a 429/503 response
+        cache (ResponseCache): Response cache; None disables caching
+        bypass_cache (bool): Skip cache reads but still store responses
+    """
+
+    def __init__(self, api_key: str = ZYTE_API_KEY, endpoint: str = ZYTE_API_ENDPOINT,
+                 timeout: Optional[float] = None, pool_size: int = 10,
+                 defaults: Optional[Dict] = None, max_retries: int = 3,
+                 cache: Optional[ResponseCache] = None, bypass_cache: bool = False):
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.max_retries = max_retries
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.timeout = timeout if timeout is not None else default_timeout()
+        self.defaults = defaults if defaults is not None else default_payload_fields()
+
+        self.session = requests.Session()
+        self.session.auth = (api_key, "")
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, payload: Dict, timeout: Optional[float] = None,
+             bypass_cache: Optional[bool] = None) -> requests.Response:
+        """
+        Send a payload to the extract endpoint.
+
+        With a cache configured, a stored response for the same normalized
+        payload is returned without calling the API. Otherwise each attempt
+        waits on the adaptive rate limiters for the API key and the target
+        domain; 429/503 responses slow them down and are retried.
+
+        Args:
+            payload (dict): Zyte API request payload
+            timeout (float): HTTP timeout in seconds (default: client timeout)
+            bypass_cache (bool): Skip the cache read (default: client setting)
+
+        Returns:
+            requests.Response: Raw API response (the last one if retries ran out)
+        """
+        request_payload = build_payload(payload, self.defaults)
+
+        key = None
+        if self.cache is not None:
+            key = cache_key(request_payload)
+            bypass = self.bypass_cache if bypass_cache is None else bypass_cache
+            body = None if bypass else self.cache.get(key)
+            if body is not None:
+                return cached_response(body, self.endpoint)
+
+        limiters = limiters_for_request(self.api_key, request_payload.get("url"))
+        body = json_codec.dumpb(request_payload)
+        recorder = get_recorder()
+
+        for attempt in range(self.max_retries + 1):
+            acquire_all(limiters)
+            opened = self._connections_opened()
+            start = time.perf_counter()
+            response = fast_json(self.session.post(
+                self.endpoint,
+                data=body,
+                headers={"Content-Type": "application/json"},
+                timeout=timeout if timeout is not None else self.timeout,
+                stream=True
+            ))
+            headers_received = time.perf_counter()
+            content = response.content
+            finished = time.perf_counter()
+
+            timing = recorder.start(request_payload.get("url"), response.status_code)
+            timing.payload_bytes = len(body)
+            timing.response_bytes = len(content)
+            timing.new_connection = self._connections_opened() > opened
+            timing.add("ttfb", headers_received - start)
+            timing.add("download", finished - headers_received)
+            timing.add("total", finished - start)
+            recorder.record(timing)
+            response.timing = timing
+
+            for limiter in limiters:
+                limiter.feedback(response.status_code, response.headers.get("Retry-After"))
+            if response.status_code not in THROTTLE_STATUSES:
+                break
+
+        if key is not None and response.status_code == 200:
+            self.cache.set(key, response.content)
+
+        return response
+
+    def _connections_opened(self) -> int:
+        """Connections opened so far by the adapter's pools."""
+        pools = self.session.get_adapter(self.endpoint).poolmanager.pools
+        opened = 0
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            opened += pool.num_connections if pool is not None else 0
+        return opened
+
+    def extract(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """
+        Send a payload and return the decoded API response.
+
+        Raises:
+            requests.exceptions.HTTPError: If the API returns an error status
+        """
+        response = self.post(payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ZyteProxySession(requests.Session):
+    """
+    requests.Session that sends requests through the Zyte API proxy mode,
+    paced by the adaptive rate limiters for the API key and target domain.
+    """
+
+    def __init__(self, api_key: str = ZYTE_API_KEY, pool_size: int = 10):
+        super().__init__()
+        self.api_key = api_key
+        proxy = f"http://{api_key}:@{ZYTE_PROXY_ENDPOINT}"
+        self.proxies = {"http": proxy, "https": proxy}
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, *args, **kwargs):
+        limiters = limiters_for_request(self.api_key, url)
+        acquire_all(limiters)
+        start = time.perf_counter()
+        response = fast_json(super().request(method, url, *args, **kwargs))
+        total = time.perf_counter() - start
+
+        recorder = get_recorder()
+        timing = recorder.start(url, response.status_code)
+        timing.response_bytes = len(response.content)
+        ttfb = min(response.elapsed.total_seconds(), total)
+        timing.add("ttfb", ttfb)
+        timing.add("download", total - ttfb)
+        timing.add("total", total)
+        recorder.record(timing)
+        response.timing = timing
+
+        for limiter in limiters:
+            limiter.feedback(response.status_code, response.headers.get("Retry-After"))
+        return response
+
+
+def proxy_session(api_key: str = ZYTE_API_KEY, pool_size: int = 10) -> ZyteProxySession:
+    """
+    Create a pooled, rate-limited session for the Zyte API proxy mode.
+
+    Args:
+        api_key (str): Zyte API key (default: ZYTE_API_KEY)
+        pool_size (int): Number of connections kept open per host
+
+    Returns:
+        ZyteProxySession: Session with proxies set; use verify=False on requests
+    """
+    return ZyteProxySession(api_key=api_key, pool_size=pool_size)
+
+
+_client: Optional[ZyteClient] = None
+_proxy_session: Optional[ZyteProxySession] = None
+
+
+def get_client() -> ZyteClient:
+    """Return the process-wide shared client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = ZyteClient(cache=default_cache(), bypass_cache=CACHE_CONFIG["bypass"])
+    return _client
+
+
+def get_proxy_session() -> ZyteProxySession:
+    """Return the process-wide shared proxy-mode session, creating it on first use."""
+    global _proxy_session
+    if _proxy_session is None:
+        _proxy_session = proxy_session()
+    return _proxy_session
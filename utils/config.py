@@ -17,8 +17,9 @@ if not ZYTE_API_KEY:
         "2. Set the environment variable: export ZYTE_API_KEY=your_api_key_here"
     )
 
-# API Endpoints
-ZYTE_API_ENDPOINT = "https://api.zyte.com/v1/extract"
+# API Endpoints (override ZYTE_API_ENDPOINT to use mock_zyte_server.py)
+ZYTE_API_ENDPOINT = os.getenv("ZYTE_API_ENDPOINT", "https://api.zyte.com/v1/extract")
+ZYTE_PROXY_ENDPOINT = os.getenv("ZYTE_PROXY_ENDPOINT", "api.zyte.com:8011")
 
 # Default request configuration
 DEFAULT_CONFIG = {
@@ -34,6 +35,49 @@ NETWORK_CAPTURE_CONFIG = {
     "httpResponseBody": True
 }
 
+# Adaptive rate limiting, per target domain and per API key (requests/second)
+RATE_LIMIT_CONFIG = {
+    "initial_rate": 2.0,
+    "min_rate": 0.1,
+    "max_rate": 10.0,
+    "increase": 0.25,
+    "decrease": 0.5,
+    "burst": 2
+}
+
+# On-disk response cache. Enable with ZYTE_CACHE=1; ZYTE_CACHE_BYPASS=1 skips
+# cache reads (responses are still stored, refreshing stale entries).
+CACHE_CONFIG = {
+    "enabled": os.getenv("ZYTE_CACHE") == "1",
+    "bypass": os.getenv("ZYTE_CACHE_BYPASS") == "1",
+    "directory": os.getenv("ZYTE_CACHE_DIR", ".zyte_cache"),
+    "ttl": 24 * 3600,                 # seconds
+    "max_size": 500 * 1024 * 1024     # bytes
+}
+
+# Per-request latency summaries (utils/latency.py) are written here on exit
+# when set, as JSON and as a Prometheus textfile
+METRICS_DIR = os.getenv("ZYTE_METRICS_DIR")
+
+# browserHtml vs httpResponseBody per URL pattern (utils/render_mode.py).
+# mode: "auto" probes each pattern once, "browser" or "http" force one mode.
+RENDER_MODE_CONFIG = {
+    "mode": os.getenv("ZYTE_RENDER_MODE", "auto"),
+    "path": os.getenv("RENDER_MODE_PATH", ".zyte_render_modes.json")
+}
+
+# Crawl frontier (utils/frontier.py): requests in flight per host, link depth
+# and request limits, and fetch workers draining the frontier
+FRONTIER_CONFIG = {
+    "per_host": 4,
+    "max_depth": 10,
+    "max_requests": 1000,
+    "workers": 8
+}
+
+# Persistent seen-item index used for incremental crawls
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH", "seen_items.sqlite3")
+
 # Pagination settings
 PAGINATION_TIMEOUT = 10000  # 10 seconds
 SCROLL_PAUSE_TIME = 2000    # 2 seconds
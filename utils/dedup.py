@@ -0,0 +1,67 @@
+"""
+Deduplication store for scraped records.
+Keeps records in insertion order with constant-time membership checks on a
+configurable set of identity fields.
+"""
+
+from typing import Dict, Hashable, Iterable, Iterator, List, Sequence, Tuple
+
+
+def _hashable(value) -> Hashable:
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in value.items()))
+    return value
+
+
+class DedupStore:
+    """
+    Insertion-ordered record collection keyed on identity fields.
+
+    Example:
+        quotes = DedupStore(("text", "author"))
+        if quotes.add(quote):
+            print("new quote")
+
+    Args:
+        key_fields (sequence): Record fields that identify a record
+    """
+
+    def __init__(self, key_fields: Sequence[str]):
+        self.key_fields = tuple(key_fields)
+        self._records: Dict[Tuple, Dict] = {}
+
+    def key(self, record: Dict) -> Tuple:
+        """Return the identity key of a record."""
+        return tuple(_hashable(record.get(field)) for field in self.key_fields)
+
+    def add(self, record: Dict) -> bool:
+        """
+        Add a record unless one with the same key is already stored.
+
+        Returns:
+            bool: True if the record was new
+        """
+        key = self.key(record)
+        if key in self._records:
+            return False
+        self._records[key] = record
+        return True
+
+    def extend(self, records: Iterable[Dict]) -> List[Dict]:
+        """Add several records and return the ones that were new."""
+        return [record for record in records if self.add(record)]
+
+    def __contains__(self, record: Dict) -> bool:
+        return self.key(record) in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._records.values())
+
+    def to_list(self) -> List[Dict]:
+        """Return stored records in insertion order."""
+        return list(self._records.values())
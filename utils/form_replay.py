@@ -0,0 +1,233 @@
+"""
+Form replay.
+Server-side forms such as ASP.NET postbacks (search.aspx with __VIEWSTATE)
+need a browser only to fill in the form; the submission itself is a plain
+POST. A FormReplayer drives the browser once, with networkCapture on, reads
+the form's action, hidden fields (viewstate, event validation) and submit
+button from the result, and sends later submissions as httpResponseBody
+POST requests with those fields. A replay whose response does not echo the
+submitted values (stale or rejected viewstate) is reported as stale so the
+caller can fall back to the browser; the next browser submission refreshes
+the recorded form.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urljoin
+
+from utils.async_client import iter_extract
+from utils.captures import wrap_captures
+from utils.client import get_client
+from utils.parsing import Node, parse_html
+from utils.render_mode import response_html
+
+BROWSER = "browser"
+REPLAY = "replay"
+
+
+@dataclass
+class FormTemplate:
+    """Everything needed to resubmit a form without a browser."""
+    action: str
+    method: str = "POST"
+    fields: Dict[str, str] = field(default_factory=dict)
+    recorded_at: float = field(default_factory=time.time)
+
+    def payload(self, values: Dict[str, str]) -> Dict:
+        """Zyte API payload that submits the form with values over plain HTTP."""
+        body = urlencode({**self.fields, **values})
+        if self.method == "GET":
+            separator = "&" if "?" in self.action else "?"
+            return {"url": f"{self.action}{separator}{body}", "httpResponseBody": True}
+        return {
+            "url": self.action,
+            "httpResponseBody": True,
+            "httpRequestMethod": self.method,
+            "httpRequestText": body,
+            "customHttpRequestHeaders": [
+                {"name": "Content-Type", "value": "application/x-www-form-urlencoded"}
+            ]
+        }
+
+
+def form_values(form: Node) -> Dict[str, str]:
+    """Current value of every named input and select of a parsed form."""
+    values = {}
+    for element in form.css("input[name], select[name], textarea[name]"):
+        name = element.attr("name")
+        if element.css_first("option") is not None:
+            selected = element.css_first("option[selected]")
+            if selected is not None:
+                values[name] = selected.attr("value", selected.text().strip())
+        elif element.attr("type", "").lower() in ("checkbox", "radio"):
+            if element.attr("checked") is not None:
+                values[name] = element.attr("value", "on")
+        else:
+            values[name] = element.attr("value", element.text())
+    return values
+
+
+def extract_form(html: str, base_url: str, form_selector: str = "form",
+                 submit_selector: str = "[type='submit']") -> Optional[FormTemplate]:
+    """
+    Read a form's action, method, hidden fields and submit button from a page.
+
+    Returns:
+        FormTemplate, or None when the page has no matching form
+    """
+    form = parse_html(html).css_first(form_selector)
+    if form is None:
+        return None
+
+    fields = {
+        hidden.attr("name"): hidden.attr("value", "")
+        for hidden in form.css("input[type='hidden'][name]")
+    }
+    submit = form.css_first(submit_selector)
+    if submit is not None and submit.attr("name"):
+        fields[submit.attr("name")] = submit.attr("value", "")
+
+    return FormTemplate(
+        action=urljoin(base_url, form.attr("action") or base_url),
+        method=(form.attr("method") or "GET").upper(),
+        fields=fields
+    )
+
+
+def form_accepted(html: str, values: Dict[str, str], form_selector: str = "form") -> bool:
+    """
+    True when the response's form shows every submitted value as set.
+    A select value the returned form does not offer (e.g. a tag the chosen
+    author has none of) cannot be shown and is not held against it.
+    """
+    form = parse_html(html).css_first(form_selector)
+    if form is None:
+        return False
+    current = form_values(form)
+    offered = {
+        select.attr("name"): {option.attr("value", option.text().strip()) for option in select.css("option")}
+        for select in form.css("select[name]")
+    }
+    return all(
+        current.get(name) == value
+        for name, value in values.items()
+        if name not in offered or value in offered[name]
+    )
+
+
+class FormReplayer:
+    """
+    Submits a form through the browser once, then replays it over plain HTTP.
+
+    Example:
+        search_form = FormReplayer(build_search_payload)
+        html, mode = search_form.submit(author="Jane Austen", tag="love")
+
+    Args:
+        browser_payload (callable): Builds the browser payload (actions that
+            fill in and submit the form) from the form values
+        form_selector (str): CSS selector of the form on the result page
+        capture_filter (str): URL substring of the submission request to
+            record with networkCapture
+        accepted (callable): accepted(html, values) tells whether a replayed
+            submission went through (default: form_accepted)
+        client: ZyteClient for browser submissions (default: get_client())
+    """
+
+    def __init__(self, browser_payload: Callable[..., Dict], form_selector: str = "form",
+                 capture_filter: str = ".aspx",
+                 accepted: Optional[Callable[[str, Dict[str, str]], bool]] = None,
+                 client=None):
+        self.browser_payload = browser_payload
+        self.form_selector = form_selector
+        self.capture_filter = capture_filter
+        self.accepted = accepted or (lambda html, values: form_accepted(html, values, form_selector))
+        self.template: Optional[FormTemplate] = None
+        self._client = client
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def record(self, timeout: Optional[float] = 30, **values) -> str:
+        """
+        Submit through the browser and record the form from the result.
+        When the result page has no matching form, the recorded form is
+        cleared, since an older one can no longer be trusted.
+
+        Returns:
+            str: Result page HTML
+
+        Raises:
+            requests.exceptions.RequestException: If the API request fails
+        """
+        payload = dict(self.browser_payload(**values))
+        payload["networkCapture"] = [
+            {"filterType": "url", "matchType": "contains", "value": self.capture_filter,
+             "httpResponseBody": False}
+        ]
+        response = self.client.post(payload, timeout=timeout)
+        response.raise_for_status()
+        result = response.json()
+        html = response_html(result)
+
+        template = extract_form(html, result.get("url") or payload["url"], self.form_selector)
+        if template is not None:
+            # A capture without a method was a plain GET
+            posts = [capture for capture in wrap_captures(result)
+                     if (capture.method or "GET").upper() == template.method]
+            if posts:
+                # The request the browser actually sent beats the form's action attribute
+                template.action = posts[-1].url
+        with self._lock:
+            self.template = template
+        return html
+
+    def submit(self, timeout: Optional[float] = 30, **values) -> Tuple[str, str]:
+        """
+        Submit the form, replaying over HTTP when a recorded form is available.
+
+        Returns:
+            tuple: (result page HTML, BROWSER or REPLAY)
+        """
+        template = self.template
+        if template is not None:
+            response = self.client.post(template.payload(values), timeout=timeout)
+            if response.ok:
+                html = response_html(response.json())
+                if self.accepted(html, values):
+                    return html, REPLAY
+            print(f"Form replay rejected (status {response.status_code}), submitting through the browser")
+        return self.record(timeout=timeout, **values), BROWSER
+
+    def replay_many(self, values_list: Iterable[Dict[str, str]], concurrency: int = 10,
+                    timeout: Optional[float] = 30) -> Iterator[Tuple[int, Optional[str], Optional[Exception]]]:
+        """
+        Replay many submissions concurrently over HTTP.
+
+        Requires a recorded form (call record() or submit() first).
+
+        Yields:
+            tuple: (index in values_list, HTML, error) in completion order.
+            A failed request (transport or API error after retries) has
+            HTML None and the error; a response that was not accepted
+            (e.g. stale viewstate) has both None.
+        """
+        if self.template is None:
+            raise ValueError("No recorded form to replay; call record() first")
+        values_list: List[Dict[str, str]] = list(values_list)
+        payloads = [self.template.payload(values) for values in values_list]
+        for result in iter_extract(payloads, concurrency=concurrency, timeout=timeout):
+            if not result.ok:
+                yield result.index, None, result.error
+                continue
+            html = response_html(result.data)
+            if html and self.accepted(html, values_list[result.index]):
+                yield result.index, html, None
+            else:
+                yield result.index, None, None
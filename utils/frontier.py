@@ -0,0 +1,316 @@
+"""
+Crawl frontier.
+Holds the URLs a crawl still has to fetch, ordered by priority, and hands
+them to a pool of fetch workers. URLs are canonicalized before the duplicate
+check, so the same page reached through a different query order, tracking
+parameters or fragment is fetched once. Requests beyond max_depth or
+max_requests are dropped.
+
+Politeness is per host: at most per_host requests to one host are in flight,
+and requests to a host are spaced by the current rate of its adaptive limiter
+(utils.rate_limit), so workers are given requests they can send right away
+instead of sleeping in the limiter while other hosts are ready.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from utils.config import FRONTIER_CONFIG
+from utils.rate_limit import domain_limiter
+
+# Query parameters that never change the page
+TRACKING_PARAMS = ("utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+                   "gclid", "fbclid", "ref", "ref2")
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Normalize a URL for duplicate checks.
+
+    Lowercases scheme and host, drops the default port, the fragment and
+    tracking parameters, sorts the query and gives an empty path "/".
+
+    Example:
+        canonicalize_url("HTTP://Quotes.toscrape.com:80/page/2?b=1&a=2#top")
+        # "http://quotes.toscrape.com/page/2?a=2&b=1"
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{netloc}:{parsed.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS
+    )
+    return urlunparse((scheme, netloc, parsed.path or "/", parsed.params, urlencode(query), ""))
+
+
+def url_host(url: str) -> str:
+    """Host key used for politeness; matches utils.rate_limit.domain_limiter."""
+    return urlparse(url).netloc.lower()
+
+
+@dataclass
+class CrawlRequest:
+    """
+    One URL in the frontier.
+
+    Higher priority is fetched first; requests of equal priority are
+    fetched in the order they were added. meta carries whatever the
+    handler needs (page number, search parameters, payload options).
+    """
+    url: str
+    priority: int = 0
+    depth: int = 0
+    meta: Dict[str, Any] = field(default_factory=dict)
+    key: str = ""
+
+    @property
+    def host(self) -> str:
+        return url_host(self.url)
+
+
+@dataclass
+class CrawlResult:
+    """Outcome of one request: the handler's records or the error it raised."""
+    request: CrawlRequest
+    records: List[Dict] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Host:
+    """Pending requests and politeness state of one host."""
+
+    def __init__(self):
+        self.pending: List = []
+        self.in_flight = 0
+        self.next_start = 0.0
+
+
+class Frontier:
+    """
+    Thread-safe priority frontier with per-host politeness and dedup.
+
+    Example:
+        frontier = Frontier(per_host=2, max_depth=3)
+        frontier.add("http://quotes.toscrape.com/page/1/")
+        while (request := frontier.get()) is not None:
+            try:
+                ...fetch, then frontier.add(next_url, depth=request.depth + 1)
+            finally:
+                frontier.done(request)
+
+    Args:
+        per_host (int): Maximum requests in flight per host
+        max_depth (int): Requests deeper than this are dropped (None: no limit)
+        max_requests (int): Maximum number of requests accepted (None: no limit)
+        rate_paced (bool): Space requests to a host by its adaptive limiter's
+            current rate
+        key (callable): Dedup key of a URL (default: canonicalize_url)
+    """
+
+    def __init__(self, per_host: int = FRONTIER_CONFIG["per_host"],
+                 max_depth: Optional[int] = FRONTIER_CONFIG["max_depth"],
+                 max_requests: Optional[int] = FRONTIER_CONFIG["max_requests"],
+                 rate_paced: bool = True, key: Callable[[str], str] = canonicalize_url):
+        if per_host < 1:
+            raise ValueError("per_host must be at least 1")
+        self.per_host = per_host
+        self.max_depth = max_depth
+        self.max_requests = max_requests
+        self.rate_paced = rate_paced
+        self.key = key
+        self.stats = {"added": 0, "duplicates": 0, "too_deep": 0, "over_limit": 0, "done": 0}
+        self._seen = set()
+        self._hosts: Dict[str, _Host] = {}
+        self._order = itertools.count()
+        self._pending = 0
+        self._in_flight = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def add(self, url: str, priority: int = 0, depth: int = 0, dedup_key: Optional[str] = None,
+            **meta) -> bool:
+        """
+        Enqueue a URL unless it was seen before or is over the limits.
+
+        Args:
+            url (str): URL to fetch (kept as given; only the key is canonical)
+            priority (int): Higher is fetched sooner
+            depth (int): Link distance from the seeds
+            dedup_key (str): Key to deduplicate on instead of the canonical URL,
+                e.g. when several requests share one URL but differ in payload
+            **meta: Stored on the CrawlRequest for the handler
+
+        Returns:
+            bool: True when the URL was enqueued
+        """
+        key = dedup_key if dedup_key is not None else self.key(url)
+        with self._condition:
+            if key in self._seen:
+                self.stats["duplicates"] += 1
+                return False
+            if self.max_depth is not None and depth > self.max_depth:
+                self.stats["too_deep"] += 1
+                return False
+            if self.max_requests is not None and self.stats["added"] >= self.max_requests:
+                self.stats["over_limit"] += 1
+                return False
+            self._seen.add(key)
+            request = CrawlRequest(url, priority, depth, meta, key)
+            host = self._hosts.setdefault(request.host, _Host())
+            heapq.heappush(host.pending, (-priority, next(self._order), request))
+            self._pending += 1
+            self.stats["added"] += 1
+            self._condition.notify_all()
+            return True
+
+    def seen(self, url: str) -> bool:
+        """True when the URL (by its dedup key) was already added."""
+        with self._condition:
+            return self.key(url) in self._seen
+
+    def get(self, timeout: Optional[float] = None) -> Optional[CrawlRequest]:
+        """
+        Take the highest-priority request whose host may be contacted now.
+
+        Blocks while every host with pending requests is at its in-flight
+        cap or not yet due. Call done() once the request is handled.
+
+        Returns:
+            CrawlRequest, or None when the crawl is finished (nothing pending
+            and nothing in flight that could add more), the frontier was
+            closed or the timeout expired
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                if self._closed or (self._pending == 0 and self._in_flight == 0):
+                    return None
+                now = time.monotonic()
+                request, wake_at = self._pop_ready(now)
+                if request is not None:
+                    return request
+                if deadline is not None:
+                    if now >= deadline:
+                        return None
+                    wake_at = min(wake_at, deadline) if wake_at is not None else deadline
+                self._condition.wait(wake_at - now if wake_at is not None else None)
+
+    def _pop_ready(self, now: float):
+        """Pop the best ready request; otherwise return when a host becomes due."""
+        best_name, best_entry, wake_at = None, None, None
+        for name, host in self._hosts.items():
+            if not host.pending or host.in_flight >= self.per_host:
+                continue
+            if host.next_start > now:
+                wake_at = host.next_start if wake_at is None else min(wake_at, host.next_start)
+                continue
+            entry = host.pending[0]
+            if best_entry is None or entry[:2] < best_entry[:2]:
+                best_name, best_entry = name, entry
+        if best_entry is None:
+            return None, wake_at
+
+        host = self._hosts[best_name]
+        heapq.heappop(host.pending)
+        host.in_flight += 1
+        request = best_entry[2]
+        if self.rate_paced:
+            host.next_start = now + 1.0 / domain_limiter(request.url).rate
+        self._pending -= 1
+        self._in_flight += 1
+        return request, None
+
+    def done(self, request: CrawlRequest):
+        """Release the request's host slot."""
+        with self._condition:
+            self._hosts[request.host].in_flight -= 1
+            self._in_flight -= 1
+            self.stats["done"] += 1
+            self._condition.notify_all()
+
+    def close(self):
+        """Stop handing out requests; pending ones are dropped."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self._pending
+
+    @property
+    def in_flight(self) -> int:
+        with self._condition:
+            return self._in_flight
+
+
+def crawl(frontier: Frontier, handler: Callable[[CrawlRequest], Optional[List[Dict]]],
+          workers: int = FRONTIER_CONFIG["workers"]) -> Iterator[CrawlResult]:
+    """
+    Drain a frontier with a pool of fetch worker threads.
+
+    The handler fetches and parses one request, adds any URLs it discovers
+    to the frontier (frontier.add(url, depth=request.depth + 1)) and returns
+    the page's records. The crawl ends when the frontier is empty and no
+    handler is still running. Closing the generator early closes the
+    frontier; requests already started still finish in the background.
+
+    Example:
+        for result in crawl(frontier, handle_page, workers=8):
+            if result.ok:
+                writer.write_many(result.records)
+
+    Args:
+        frontier (Frontier): Frontier holding the seed URLs
+        handler (callable): handler(request) -> records; called from worker threads
+        workers (int): Number of fetch workers
+
+    Yields:
+        CrawlResult: One per request, in completion order
+    """
+    results: queue.Queue = queue.Queue()
+    done = object()
+
+    def work():
+        try:
+            while True:
+                request = frontier.get()
+                if request is None:
+                    break
+                try:
+                    results.put(CrawlResult(request, handler(request) or []))
+                except Exception as e:
+                    results.put(CrawlResult(request, error=e))
+                finally:
+                    frontier.done(request)
+        finally:
+            results.put(done)
+
+    threads = [threading.Thread(target=work, name=f"crawl-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+
+    try:
+        running = len(threads)
+        while running:
+            item = results.get()
+            if item is done:
+                running -= 1
+            else:
+                yield item
+    finally:
+        frontier.close()
@@ -0,0 +1,99 @@
+"""
+JSON codec.
+Decodes API responses and encodes saved output with orjson or ujson when
+installed, falling back to the stdlib json module. Output matches the stdlib
+with ensure_ascii=False: non-ASCII text is written as-is.
+
+Set JSON_BACKEND to "orjson", "ujson" or "json" to choose explicitly.
+Output is compact unless indent=True is passed: indenting is several times
+slower on every backend (see python benchmark.py --json).
+"""
+
+import json
+import os
+from typing import IO, Any, List, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKEND_PREFERENCE = ("orjson", "ujson", "json")
+
+
+def installed_backends() -> List[str]:
+    """Installed backends, fastest first."""
+    installed = {"orjson": orjson is not None, "ujson": ujson is not None, "json": True}
+    return [name for name in BACKEND_PREFERENCE if installed[name]]
+
+
+def _select_backend() -> str:
+    requested = os.getenv("JSON_BACKEND")
+    installed = {"orjson": orjson is not None, "ujson": ujson is not None, "json": True}
+    if requested:
+        if requested not in installed:
+            raise ValueError(f"Unknown JSON backend: {requested}")
+        if not installed[requested]:
+            raise ImportError(f"{requested} is not installed. Please run: pip install {requested}")
+        return requested
+    return next(name for name in BACKEND_PREFERENCE if installed[name])
+
+
+BACKEND = _select_backend()
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    """Decode JSON from str or bytes (bytes are parsed without a str copy on orjson)."""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    if BACKEND == "ujson":
+        return ujson.loads(bytes(data) if isinstance(data, memoryview) else data)
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any, indent: bool) -> str:
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def dumpb(obj: Any, indent: bool = False) -> bytes:
+    """
+    Encode obj as UTF-8 JSON bytes.
+
+    Args:
+        obj: JSON-serializable value
+        indent (bool): Pretty-print with two-space indentation
+
+    Returns:
+        bytes: Compact JSON, or indented JSON when indent is set
+    """
+    if BACKEND == "orjson":
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass  # non-str keys or out-of-range ints: let the stdlib handle them
+    elif BACKEND == "ujson":
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False,
+                           indent=2 if indent else 0).encode("utf-8")
+    return _stdlib_dumps(obj, indent).encode("utf-8")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """Encode obj as JSON text; see dumpb()."""
+    if BACKEND == "json":
+        return _stdlib_dumps(obj, indent)
+    return dumpb(obj, indent).decode("utf-8")
+
+
+def dump(obj: Any, fp: IO, indent: bool = False):
+    """Write obj to a text or binary file object; compact unless indent is set."""
+    if "b" in getattr(fp, "mode", ""):
+        fp.write(dumpb(obj, indent))
+    else:
+        fp.write(dumps(obj, indent))
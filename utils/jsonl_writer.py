@@ -0,0 +1,115 @@
+"""
+Streaming JSON Lines output.
+Appends one compact JSON record per line as pages are extracted, so a crawl
+keeps constant memory and leaves partial output behind if it dies. A final
+{"metadata": {...}} line summarises the run.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from utils import json_codec
+
+
+def output_path(filename: str, directory: str = "responses") -> str:
+    """Place a bare filename in the responses directory, creating it if needed."""
+    os.makedirs(directory, exist_ok=True)
+    if not filename.startswith(f"{directory}/"):
+        filename = os.path.join(directory, filename)
+    return filename
+
+
+class JsonlWriter:
+    """
+    Write records as JSON Lines with periodic flushing.
+
+    Example:
+        with JsonlWriter("quotes_pagination.jsonl") as writer:
+            writer.write_many(quotes)
+
+    Args:
+        filename (str): Output file, placed in responses/ unless already there
+        flush_every (int): Flush to disk after this many records
+        metadata (dict): Extra fields for the trailing metadata record
+    """
+
+    def __init__(self, filename: str, flush_every: int = 50, metadata: Optional[Dict] = None):
+        self.filename = output_path(filename)
+        self.flush_every = flush_every
+        self.metadata = dict(metadata or {})
+        self.count = 0
+        self._unflushed = 0
+        self._file = open(self.filename, "w", encoding="utf-8")
+
+    def write(self, record: Dict):
+        self._file.write(json_codec.dumps(record))
+        self._file.write("\n")
+        self.count += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self.flush()
+
+    def write_many(self, records: Iterable[Dict]):
+        for record in records:
+            self.write(record)
+        self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+
+    def close(self, **summary):
+        """Write the trailing metadata record and close the file."""
+        if self._file.closed:
+            return
+        metadata = {
+            **self.metadata,
+            **summary,
+            "count": self.count,
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        self._file.write(json_codec.dumps({"metadata": metadata}))
+        self._file.write("\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.close(error=f"{exc_type.__name__}: {exc}")
+        else:
+            self.close()
+
+
+def write_jsonl(records: Iterable[Dict], filename: str, **metadata) -> str:
+    """
+    Write records to a JSON Lines file in one call.
+
+    Returns:
+        str: Path of the written file
+    """
+    with JsonlWriter(filename, metadata=metadata) as writer:
+        writer.write_many(records)
+    return writer.filename
+
+
+def read_jsonl(filename: str) -> Tuple[List[Dict], Optional[Dict]]:
+    """
+    Read a JSON Lines file written by JsonlWriter.
+
+    Returns:
+        tuple: (records, metadata); metadata is None if the run did not finish
+    """
+    records, metadata = [], None
+    with open(filename, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json_codec.loads(line)
+            if len(record) == 1 and "metadata" in record:
+                metadata = record["metadata"]
+            else:
+                records.append(record)
+    return records, metadata
@@ -0,0 +1,233 @@
+"""
+Per-request latency instrumentation.
+The clients record one RequestTiming per API attempt: phase durations
+(connect, time to first byte, body download, JSON decode, and parse when the
+scraper reports it), payload and response sizes, and status. Only the async
+client sees connection setup separately; on the requests-based clients ttfb
+includes it and new_connection marks the attempts that opened a connection.
+The recorder aggregates them into p50/p95/p99 summaries per scraper and
+target domain and exports them as JSON or as a Prometheus textfile.
+
+Set ZYTE_METRICS_DIR to write latency_<scraper>.json and
+latency_<scraper>.prom there when the process exits.
+"""
+
+import atexit
+import math
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from utils import json_codec
+from utils.config import METRICS_DIR
+
+PHASES = ("connect", "ttfb", "download", "decode", "parse", "total")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def default_scraper_name() -> str:
+    """Name of the running script, e.g. "02_pagination_classic"."""
+    if not sys.argv or sys.argv[0] in ("", "-c", "-m"):
+        return "python"
+    return Path(sys.argv[0]).stem
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(1, math.ceil(q * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def summarize(values: Iterable[float], quantiles: Sequence[float] = QUANTILES) -> Dict:
+    """Count, sum, mean, max and percentiles of a list of samples."""
+    values = sorted(values)
+    if not values:
+        return {"count": 0}
+    summary = {
+        "count": len(values),
+        "sum": round(sum(values), 6),
+        "mean": round(sum(values) / len(values), 6),
+        "max": round(values[-1], 6)
+    }
+    for q in quantiles:
+        summary[f"p{int(q * 100)}"] = round(percentile(values, q), 6)
+    return summary
+
+
+@dataclass
+class RequestTiming:
+    """Phase durations (seconds) and sizes of one API attempt."""
+    scraper: str
+    domain: str
+    status: int
+    payload_bytes: int = 0
+    response_bytes: int = 0
+    new_connection: Optional[bool] = None
+    phases: Dict[str, float] = field(default_factory=dict)
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+
+class LatencyRecorder:
+    """
+    Thread-safe store of request timings with percentile summaries.
+
+    Keeps at most max_samples timings per (scraper, domain) group by
+    reservoir sampling, so long crawls use bounded memory.
+
+    Args:
+        max_samples (int): Timings kept per group
+    """
+
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[Tuple[str, str], List[RequestTiming]] = {}
+        self._seen: Dict[Tuple[str, str], int] = {}
+        self.scraper = default_scraper_name()
+
+    def start(self, url: Optional[str], status: int = 0, scraper: Optional[str] = None) -> RequestTiming:
+        """Create a timing for a request to url; call record() once it is filled in."""
+        domain = urlparse(url or "").hostname or "unknown"
+        return RequestTiming(scraper or self.scraper, domain, status)
+
+    def record(self, timing: RequestTiming):
+        key = (timing.scraper, timing.domain)
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            seen = self._seen.get(key, 0) + 1
+            self._seen[key] = seen
+            if len(samples) < self.max_samples:
+                samples.append(timing)
+            else:
+                slot = random.randrange(seen)
+                if slot < self.max_samples:
+                    samples[slot] = timing
+
+    def summary(self) -> Dict:
+        """
+        Aggregate recorded timings.
+
+        Returns:
+            dict: {scraper: {domain: {"requests", "statuses", "phases", "payload_bytes", "response_bytes"}}}
+        """
+        with self._lock:
+            groups = {key: list(samples) for key, samples in self._samples.items()}
+            seen = dict(self._seen)
+
+        result: Dict[str, Dict] = {}
+        for (scraper, domain), samples in sorted(groups.items()):
+            statuses: Dict[str, int] = {}
+            for timing in samples:
+                statuses[str(timing.status)] = statuses.get(str(timing.status), 0) + 1
+            phases = {
+                phase: summarize(t.phases[phase] for t in samples if phase in t.phases)
+                for phase in PHASES
+            }
+            new_connections = [t.new_connection for t in samples if t.new_connection is not None]
+            result.setdefault(scraper, {})[domain] = {
+                "requests": seen[(scraper, domain)],
+                "statuses": statuses,
+                "new_connections": sum(new_connections) if new_connections else None,
+                "phases": {phase: stats for phase, stats in phases.items() if stats["count"]},
+                "payload_bytes": summarize(t.payload_bytes for t in samples),
+                "response_bytes": summarize(t.response_bytes for t in samples)
+            }
+        return result
+
+    def to_json(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json_codec.dump(self.summary(), f)
+        return path
+
+    def to_prometheus(self, path: str) -> str:
+        """Write a node_exporter textfile-collector file with summary metrics."""
+        lines = [
+            "# HELP zyte_request_phase_seconds Zyte API request phase durations",
+            "# TYPE zyte_request_phase_seconds summary",
+        ]
+        size_lines = [
+            "# HELP zyte_request_bytes Zyte API payload and response sizes",
+            "# TYPE zyte_request_bytes summary",
+        ]
+        status_lines = [
+            "# HELP zyte_requests_total Zyte API attempts by status",
+            "# TYPE zyte_requests_total counter",
+        ]
+        for scraper, domains in self.summary().items():
+            for domain, stats in domains.items():
+                base = f'scraper="{scraper}",domain="{domain}"'
+                for phase, summary in stats["phases"].items():
+                    labels = f'{base},phase="{phase}"'
+                    for q in QUANTILES:
+                        lines.append(f'zyte_request_phase_seconds{{{labels},quantile="{q}"}} '
+                                     f'{summary[f"p{int(q * 100)}"]}')
+                    lines.append(f"zyte_request_phase_seconds_sum{{{labels}}} {summary['sum']}")
+                    lines.append(f"zyte_request_phase_seconds_count{{{labels}}} {summary['count']}")
+                for direction in ("payload", "response"):
+                    summary = stats[f"{direction}_bytes"]
+                    labels = f'{base},direction="{direction}"'
+                    for q in QUANTILES:
+                        size_lines.append(f'zyte_request_bytes{{{labels},quantile="{q}"}} '
+                                          f'{summary[f"p{int(q * 100)}"]}')
+                    size_lines.append(f"zyte_request_bytes_sum{{{labels}}} {summary['sum']}")
+                    size_lines.append(f"zyte_request_bytes_count{{{labels}}} {summary['count']}")
+                for status, count in stats["statuses"].items():
+                    status_lines.append(f'zyte_requests_total{{{base},status="{status}"}} {count}')
+
+        # Write then rename so the collector never reads a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines + size_lines + status_lines) + "\n")
+        os.replace(tmp_path, path)
+        return path
+
+    def export(self, directory: str) -> List[str]:
+        """Write latency_<scraper>.json and .prom into directory."""
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"latency_{self.scraper}")
+        return [self.to_json(f"{base}.json"), self.to_prometheus(f"{base}.prom")]
+
+
+_recorder = LatencyRecorder()
+
+
+def get_recorder() -> LatencyRecorder:
+    """Return the process-wide recorder the clients write to."""
+    return _recorder
+
+
+@contextmanager
+def timed_phase(timing: Optional[RequestTiming], phase: str):
+    """
+    Add the duration of the block to a phase of a request timing.
+
+    Example:
+        response = get_client().post(payload)
+        with timed_phase(response.timing, "parse"):
+            quotes = extract_quotes(response.json()["browserHtml"])
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timing is not None:
+            timing.add(phase, time.perf_counter() - start)
+
+
+def _export_at_exit():
+    if METRICS_DIR and any(_recorder.summary().values()):
+        _recorder.export(METRICS_DIR)
+
+
+atexit.register(_export_at_exit)
@@ -0,0 +1,210 @@
+"""
+Crawl metrics registry.
+Collects counters, gauges, timers and errors for one scraper run and derives
+the numbers used to compare runs: time to first record, overall and
+steady-state throughput (records after the first batch, over the time since
+it arrived) and errors by type.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Union
+
+from utils.latency import summarize
+
+
+class MetricsRegistry:
+    """
+    Thread-safe metrics for one crawl.
+
+    Example:
+        metrics = MetricsRegistry()
+        with metrics.timer("fetch"), metrics.busy("fetching"):
+            page = fetch(url)
+        metrics.records(len(page["items"]))
+        metrics.incr("pages")
+        metrics.finish()
+        print(metrics.to_dict())
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.timers: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.busy_seconds: Dict[str, float] = {}
+        self._busy_open: Dict[str, List[float]] = {}
+        self.record_count = 0
+        self.first_record_at: Optional[float] = None
+        self.first_batch = 0
+        self.last_record_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        with self._lock:
+            self.timers.setdefault(name, []).append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Observe the duration of the block under name, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    @contextmanager
+    def busy(self, name: str):
+        """
+        Add the wall-clock time during which at least one block under name
+        runs to busy_seconds[name]; overlapping blocks (concurrent requests)
+        count once.
+        """
+        with self._lock:
+            active = self._busy_open.setdefault(name, [0, 0.0])
+            if active[0] == 0:
+                active[1] = time.perf_counter()
+            active[0] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                active[0] -= 1
+                if active[0] == 0:
+                    self.busy_seconds[name] = (self.busy_seconds.get(name, 0.0)
+                                               + time.perf_counter() - active[1])
+
+    def error(self, error: Union[BaseException, str]):
+        """Count an error under its exception type name (or the given label)."""
+        kind = error if isinstance(error, str) else type(error).__name__
+        with self._lock:
+            self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def records(self, count: int = 1):
+        """Count records emitted now."""
+        if count <= 0:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            if self.first_record_at is None:
+                self.first_record_at = now
+                self.first_batch = count
+            self.last_record_at = now
+            self.record_count += count
+
+    def finish(self):
+        """Stop the clock; durations and rates are frozen from here on."""
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+
+    @property
+    def duration(self) -> float:
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return end - self.start_time
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    @property
+    def time_to_first_record(self) -> Optional[float]:
+        if self.first_record_at is None:
+            return None
+        return self.first_record_at - self.start_time
+
+    @property
+    def records_per_second(self) -> float:
+        duration = self.duration
+        return self.record_count / duration if duration > 0 else 0.0
+
+    @property
+    def steady_records_per_second(self) -> Optional[float]:
+        """Throughput once records flow: None until a second batch arrives."""
+        if self.first_record_at is None or self.last_record_at == self.first_record_at:
+            return None
+        return (self.record_count - self.first_batch) / (self.last_record_at - self.first_record_at)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            timers = {name: summarize(samples) for name, samples in self.timers.items()}
+            errors = dict(self.errors)
+            busy = {name: round(seconds, 2) for name, seconds in self.busy_seconds.items()}
+
+        first_record = self.time_to_first_record
+        steady = self.steady_records_per_second
+        return {
+            "records": self.record_count,
+            "duration_seconds": round(self.duration, 2),
+            "time_to_first_record": round(first_record, 3) if first_record is not None else None,
+            "records_per_second": round(self.records_per_second, 2),
+            "steady_records_per_second": round(steady, 2) if steady is not None else None,
+            "errors": sum(errors.values()),
+            "errors_by_type": errors,
+            "counters": counters,
+            "gauges": gauges,
+            "timers": timers,
+            "busy_seconds": busy
+        }
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if abs(value) < 1 else f"{value:.2f}"
+    return str(value)
+
+
+def print_metrics_table(runs: Dict[str, Dict], timers: Optional[List[str]] = None):
+    """
+    Print MetricsRegistry.to_dict() results side by side, one column per run.
+
+    Args:
+        runs (dict): Run label -> to_dict() output
+        timers (list): Timer names to show p50/p95 for (default: all)
+    """
+    labels = list(runs)
+    rows = [
+        ("Records", "records"),
+        ("Duration (s)", "duration_seconds"),
+        ("Time to first record (s)", "time_to_first_record"),
+        ("Records/sec", "records_per_second"),
+        ("Steady records/sec", "steady_records_per_second"),
+        ("Errors", "errors"),
+    ]
+    lines = [(title, [runs[label].get(key) for label in labels]) for title, key in rows]
+
+    for kind in ("counters", "gauges"):
+        names = sorted({name for run in runs.values() for name in run.get(kind, {})})
+        for name in names:
+            lines.append((name, [runs[label].get(kind, {}).get(name) for label in labels]))
+
+    timer_names = timers if timers is not None else sorted(
+        {name for run in runs.values() for name in run.get("timers", {})}
+    )
+    for name in timer_names:
+        for stat in ("p50", "p95"):
+            lines.append((f"{name} {stat} (s)",
+                          [runs[label].get("timers", {}).get(name, {}).get(stat) for label in labels]))
+
+    error_types = sorted({kind for run in runs.values() for kind in run.get("errors_by_type", {})})
+    for kind in error_types:
+        lines.append((f"  {kind}", [runs[label].get("errors_by_type", {}).get(kind, 0) for label in labels]))
+
+    width = max(len(title) for title, _ in lines) + 2
+    print(f"{'':{width}s}" + "".join(f"{label:>14s}" for label in labels))
+    for title, values in lines:
+        print(f"{title:{width}s}" + "".join(f"{_format_value(value):>14s}" for value in values))
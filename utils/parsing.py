@@ -0,0 +1,261 @@
+"""
+Pluggable HTML parsing.
+One CSS-selection API over interchangeable backends, so extractors can run on
+the fastest parser installed:
+
+- "selectolax": selectolax (lexbor engine), if installed
+- "lxml": lxml with cssselect, selectors compiled to XPath once and cached
+- "html.parser": BeautifulSoup with the pure-Python parser
+
+parse_html() picks the fastest available backend unless one is requested or
+set with the HTML_PARSER_BACKEND environment variable. extract_page() runs an
+extractor and pagination-link discovery over a single parsed tree.
+"""
+
+import abc
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml.html
+    from lxml import etree
+    from cssselect import HTMLTranslator
+except ImportError:
+    lxml = None
+
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+BACKEND_PREFERENCE = ("selectolax", "lxml", "html.parser")
+
+
+def available_backends() -> List[str]:
+    """Return installed backends, fastest first."""
+    installed = {
+        "selectolax": LexborHTMLParser is not None,
+        "lxml": lxml is not None,
+        "html.parser": BeautifulSoup is not None,
+    }
+    return [name for name in BACKEND_PREFERENCE if installed[name]]
+
+
+def default_backend() -> str:
+    """Return HTML_PARSER_BACKEND if set, else the fastest installed backend."""
+    requested = os.getenv("HTML_PARSER_BACKEND")
+    if requested:
+        return requested
+    backends = available_backends()
+    if not backends:
+        raise ImportError("No HTML parser installed. Please run: pip install lxml")
+    return backends[0]
+
+
+class Node(abc.ABC):
+    """
+    Element wrapper shared by all backends.
+
+    Methods:
+        css(selector): All matching descendants
+        css_first(selector): First matching descendant or None
+        css_text(selector), css_attr(selector, name): Shortcuts for the first match
+        text(deep=True): Stripped text content; deep=False gives own text only
+        attr(name, default=None): Attribute value
+    """
+
+    @abc.abstractmethod
+    def css(self, selector: str) -> List["Node"]:
+        ...
+
+    def css_first(self, selector: str) -> Optional["Node"]:
+        matches = self.css(selector)
+        return matches[0] if matches else None
+
+    @abc.abstractmethod
+    def text(self, deep: bool = True) -> str:
+        ...
+
+    @abc.abstractmethod
+    def attr(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        ...
+
+    def css_text(self, selector: str, default: Optional[str] = None, deep: bool = True) -> Optional[str]:
+        """Text of the first match, or default if nothing matches."""
+        node = self.css_first(selector)
+        return node.text(deep) if node is not None else default
+
+    def css_attr(self, selector: str, name: str, default: Optional[str] = None) -> Optional[str]:
+        """Attribute of the first match, or default if nothing matches."""
+        node = self.css_first(selector)
+        value = node.attr(name) if node is not None else None
+        return default if value is None else value
+
+    def __getitem__(self, name: str) -> str:
+        value = self.attr(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+
+class _SoupNode(Node):
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def css(self, selector):
+        return [_SoupNode(e) for e in self.element.select(selector)]
+
+    def css_first(self, selector):
+        element = self.element.select_one(selector)
+        return _SoupNode(element) if element is not None else None
+
+    def text(self, deep=True):
+        if deep:
+            return self.element.get_text().strip()
+        return "".join(self.element.find_all(string=True, recursive=False)).strip()
+
+    def attr(self, name, default=None):
+        value = self.element.get(name, default)
+        if isinstance(value, list):
+            return " ".join(value)
+        return value
+
+
+@lru_cache(maxsize=512)
+def _compiled_xpath(selector: str):
+    """Translate a CSS selector to a compiled XPath, once per selector."""
+    return etree.XPath(HTMLTranslator().css_to_xpath(selector))
+
+
+def precompile(selectors: Iterable[str]):
+    """Compile CSS selectors ahead of time for backends that support it (lxml)."""
+    if lxml is not None:
+        for selector in selectors:
+            _compiled_xpath(selector)
+
+
+class _LxmlNode(Node):
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def css(self, selector):
+        return [_LxmlNode(e) for e in _compiled_xpath(selector)(self.element)]
+
+    def text(self, deep=True):
+        if deep:
+            return self.element.text_content().strip()
+        parts = [self.element.text or ""]
+        parts.extend(child.tail or "" for child in self.element)
+        return "".join(parts).strip()
+
+    def attr(self, name, default=None):
+        return self.element.get(name, default)
+
+
+class _LexborNode(Node):
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def css(self, selector):
+        return [_LexborNode(e) for e in self.element.css(selector)]
+
+    def css_first(self, selector):
+        element = self.element.css_first(selector)
+        return _LexborNode(element) if element is not None else None
+
+    def text(self, deep=True):
+        return (self.element.text(deep=deep) or "").strip()
+
+    def attr(self, name, default=None):
+        value = self.element.attributes.get(name, default)
+        return default if value is None else value
+
+
+def parse_html(html: str, backend: Optional[str] = None) -> Node:
+    """
+    Parse an HTML document with the chosen backend.
+
+    Args:
+        html (str): HTML content to parse
+        backend (str): "selectolax", "lxml" or "html.parser" (default: fastest installed)
+
+    Returns:
+        Node: Document root
+    """
+    backend = backend or default_backend()
+
+    if backend == "selectolax":
+        if LexborHTMLParser is None:
+            raise ImportError("selectolax is not installed. Please run: pip install selectolax")
+        return _LexborNode(LexborHTMLParser(html).root)
+
+    if backend == "lxml":
+        if lxml is None:
+            raise ImportError("lxml is not installed. Please run: pip install lxml cssselect")
+        if not html.strip():
+            return _LxmlNode(lxml.html.Element("html"))
+        return _LxmlNode(lxml.html.document_fromstring(html))
+
+    if backend == "html.parser":
+        if BeautifulSoup is None:
+            raise ImportError("beautifulsoup4 is not installed. Please run: pip install beautifulsoup4")
+        return _SoupNode(BeautifulSoup(html, "html.parser"))
+
+    raise ValueError(f"Unknown HTML parser backend: {backend}")
+
+
+@dataclass
+class PageExtraction:
+    """Records and pagination links found in one parsed page."""
+    records: List[Dict]
+    next_url: Optional[str] = None
+    links: List[str] = field(default_factory=list)
+
+
+def extract_page(html: str, extract: Callable[[Node], List[Dict]],
+                 next_selector: Optional[str] = None, links_selector: Optional[str] = None,
+                 base_url: Optional[str] = None, backend: Optional[str] = None) -> PageExtraction:
+    """
+    Parse a page once and collect both its records and its pagination links.
+
+    Args:
+        html (str): HTML content to parse
+        extract (callable): Takes the document Node and returns the page's records
+        next_selector (str): CSS selector of the "next page" link
+        links_selector (str): CSS selector of other pagination links to collect
+        base_url (str): Resolves relative hrefs
+        backend (str): HTML parser backend (default: fastest installed)
+
+    Returns:
+        PageExtraction: Records, absolute next-page URL and pagination links
+    """
+    document = parse_html(html, backend)
+
+    def absolute(href: str) -> str:
+        return urljoin(base_url, href) if base_url else href
+
+    next_url = document.css_attr(next_selector, "href") if next_selector else None
+    links = []
+    if links_selector:
+        hrefs = (node.attr("href") for node in document.css(links_selector))
+        links = [absolute(href) for href in dict.fromkeys(hrefs) if href]
+
+    return PageExtraction(
+        records=extract(document),
+        next_url=absolute(next_url) if next_url else None,
+        links=links
+    )
@@ -0,0 +1,183 @@
+"""
+Fetch/parse pipeline.
+Downloads pages with the async client on a background thread and hands each
+response to a pool of worker processes running the extractor, so parsing
+uses every core while further downloads are still in flight. Parsed pages
+stream back through a queue in completion order; at most max_pending pages
+are parsing or waiting to be consumed at any time.
+
+Worker processes are all started from the calling thread before the
+producer thread and its event loop exist, so no worker is forked from a
+thread running an event loop.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from utils.config import CACHE_CONFIG
+from utils.async_client import AsyncZyteClient, BatchResult
+from utils.client import default_cache
+from utils.render_mode import response_html
+
+_DONE = object()
+
+FETCH = "fetch"
+PARSE = "parse"
+
+
+@dataclass
+class ParsedPage:
+    """
+    Outcome of one payload: extracted records or the error, with the stage
+    (FETCH or PARSE) it failed at. Fetch errors also reach on_fetch; parse
+    errors are only reported here.
+    """
+    index: int
+    payload: Dict
+    records: Optional[List[Dict]] = None
+    error: Optional[Exception] = None
+    stage: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _ProducerError:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def _fetch(payloads: List[Dict], parse: Callable[[str], List[Dict]],
+                 pool: ProcessPoolExecutor, slots: threading.Semaphore,
+                 output: queue.Queue, stopping: threading.Event,
+                 concurrency: int, timeout: Optional[float], field: str,
+                 on_fetch: Optional[Callable[[BatchResult], None]],
+                 prefetched: Optional[Callable[[Dict], Optional[Dict]]]):
+    loop = asyncio.get_running_loop()
+    parsing: List[Future] = []
+
+    ready, to_fetch = [], []
+    for index, payload in enumerate(payloads):
+        data = prefetched(payload) if prefetched else None
+        if data is not None:
+            ready.append(BatchResult(index, payload, data=data))
+        else:
+            to_fetch.append((index, payload))
+
+    def deliver(result: BatchResult, future: Future):
+        try:
+            output.put(ParsedPage(result.index, result.payload, records=future.result()))
+        except Exception as e:
+            output.put(ParsedPage(result.index, result.payload, error=e, stage=PARSE))
+
+    async with AsyncZyteClient(concurrency=concurrency, cache=default_cache(),
+                               bypass_cache=CACHE_CONFIG["bypass"]) as client:
+        async def results():
+            for result in ready:
+                yield result
+            async for result in client.extract_many([p for _, p in to_fetch], timeout=timeout):
+                result.index = to_fetch[result.index][0]
+                yield result
+
+        async for result in results():
+            if on_fetch:
+                on_fetch(result)
+
+            # Wait for the consumer to free a slot before parsing more pages
+            await loop.run_in_executor(None, slots.acquire)
+            if stopping.is_set():
+                break
+
+            html = response_html(result.data, field) if result.ok else None
+            if not result.ok:
+                output.put(ParsedPage(result.index, result.payload, error=result.error, stage=FETCH))
+            elif not html:
+                output.put(ParsedPage(result.index, result.payload,
+                                      error=ValueError(f"No {field} in response"), stage=PARSE))
+            else:
+                future = pool.submit(parse, html)
+                future.add_done_callback(lambda f, result=result: deliver(result, f))
+                parsing.append(future)
+
+    await loop.run_in_executor(None, wait, parsing)
+
+
+def parse_pipeline(payloads: Iterable[Dict], parse: Callable[[str], List[Dict]],
+                   concurrency: int = 10, workers: Optional[int] = None,
+                   max_pending: Optional[int] = None, timeout: Optional[float] = None,
+                   field: str = "browserHtml",
+                   on_fetch: Optional[Callable[[BatchResult], None]] = None,
+                   prefetched: Optional[Callable[[Dict], Optional[Dict]]] = None) -> Iterator[ParsedPage]:
+    """
+    Fetch payloads concurrently and parse responses in worker processes.
+
+    parse must be picklable: a module-level function, or functools.partial
+    of one, taking the HTML string and returning a list of records.
+
+    Example:
+        for page in parse_pipeline(payloads, extract_quotes, workers=4):
+            if page.ok:
+                writer.write_many(page.records)
+
+    Args:
+        payloads (iterable): Zyte API request payloads
+        parse (callable): Extractor run in the worker processes
+        concurrency (int): Maximum number of requests in flight
+        workers (int): Parser processes (default: CPU count, but no more
+            than there are payloads)
+        max_pending (int): Pages parsed or parsing but not yet consumed
+            (default: twice the worker count); downloads keep going
+        timeout (float): HTTP timeout in seconds per request
+        field (str): Response field holding the HTML (a decoded
+            httpResponseBody is used when it is missing)
+        on_fetch (callable): Called with each BatchResult as it downloads
+        prefetched (callable): Returns an already fetched response for a
+            payload (e.g. RenderModeSelector.pop_probed), parsed without
+            another request; None means fetch it
+
+    Yields:
+        ParsedPage: Records tagged with the payload's position in the input
+    """
+    payloads = list(payloads)
+    # Every worker is started up front, so don't start more than there are pages
+    workers = workers or max(1, min(len(payloads), os.cpu_count() or 1))
+    max_pending = max_pending or 2 * workers
+
+    slots = threading.Semaphore(max_pending)
+    output: queue.Queue = queue.Queue()
+    stopping = threading.Event()
+    pool = ProcessPoolExecutor(max_workers=workers)
+    # The first submit starts the workers (all of them with fork); do it here,
+    # not lazily from the producer thread while its event loop runs
+    pool.submit(int).result()
+
+    def produce():
+        try:
+            asyncio.run(_fetch(payloads, parse, pool, slots, output, stopping,
+                               concurrency, timeout, field, on_fetch, prefetched))
+        except BaseException as e:
+            output.put(_ProducerError(e))
+        else:
+            output.put(_DONE)
+
+    producer = threading.Thread(target=produce, name="parse-pipeline", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = output.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _ProducerError):
+                raise item.error
+            slots.release()
+            yield item
+    finally:
+        stopping.set()
+        slots.release(len(payloads) + 1)
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,154 @@
+"""
+Speculative pagination.
+Following a Next link is strictly serial: the URL of page N+1 is known only
+once page N is back and parsed. Most paginated listings number their pages
+predictably (/page/N/, &start=10*N), so once the first two pages reveal the
+template the next pages can be fetched ahead, in parallel. Every prefetched
+page is only used when the Next link of the page before it points at it;
+anything past the last page, or after the template stops matching, is
+cancelled or discarded.
+"""
+
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from utils.parsing import PageExtraction
+
+_TOKENS = re.compile(r"(\d+)")
+
+
+@dataclass
+class UrlTemplate:
+    """
+    Page URLs that differ only in one number: first + (page - 1) * step.
+
+    Either a number inside the URL (prefix + number + suffix) or a query
+    parameter that page 1 omits (start=10, start=20, ...).
+    """
+    prefix: str
+    suffix: str
+    first: int
+    step: int
+    param: Optional[str] = None
+
+    def url(self, page: int) -> str:
+        value = self.first + (page - 1) * self.step
+        if self.param is None:
+            return f"{self.prefix}{value}{self.suffix}"
+        parsed = urlparse(self.prefix)
+        query = parse_qsl(parsed.query, keep_blank_values=True)
+        if value:
+            query.append((self.param, str(value)))
+        return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+def _added_param(first_url: str, second_url: str) -> Optional[UrlTemplate]:
+    first, second = urlparse(first_url), urlparse(second_url)
+    if first._replace(query="") != second._replace(query=""):
+        return None
+    first_query = dict(parse_qsl(first.query, keep_blank_values=True))
+    second_query = dict(parse_qsl(second.query, keep_blank_values=True))
+    added = set(second_query) - set(first_query)
+    if len(added) != 1 or any(second_query.get(k) != v for k, v in first_query.items()):
+        return None
+    param = added.pop()
+    if not second_query[param].isdigit() or int(second_query[param]) == 0:
+        return None
+    template = UrlTemplate(first_url, "", 0, int(second_query[param]), param=param)
+    return template if template.url(2) == second_url else None
+
+
+def infer_template(first_url: str, second_url: str) -> Optional[UrlTemplate]:
+    """
+    Infer the numbering of page URLs from the URLs of pages 1 and 2.
+
+    Example:
+        infer_template("http://quotes.toscrape.com/page/1/",
+                       "http://quotes.toscrape.com/page/2/").url(5)
+        # "http://quotes.toscrape.com/page/5/"
+
+    Returns:
+        UrlTemplate, or None when the URLs differ in anything but one number
+    """
+    first_tokens = _TOKENS.split(first_url)
+    second_tokens = _TOKENS.split(second_url)
+    if len(first_tokens) == len(second_tokens):
+        differing = [i for i, (a, b) in enumerate(zip(first_tokens, second_tokens)) if a != b]
+        if len(differing) == 1 and differing[0] % 2 == 1:
+            i = differing[0]
+            first, second = int(first_tokens[i]), int(second_tokens[i])
+            if second > first:
+                return UrlTemplate("".join(first_tokens[:i]), "".join(first_tokens[i + 1:]),
+                                   first, second - first)
+        return None
+    return _added_param(first_url, second_url)
+
+
+def prefetch_pages(first_url: str, fetch_page: Callable[[str], PageExtraction],
+                   max_pages: int = 10, depth: int = 4) -> Iterator[PageExtraction]:
+    """
+    Yield pages in order, fetching up to depth pages ahead once the URL
+    template is known.
+
+    Page 1 is fetched alone; its URL and its Next link (page 2) give the
+    template. From then on up to depth pages are in flight ahead of the
+    last validated page, and a prefetched page is used only if it is the
+    page the Next link points at. When the Next link disappears the crawl
+    stops and outstanding prefetches are dropped; when it stops matching
+    the template the crawl continues serially. Without a template the
+    crawl is plain serial pagination.
+
+    Example:
+        for page in prefetch_pages(url, fetch_quotes_page, max_pages=10):
+            writer.write_many(page.records)
+
+    Args:
+        first_url (str): URL of page 1
+        fetch_page (callable): Fetches and parses one URL; called from threads
+        max_pages (int): Maximum number of pages to yield
+        depth (int): Pages fetched ahead of the last validated one
+
+    Yields:
+        PageExtraction: One per page, in pagination order
+
+    Raises:
+        Whatever fetch_page raises for a page that was actually needed
+    """
+    if max_pages < 1:
+        return
+    page = fetch_page(first_url)
+    yield page
+    if max_pages < 2 or not page.next_url:
+        return
+
+    template = infer_template(first_url, page.next_url) if depth > 0 else None
+
+    executor = ThreadPoolExecutor(max_workers=max(depth, 1), thread_name_prefix="prefetch")
+    ahead: Dict[int, Future] = {}
+    try:
+        number = 1
+        while number < max_pages and page.next_url:
+            number += 1
+            if template is not None:
+                # Keep pages number..number+depth-1 in flight
+                for n in range(number, min(number + depth, max_pages + 1)):
+                    if n not in ahead:
+                        ahead[n] = executor.submit(fetch_page, template.url(n))
+                if page.next_url == template.url(number):
+                    page = ahead.pop(number).result()
+                    yield page
+                    continue
+                # The Next chain left the template: drop the guesses, go serial
+                template = None
+                for future in ahead.values():
+                    future.cancel()
+                ahead.clear()
+            page = fetch_page(page.next_url)
+            yield page
+    finally:
+        for future in ahead.values():
+            future.cancel()
+        executor.shutdown(wait=False)
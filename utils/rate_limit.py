@@ -0,0 +1,155 @@
+"""
+Adaptive rate limiting.
+Token buckets with AIMD rate control: the rate grows slowly while requests
+succeed and is cut sharply on 429/503, honouring Retry-After when given.
+One limiter is kept per key (target domain or Zyte API key).
+"""
+
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from utils.config import RATE_LIMIT_CONFIG
+
+# Status codes that mean "slow down"
+THROTTLE_STATUSES = (429, 503)
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket with additive-increase/multiplicative-decrease.
+
+    Args:
+        initial_rate (float): Starting rate in requests per second
+        min_rate (float): Lowest rate the limiter backs off to
+        max_rate (float): Highest rate the limiter speeds up to
+        increase (float): Rate added after each successful response
+        decrease (float): Factor the rate is multiplied by when throttled
+        burst (int): Number of requests allowed back to back
+    """
+
+    def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.1,
+                 max_rate: float = 10.0, increase: float = 0.1,
+                 decrease: float = 0.5, burst: int = 1):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Claim one request slot.
+
+        Returns:
+            float: Seconds the caller must wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def feedback(self, status_code: int, retry_after: Optional[str] = None):
+        """
+        Adjust the rate from a response.
+
+        Args:
+            status_code (int): HTTP status of the response
+            retry_after (str): Raw Retry-After header value, if any
+        """
+        if status_code in THROTTLE_STATUSES:
+            self.on_throttle(parse_retry_after(retry_after))
+        elif status_code < 400:
+            self.on_success()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(key: str) -> AdaptiveRateLimiter:
+    """Return the shared limiter for a key, creating it from RATE_LIMIT_CONFIG."""
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter(**RATE_LIMIT_CONFIG)
+        return _limiters[key]
+
+
+def domain_limiter(url: str) -> AdaptiveRateLimiter:
+    """Return the shared limiter for the domain of a URL."""
+    return get_limiter(f"domain:{urlparse(url).netloc.lower()}")
+
+
+def limiters_for_request(api_key: str, url: Optional[str] = None) -> List[AdaptiveRateLimiter]:
+    """Return the API-key limiter plus the target domain limiter, if any."""
+    limiters = [get_limiter(f"apikey:{api_key}")]
+    if url:
+        limiters.append(domain_limiter(url))
+    return limiters
+
+
+def acquire_all(limiters: List[AdaptiveRateLimiter]):
+    """Block until every limiter allows a request."""
+    wait = max((limiter.reserve() for limiter in limiters), default=0.0)
+    if wait > 0:
+        time.sleep(wait)
+
+
+async def acquire_all_async(limiters: List[AdaptiveRateLimiter]):
+    """Async version of acquire_all."""
+    wait = max((limiter.reserve() for limiter in limiters), default=0.0)
+    if wait > 0:
+        await asyncio.sleep(wait)
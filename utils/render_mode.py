@@ -0,0 +1,260 @@
+"""
+Automatic browserHtml vs httpResponseBody selection.
+The first request for a URL pattern (host plus path, with numbers and query
+values wildcarded) is fetched both ways. If every selector of the scraper's
+schema matches at least as often in the raw HTTP body as in the rendered
+page, the pattern is served over plain HTTP from then on; otherwise it stays
+on browser rendering. Decisions are kept in a small JSON file so later runs
+skip the probe.
+
+Only payloads that need nothing from the browser beyond the HTML can switch:
+waitForSelector actions are dropped, any other action, network capture or
+automatic extraction keeps the browser.
+
+Set ZYTE_RENDER_MODE to "browser" to turn probing off, or "http" to force
+raw HTTP for every eligible payload.
+"""
+
+import os
+import re
+import threading
+import time
+from base64 import b64decode
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+import requests
+
+from utils import json_codec
+from utils.cache import cache_key
+from utils.client import get_client
+from utils.config import RENDER_MODE_CONFIG
+from utils.parsing import parse_html
+from utils.schema import Schema
+
+BROWSER = "browser"
+HTTP = "http"
+
+# Payload fields that only work with (or only make sense for) a browser render
+BROWSER_FIELDS = ("browserHtml", "javascript", "actions", "screenshot")
+# Outputs other than HTML; payloads asking for these are left alone
+OTHER_OUTPUT_FIELDS = ("networkCapture", "product", "productList", "productNavigation",
+                       "article", "articleList", "jobPosting", "screenshot")
+
+_NUMBER = re.compile(r"\d+")
+
+
+def url_pattern(url: str) -> str:
+    """
+    Group URLs that share a page template.
+
+    Example:
+        url_pattern("http://quotes.toscrape.com/page/7/") == "quotes.toscrape.com/page/{n}/"
+        url_pattern("https://id.indeed.com/jobs?q=fresh&l=Jakarta") == "id.indeed.com/jobs?l&q"
+    """
+    parsed = urlparse(url)
+    pattern = f"{parsed.hostname or ''}{_NUMBER.sub('{n}', parsed.path or '/')}"
+    keys = sorted({key for key, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return f"{pattern}?{'&'.join(keys)}" if keys else pattern
+
+
+def http_payload(payload: Dict) -> Optional[Dict]:
+    """
+    Return the httpResponseBody version of a browserHtml payload, or None
+    when the payload needs the browser (actions, captures, extraction).
+    """
+    if payload.get("httpResponseBody"):
+        return dict(payload)
+    if not payload.get("browserHtml") or any(payload.get(field) for field in OTHER_OUTPUT_FIELDS):
+        return None
+    if any(action.get("action") != "waitForSelector" for action in payload.get("actions", [])):
+        return None
+
+    converted = {key: value for key, value in payload.items() if key not in BROWSER_FIELDS}
+    converted["httpResponseBody"] = True
+    return converted
+
+
+def response_html(data: Dict, field: str = "browserHtml") -> str:
+    """HTML of an API response: field, or the decoded httpResponseBody."""
+    html = data.get(field)
+    if html:
+        return html
+    body = data.get("httpResponseBody")
+    if body:
+        return b64decode(body).decode("utf-8", errors="replace")
+    return ""
+
+
+def schema_matches(schema: Schema, raw_html: str, rendered_html: str,
+                   backend: Optional[str] = None) -> bool:
+    """
+    True when the rendered page has items and every schema selector matches
+    at least as many nodes in the raw HTML as in the rendered page.
+    """
+    raw = parse_html(raw_html, backend)
+    rendered = parse_html(rendered_html, backend)
+    if not rendered.css(schema.item):
+        return False
+    return all(len(raw.css(selector)) >= len(rendered.css(selector))
+               for selector in schema.selectors())
+
+
+class RenderModeStore:
+    """
+    JSON file of render mode decisions per URL pattern.
+
+    Args:
+        path (str): File the decisions are kept in
+    """
+
+    def __init__(self, path: str = RENDER_MODE_CONFIG["path"]):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "rb") as f:
+                self._modes: Dict[str, Dict] = json_codec.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            self._modes = {}
+
+    def get(self, pattern: str) -> Optional[str]:
+        with self._lock:
+            entry = self._modes.get(pattern)
+        return entry["mode"] if entry else None
+
+    def set(self, pattern: str, mode: str, **details):
+        with self._lock:
+            self._modes[pattern] = {"mode": mode, "probed_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                                    **details}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json_codec.dump(self._modes, f)
+            os.replace(tmp_path, self.path)
+
+
+class RenderModeSelector:
+    """
+    Picks browserHtml or httpResponseBody per URL pattern for one schema.
+
+    Example:
+        modes = RenderModeSelector(QUOTE_SCHEMA)
+        response = modes.post({"url": url, "browserHtml": True})
+        quotes = QUOTE_SCHEMA.extract_html(response_html(response.json()))
+
+    Args:
+        schema (Schema): Extraction schema the pages must satisfy
+        store (RenderModeStore): Decisions (default: RENDER_MODE_CONFIG path)
+        mode (str): "auto" to probe, "browser" or "http" to force
+        client: ZyteClient used for probes and posts (default: get_client())
+    """
+
+    def __init__(self, schema: Schema, store: Optional[RenderModeStore] = None,
+                 mode: str = RENDER_MODE_CONFIG["mode"], client=None):
+        if mode not in ("auto", BROWSER, HTTP):
+            raise ValueError(f"Unknown render mode: {mode}")
+        self.schema = schema
+        self.mode = mode
+        self._store = store
+        self._client = client
+        # One lock per URL pattern, so only callers of a pattern being probed wait
+        self._probe_locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        # Probe responses from payload_for(), until the caller collects them
+        self._probed: Dict[str, Dict] = {}
+
+    @property
+    def store(self) -> RenderModeStore:
+        if self._store is None:
+            self._store = RenderModeStore()
+        return self._store
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def payload_for(self, payload: Dict, timeout: Optional[float] = None) -> Dict:
+        """
+        Payload in the mode chosen for its URL, probing the pattern first if
+        needed. A probe already fetched the page in the chosen mode; its
+        decoded response is kept for pop_probed() (parse_pipeline's
+        prefetched hook) so the page is not requested again.
+        """
+        chosen, response = self._resolve(payload, timeout)
+        if response is not None and response.ok:
+            try:
+                data = response.json()
+            except ValueError:
+                return chosen
+            with self._locks_lock:
+                self._probed[cache_key(chosen)] = data
+        return chosen
+
+    def pop_probed(self, payload: Dict) -> Optional[Dict]:
+        """Take the probe response kept by payload_for() for this payload, if any."""
+        with self._locks_lock:
+            return self._probed.pop(cache_key(payload), None)
+
+    def post(self, payload: Dict, timeout: Optional[float] = None) -> requests.Response:
+        """
+        Send payload in the chosen mode. When this call probes, the probe's
+        response in the chosen mode is returned instead of fetching again.
+        """
+        payload, response = self._resolve(payload, timeout)
+        return response if response is not None else self.client.post(payload, timeout=timeout)
+
+    def _resolve(self, payload: Dict, timeout: Optional[float]) -> Tuple[Dict, Optional[requests.Response]]:
+        converted = http_payload(payload)
+        if converted is None or self.mode == BROWSER:
+            return payload, None
+        if self.mode == HTTP:
+            return converted, None
+
+        pattern = url_pattern(payload.get("url", ""))
+        mode = self.store.get(pattern)
+        if mode is None:
+            with self._probe_lock(pattern):
+                # Another caller may have probed while this one waited
+                mode = self.store.get(pattern)
+                if mode is None:
+                    mode, response = self._probe(pattern, payload, converted, timeout)
+                    return (converted if mode == HTTP else payload), response
+        return (converted, None) if mode == HTTP else (payload, None)
+
+    def _probe_lock(self, pattern: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._probe_locks.setdefault(pattern, threading.Lock())
+
+    def _probe(self, pattern: str, payload: Dict, converted: Dict,
+               timeout: Optional[float]) -> Tuple[str, Optional[requests.Response]]:
+        """
+        Fetch payload both ways and store the cheaper mode that still matches
+        the schema. A failed browser render decides nothing; a failed raw
+        fetch stores browserHtml.
+
+        Returns:
+            tuple: (mode, response fetched in that mode)
+        """
+        start = time.perf_counter()
+        rendered = self.client.post(payload, timeout=timeout)
+        browser_seconds = time.perf_counter() - start
+        if not rendered.ok:
+            return BROWSER, rendered
+
+        try:
+            start = time.perf_counter()
+            raw = self.client.post(converted, timeout=timeout)
+            raw.raise_for_status()
+            http_seconds = time.perf_counter() - start
+            matches = schema_matches(self.schema, response_html(raw.json()),
+                                     response_html(rendered.json()))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Raw HTTP probe failed for {pattern}: {str(e)}")
+            raw, matches, http_seconds = None, False, None
+
+        mode = HTTP if matches else BROWSER
+        self.store.set(pattern, mode, browser_seconds=round(browser_seconds, 3),
+                       http_seconds=round(http_seconds, 3) if http_seconds is not None else None)
+        print(f"Render mode for {pattern}: {'httpResponseBody' if mode == HTTP else 'browserHtml'}")
+        return mode, (raw if mode == HTTP else rendered)
@@ -0,0 +1,183 @@
+"""
+Declarative extraction schemas.
+A schema names the CSS selector of one item and how to read each field from
+it. compile_schema() validates and normalizes the spec once (and pre-compiles
+the selectors for the lxml backend), so extracting a page is a flat loop over
+prepared fields instead of hand-written selector code.
+
+Field specs:
+    ".author"                              text of the first match
+    {"selector": "a", "attr": "href"}      attribute of the first match
+    {"selector": ".tag", "many": True}     list with one value per match
+
+Optional field keys:
+    attr (str): Read this attribute instead of the text
+    deep (bool): Include descendant text (default True)
+    many (bool): Return a list of all matches
+    process (callable or list): Applied in order to each non-empty value
+    default: Value when nothing matches (default None, or [] with many)
+    required (bool): Skip the whole item when the field has no value
+    absolute (bool): Resolve the value against the base_url given to extract()
+    fallback (spec): Field spec tried when this one yields no value
+    value (callable): Computed per item, no selector (e.g. a timestamp)
+"""
+
+from typing import Callable, Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+from utils.parsing import Node, parse_html, precompile
+
+FIELD_KEYS = {"selector", "attr", "deep", "many", "process", "default",
+              "required", "absolute", "fallback", "value"}
+
+
+class MissingFieldError(ValueError):
+    """A required field had no value."""
+
+
+class Field:
+    """One compiled field of a schema."""
+
+    __slots__ = ("name", "selector", "attr", "deep", "many", "process",
+                 "default", "required", "absolute", "fallback", "value")
+
+    def __init__(self, name: str, spec: Union[str, Dict]):
+        if isinstance(spec, str):
+            spec = {"selector": spec}
+        unknown = set(spec) - FIELD_KEYS
+        if unknown:
+            raise ValueError(f"Unknown keys in field '{name}': {', '.join(sorted(unknown))}")
+        if ("selector" in spec) == ("value" in spec):
+            raise ValueError(f"Field '{name}' needs exactly one of 'selector' or 'value'")
+
+        process = spec.get("process", ())
+        self.name = name
+        self.selector = spec.get("selector")
+        self.attr = spec.get("attr")
+        self.deep = spec.get("deep", True)
+        self.many = spec.get("many", False)
+        self.process = tuple(process) if isinstance(process, (list, tuple)) else (process,)
+        self.default = spec.get("default", [] if self.many else None)
+        self.required = spec.get("required", False)
+        self.absolute = spec.get("absolute", False)
+        self.fallback = Field(name, spec["fallback"]) if "fallback" in spec else None
+        self.value = spec.get("value")
+
+    def selectors(self) -> List[str]:
+        """All selectors used by this field and its fallbacks."""
+        selectors = [self.selector] if self.selector else []
+        if self.fallback is not None:
+            selectors.extend(self.fallback.selectors())
+        return selectors
+
+    def _read(self, node: Node, base_url: Optional[str]):
+        value = node.attr(self.attr) if self.attr else node.text(self.deep)
+        if not value:
+            return None
+        if self.absolute and base_url:
+            value = urljoin(base_url, value)
+        for func in self.process:
+            value = func(value)
+        return value
+
+    def extract(self, item: Node, base_url: Optional[str] = None):
+        if self.value is not None:
+            return self.value()
+
+        if self.many:
+            values = [self._read(node, base_url) for node in item.css(self.selector)]
+            result = [value for value in values if value is not None]
+        else:
+            node = item.css_first(self.selector)
+            result = self._read(node, base_url) if node is not None else None
+
+        if not result and self.fallback is not None:
+            return self.fallback.extract(item, base_url)
+        return result if result else self.default
+
+
+class Schema:
+    """
+    Compiled extraction schema.
+
+    Example:
+        QUOTE_SCHEMA = compile_schema({
+            "item": ".quote",
+            "fields": {"author": ".author", "tags": {"selector": ".tag", "many": True}}
+        })
+        quotes = QUOTE_SCHEMA.extract_html(html)
+
+    Args:
+        item (str): CSS selector matching one element per record
+        fields (dict): Field name -> field spec, in output order
+    """
+
+    def __init__(self, item: str, fields: Dict[str, Union[str, Dict]]):
+        self.item = item
+        self.fields = tuple(Field(name, spec) for name, spec in fields.items())
+        precompile(self.selectors())
+
+    def selectors(self) -> List[str]:
+        """All CSS selectors the schema uses."""
+        selectors = [self.item]
+        for field in self.fields:
+            selectors.extend(field.selectors())
+        return selectors
+
+    def extract_item(self, item: Node, base_url: Optional[str] = None) -> Dict:
+        """
+        Extract one record from an item element.
+
+        Raises:
+            MissingFieldError: A required field had no value
+        """
+        record = {}
+        for field in self.fields:
+            value = field.extract(item, base_url)
+            if field.required and not value:
+                raise MissingFieldError(f"Missing required field '{field.name}'")
+            record[field.name] = value
+        return record
+
+    def extract(self, document: Node, base_url: Optional[str] = None,
+                on_error: Optional[Callable[[Exception], None]] = None) -> List[Dict]:
+        """
+        Extract all records from a parsed page.
+
+        Items that raise (e.g. a missing required field) are skipped and
+        passed to on_error.
+
+        Args:
+            document (Node): Parsed page from parse_html()
+            base_url (str): Resolves fields marked absolute
+            on_error (callable): Called with the exception of each skipped item
+
+        Returns:
+            list: Extracted records, in page order
+        """
+        records = []
+        for item in document.css(self.item):
+            try:
+                records.append(self.extract_item(item, base_url))
+            except Exception as e:
+                if on_error is not None:
+                    on_error(e)
+        return records
+
+    def extract_html(self, html: str, base_url: Optional[str] = None,
+                     on_error: Optional[Callable[[Exception], None]] = None,
+                     backend: Optional[str] = None) -> List[Dict]:
+        """Parse html and extract all records from it."""
+        return self.extract(parse_html(html, backend), base_url, on_error)
+
+
+def compile_schema(spec: Dict) -> Schema:
+    """
+    Compile a schema spec of the form {"item": selector, "fields": {...}}.
+
+    Raises:
+        ValueError: The spec is malformed
+    """
+    if "item" not in spec or "fields" not in spec:
+        raise ValueError("Schema spec needs 'item' and 'fields'")
+    return Schema(spec["item"], spec["fields"])
@@ -0,0 +1,222 @@
+"""
+Persistent seen-item index for incremental crawling.
+Stores item keys (job key, product_url, style_code, ...) in SQLite with
+first-seen and last-seen timestamps so later runs can skip known items and
+stop paginating once a page holds nothing new.
+"""
+
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from utils.config import SEEN_INDEX_PATH
+
+
+def item_key(record: Dict, fields: Sequence[str]) -> Optional[str]:
+    """Return the first non-empty value among fields, as a string."""
+    for field in fields:
+        value = record.get(field)
+        if value:
+            return str(value)
+    return None
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter: no false negatives, bounded false positives.
+
+    Args:
+        capacity (int): Expected number of keys
+        error_rate (float): Target false-positive rate at capacity
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenIndex:
+    """
+    SQLite-backed index of item keys seen by earlier runs.
+
+    Example:
+        with SeenIndex("indeed_jobs") as seen:
+            new_jobs = seen.unseen(jobs, ("job_key", "url"))
+            write_jsonl(jobs, filename)
+            seen.mark_records(jobs, ("job_key", "url"))
+
+    Args:
+        namespace (str): Keeps keys of different scrapers apart
+        path (str): SQLite database file (default: SEEN_INDEX_PATH)
+        use_bloom (bool): Answer "not seen" from an in-memory Bloom filter
+            without touching the database
+        bloom_capacity (int): Expected number of keys for the Bloom filter
+    """
+
+    def __init__(self, namespace: str, path: str = SEEN_INDEX_PATH,
+                 use_bloom: bool = False, bloom_capacity: int = 1_000_000):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_items ("
+            " namespace TEXT NOT NULL,"
+            " key TEXT NOT NULL,"
+            " first_seen TEXT NOT NULL,"
+            " last_seen TEXT NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        self._conn.commit()
+
+        self.bloom = None
+        if use_bloom:
+            self.bloom = BloomFilter(bloom_capacity)
+            for (key,) in self._conn.execute(
+                "SELECT key FROM seen_items WHERE namespace = ?", (namespace,)
+            ):
+                self.bloom.add(key)
+
+    def seen(self, key: str) -> bool:
+        """Return True if the key was recorded by this or an earlier run."""
+        with self._lock:
+            return self._seen_locked(key)
+
+    def _seen_locked(self, key: str) -> bool:
+        if self.bloom is not None and key not in self.bloom:
+            return False
+        row = self._conn.execute(
+            "SELECT 1 FROM seen_items WHERE namespace = ? AND key = ?",
+            (self.namespace, key)
+        ).fetchone()
+        return row is not None
+
+    def mark(self, keys: Iterable[str]) -> List[str]:
+        """
+        Record keys as seen now.
+
+        The check and the insert run under one lock, so two threads marking
+        the same key never both report it as new.
+
+        Returns:
+            list: Keys that had not been seen before, in input order
+        """
+        keys = [key for key in dict.fromkeys(keys) if key]
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+
+        with self._lock:
+            new_keys = [key for key in keys if not self._seen_locked(key)]
+            self._conn.executemany(
+                "INSERT INTO seen_items (namespace, key, first_seen, last_seen)"
+                " VALUES (?, ?, ?, ?)"
+                " ON CONFLICT(namespace, key) DO UPDATE SET last_seen = excluded.last_seen",
+                [(self.namespace, key, now, now) for key in keys]
+            )
+            self._conn.commit()
+            if self.bloom is not None:
+                for key in new_keys:
+                    self.bloom.add(key)
+        return new_keys
+
+    def mark_records(self, records: Sequence[Dict], fields: Sequence[str]) -> List[str]:
+        """
+        Record the keys of records as seen now.
+
+        Call this once the records are safely written, so a failed write
+        leaves them new for the next run.
+
+        Returns:
+            list: Keys that had not been seen before, in input order
+        """
+        return self.mark(item_key(record, fields) for record in records)
+
+    def unseen(self, records: Sequence[Dict], fields: Sequence[str]) -> List[Dict]:
+        """
+        Return the records not seen by an earlier run, without marking them.
+
+        Records without a key are always treated as new; repeated keys are
+        returned once.
+
+        Args:
+            records (list): Scraped records
+            fields (sequence): Record fields tried in order for the key
+        """
+        new_records, returned = [], set()
+        with self._lock:
+            for record in records:
+                key = item_key(record, fields)
+                if key is None:
+                    new_records.append(record)
+                elif key not in returned and not self._seen_locked(key):
+                    returned.add(key)
+                    new_records.append(record)
+        return new_records
+
+    def filter_new(self, records: Sequence[Dict], fields: Sequence[str]) -> List[Dict]:
+        """
+        Mark records as seen and return only those not seen before.
+
+        Records without a key are always treated as new. The records are
+        marked immediately; when they still have to be written, use
+        unseen() and mark_records() after the write instead.
+
+        Args:
+            records (list): Scraped records
+            fields (sequence): Record fields tried in order for the key
+        """
+        keys = [item_key(record, fields) for record in records]
+        new_keys = set(self.mark(key for key in keys if key))
+        new_records = []
+        for record, key in zip(records, keys):
+            if key is None or key in new_keys:
+                new_records.append(record)
+                new_keys.discard(key)
+        return new_records
+
+    def all_known(self, records: Sequence[Dict], fields: Sequence[str]) -> bool:
+        """Return True if every keyed record was seen before (early-stop signal)."""
+        keys = [item_key(record, fields) for record in records]
+        keys = [key for key in keys if key]
+        return bool(keys) and all(self.seen(key) for key in keys)
+
+    def stats(self, key: str) -> Optional[Dict]:
+        """Return first_seen/last_seen for a key, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT first_seen, last_seen FROM seen_items WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+        return {"first_seen": row[0], "last_seen": row[1]} if row else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM seen_items WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()